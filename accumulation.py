@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Acumulados de precipitação para o Monitor de Maré e Clima - Recife
+
+Este módulo mantém somas prefixadas (prefix sums) da precipitação horária de
+uma ou várias localidades. Qualquer acumulado em janela (1h, 3h, 6h, 12h, 24h,
+72h, 7 dias, passado ou futuro) é respondido em O(1) por localidade, e novas
+horas são incorporadas de forma incremental.
+
+Janelas que os dados não cobrem por inteiro (ex.: 7 dias passados com apenas
+48h de previsão) não têm acumulado: o resultado é NaN (None em windows), e
+não uma soma parcial apresentada como completa.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Janelas padrão de acumulado usadas na resposta a alagamentos (em horas)
+STANDARD_WINDOWS = {'1h': 1, '3h': 3, '6h': 6, '12h': 12, '24h': 24, '72h': 72, '7d': 168}
+
+HOUR = timedelta(hours=1)
+
+class AccumulationIndex:
+    """
+    Índice de somas prefixadas de precipitação horária por localidade
+
+    A posição i corresponde à hora que começa em start + i horas. Janelas
+    passadas incluem a hora em curso; janelas futuras começam na hora seguinte,
+    de forma que passado e futuro nunca contam a mesma hora.
+    """
+
+    def __init__(self, start: datetime, n_locations: int = 1, capacity: int = 24 * 8):
+        self.start = start
+        self.n_locations = n_locations
+        self.length = 0
+        # prefix[:, k] = soma das k primeiras horas
+        self._prefix = np.zeros((n_locations, capacity + 1), dtype=np.float64)
+
+    @classmethod
+    def from_series(cls, start, values):
+        """
+        Cria o índice a partir de uma série (localidades x horas)
+
+        Args:
+            start: Início da primeira hora
+            values: Array 1D (uma localidade) ou 2D (localidades x horas)
+        """
+        values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        index = cls(start, values.shape[0], capacity=values.shape[1])
+        index.extend(values)
+        return index
+
+    @classmethod
+    def from_hours(cls, hours):
+        """
+        Cria o índice a partir da lista 'horas' da previsão
+
+        Horas ausentes contam como zero; horas repetidas ficam com o último valor.
+
+        Args:
+            hours: Lista de dicts com 'hora' ("%Y-%m-%d %H:%M") e 'precipitacao'
+        """
+        parsed = []
+        for hour in hours:
+            try:
+                parsed.append((datetime.strptime(hour['hora'], "%Y-%m-%d %H:%M"), hour.get('precipitacao') or 0))
+            except (KeyError, ValueError):
+                continue
+        if not parsed:
+            return cls(datetime.now(), capacity=0)
+        start = min(dt for dt, _ in parsed)
+        slots = [int(round((dt - start) / HOUR)) for dt, _ in parsed]
+        values = np.zeros(max(slots) + 1)
+        values[slots] = [value for _, value in parsed]
+        return cls.from_series(start, values)
+
+    def _slot(self, dt):
+        """Posição da hora que contém dt (pode estar fora do índice)"""
+        return int((dt - self.start) // HOUR)
+
+    def _reserve(self, extra):
+        needed = self.length + extra + 1
+        if needed > self._prefix.shape[1]:
+            grown = np.zeros((self.n_locations, max(needed, 2 * self._prefix.shape[1])))
+            grown[:, :self.length + 1] = self._prefix[:, :self.length + 1]
+            self._prefix = grown
+
+    def extend(self, values):
+        """
+        Acrescenta novas horas ao final do índice (custo proporcional às horas novas)
+
+        Args:
+            values: Array (localidades,) para uma hora ou (localidades x horas)
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(self.n_locations, -1)
+        self._reserve(values.shape[1])
+        end = self.length + values.shape[1]
+        self._prefix[:, self.length + 1:end + 1] = self._prefix[:, [self.length]] + np.cumsum(values, axis=1)
+        self.length = end
+
+    def update_from(self, dt, values):
+        """
+        Substitui as horas a partir de dt (ex.: previsão revisada)
+
+        Apenas o trecho a partir de dt é recalculado.
+
+        Args:
+            dt: Início da primeira hora substituída
+            values: Array (localidades x horas) com os novos valores
+        """
+        slot = min(max(self._slot(dt), 0), self.length)
+        self.length = slot
+        self.extend(values)
+
+    def hourly(self):
+        """Série horária reconstruída (localidades x horas)"""
+        return np.diff(self._prefix[:, :self.length + 1], axis=1)
+
+    def trailing_sums(self, hours):
+        """Acumulado das `hours` horas terminadas em cada posição (localidades x horas)"""
+        slots = np.arange(self.length)
+        return self._prefix[:, slots + 1] - self._prefix[:, np.maximum(slots - hours + 1, 0)]
+
+    def covers(self, first_slot, last_slot):
+        """Indica se o índice contém todas as horas de first_slot a last_slot"""
+        return 0 <= first_slot and last_slot < self.length
+
+    def range_sum(self, first_slot, last_slot, partial=False):
+        """
+        Soma das horas de first_slot a last_slot (inclusive) — O(1)
+
+        Args:
+            partial: Se True, soma apenas as horas disponíveis; senão, uma
+                     janela não coberta por inteiro resulta em NaN
+
+        Returns:
+            Array (localidades,) com os acumulados
+        """
+        if not partial and not self.covers(first_slot, last_slot):
+            return np.full(self.n_locations, np.nan)
+        lo = min(max(first_slot, 0), self.length)
+        hi = min(max(last_slot + 1, 0), self.length)
+        if hi <= lo:
+            return np.zeros(self.n_locations)
+        return self._prefix[:, hi] - self._prefix[:, lo]
+
+    def past(self, now, hours, partial=False):
+        """Acumulado das últimas `hours` horas, incluindo a hora em curso"""
+        slot = self._slot(now)
+        return self.range_sum(slot - hours + 1, slot, partial)
+
+    def future(self, now, hours, partial=False):
+        """Acumulado previsto para as próximas `hours` horas"""
+        slot = self._slot(now)
+        return self.range_sum(slot + 1, slot + hours, partial)
+
+    def windows(self, now, windows=None, location=0):
+        """
+        Acumulados passados e futuros em várias janelas
+
+        Args:
+            now: Horário de referência
+            windows: dict nome -> horas (padrão: STANDARD_WINDOWS)
+            location: Localidade (índice) ou None para arrays com todas
+
+        Returns:
+            dict: {'passado': {janela: mm}, 'futuro': {janela: mm}}; janelas
+                  não cobertas pelos dados valem None (NaN nos arrays)
+        """
+        windows = windows or STANDARD_WINDOWS
+        result = {'passado': {}, 'futuro': {}}
+        for name, hours in windows.items():
+            past, future = self.past(now, hours), self.future(now, hours)
+            if location is None:
+                result['passado'][name] = np.round(past, 1)
+                result['futuro'][name] = np.round(future, 1)
+            else:
+                result['passado'][name] = _rounded(past[location])
+                result['futuro'][name] = _rounded(future[location])
+        return result
+
+    def summary(self, now, location=0):
+        """
+        Acumulados no formato dos dados de previsão da aplicação
+
+        'precipitacao_24h' e 'precipitacao_proximas_24h' alimentam as regras
+        de risco e precisam de um número: quando os dados não cobrem as 24h
+        inteiras, valem a soma das horas disponíveis. As janelas incompletas
+        ficam None em 'acumulados'.
+
+        Returns:
+            dict: 'precipitacao_24h', 'precipitacao_proximas_24h' e 'acumulados'
+        """
+        return {
+            'precipitacao_24h': _rounded(self.past(now, 24, partial=True)[location]),
+            'precipitacao_proximas_24h': _rounded(self.future(now, 24, partial=True)[location]),
+            'acumulados': self.windows(now, location=location),
+        }
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 1)
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gravação e reprodução do tráfego dos provedores - Monitor de Maré e Clima - Recife
+
+Um cassete guarda as respostas brutas dos provedores (corpo, código HTTP,
+latência e horário) em um único arquivo JSON comprimido com LZMA. Todas as
+requisições de providers._http_get_json passam pelo cassete ativo:
+- no modo 'gravar', a requisição real é feita e a resposta é acrescentada;
+- no modo 'reproduzir', a resposta vem do arquivo, sem rede.
+
+Na reprodução, a n-ésima requisição a um endereço recebe a n-ésima resposta
+gravada para ele, e a mesma gravação sempre produz os mesmos dados. A latência
+original pode ser repetida, acelerada ou ignorada (padrão). Parâmetros
+sensíveis, como a chave da API, não são gravados.
+
+Na gravação, as respostas ficam em memória e o arquivo é regravado a cada
+RECALERT_CASSETTE_SAVE_EVERY interações, em close() e no término do processo.
+
+O cassete é ativado por variáveis de ambiente (RECALERT_CASSETTE e
+RECALERT_CASSETTE_MODE) ou por use_cassette().
+
+Uso:
+    python cassette.py gravar tempestade.cassete --intervalo 1800 --vezes 48
+    python cassette.py reproduzir tempestade.cassete --graficos
+    python cassette.py info tempestade.cassete
+"""
+
+import argparse
+import atexit
+import json
+import lzma
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Cassete ativado pelo ambiente (vazio: desativado) e modo ('gravar' ou 'reproduzir')
+DEFAULT_CASSETTE_PATH = os.environ.get("RECALERT_CASSETTE", "")
+DEFAULT_CASSETTE_MODE = os.environ.get("RECALERT_CASSETTE_MODE", "reproduzir")
+
+MODES = ('gravar', 'reproduzir')
+
+# Parâmetros removidos antes de gravar e ignorados na comparação das requisições
+SENSITIVE_PARAMS = ('key', 'apikey', 'api_key', 'token')
+
+FORMAT_VERSION = 1
+
+# Interações gravadas em memória antes de regravar o arquivo
+SAVE_EVERY = int(os.environ.get("RECALERT_CASSETTE_SAVE_EVERY", "20"))
+
+class CassetteError(Exception):
+    """Requisição sem resposta gravada ou falha de rede reproduzida"""
+
+def _request_key(url, params):
+    """Identificador da requisição: endereço e parâmetros não sensíveis, ordenados"""
+    public = sorted((str(k), str(v)) for k, v in (params or {}).items() if k not in SENSITIVE_PARAMS)
+    return json.dumps([url, public], ensure_ascii=False)
+
+class Cassette:
+    """
+    Classe para gravar ou reproduzir as respostas dos provedores
+    """
+
+    def __init__(self, path: str, mode: str = 'reproduzir', speed: float = 0, save_every: int = SAVE_EVERY):
+        """
+        Args:
+            path: Arquivo do cassete
+            mode: 'gravar' (acrescenta ao arquivo) ou 'reproduzir'
+            speed: Na reprodução, divide a latência gravada (1 = tempo real,
+                   10 = dez vezes mais rápido, 0 = sem espera)
+            save_every: Na gravação, interações acumuladas antes de regravar o arquivo
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo de cassete desconhecido: {mode} (use {' ou '.join(MODES)})")
+        if mode == 'reproduzir' and not os.path.exists(path):
+            raise FileNotFoundError(f"Cassete não encontrado: {path}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.interactions = self._load() if os.path.exists(path) else []
+        self.clock = None
+        self.save_every = max(1, save_every)
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.rewind()
+        if mode == 'gravar':
+            atexit.register(self.close)
+
+    @property
+    def replaying(self):
+        return self.mode == 'reproduzir'
+
+    def _load(self):
+        with lzma.open(self.path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('versao') != FORMAT_VERSION:
+            raise CassetteError(f"Versão de cassete não suportada: {payload.get('versao')}")
+        return payload['interacoes']
+
+    def _save(self, interactions):
+        """Grava o arquivo de forma atômica"""
+        payload = {'versao': FORMAT_VERSION, 'interacoes': interactions}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with lzma.open(os.fdopen(fd, 'wb'), 'wt', encoding='utf-8', preset=9) as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def rewind(self):
+        """Volta a reprodução para o início da gravação"""
+        with self._lock:
+            self._queues = defaultdict(deque)
+            for interaction in self.interactions:
+                self._queues[interaction['requisicao']].append(interaction)
+            self.clock = None
+
+    def remaining(self):
+        """Respostas gravadas ainda não reproduzidas"""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def record(self, url, params, status=None, body=None, elapsed=0.0, error=None):
+        """
+        Acrescenta uma resposta (ou falha de rede) à gravação
+
+        Args:
+            url, params: Requisição feita
+            status: Código HTTP
+            body: Corpo da resposta (texto: JSON ou HTML)
+            elapsed: Latência em segundos
+            error: Exceção, se a requisição falhou sem resposta
+        """
+        interaction = {
+            'requisicao': _request_key(url, params),
+            'gravado_em': datetime.now().isoformat(timespec='seconds'),
+            'latencia': round(elapsed, 4),
+        }
+        if error is not None:
+            # A mensagem da exceção pode trazer a URL completa, com a chave
+            message = f"{type(error).__name__}: {error}"
+            for name, value in (params or {}).items():
+                if name in SENSITIVE_PARAMS and value:
+                    message = message.replace(str(value), "***")
+            interaction['erro'] = message
+        else:
+            interaction.update(status=status, corpo=body)
+        with self._lock:
+            self.interactions.append(interaction)
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Grava no arquivo as interações ainda só em memória"""
+        # A compressão roda fora de _lock: as requisições continuam sendo gravadas
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return
+                interactions = list(self.interactions)
+                self._unsaved = 0
+            try:
+                self._save(interactions)
+            except BaseException:
+                # O arquivo continua com a versão anterior: regrava na próxima vez
+                with self._lock:
+                    self._unsaved = max(self._unsaved, 1)
+                raise
+
+    def close(self):
+        """Grava as interações pendentes (pode ser chamado mais de uma vez)"""
+        if self.mode == 'gravar':
+            self.flush()
+
+    def play(self, url, params):
+        """
+        Próxima resposta gravada para a requisição
+
+        Returns:
+            str: Corpo da resposta
+
+        Raises:
+            CassetteError: Sem resposta gravada, falha de rede ou código HTTP de erro gravados
+        """
+        key = _request_key(url, params)
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteError(f"Sem resposta gravada para {url}")
+            interaction = queue.popleft()
+            self.clock = datetime.fromisoformat(interaction['gravado_em'])
+        if self.speed:
+            time.sleep(interaction['latencia'] / self.speed)
+        if 'erro' in interaction:
+            raise CassetteError(f"Falha gravada: {interaction['erro']}")
+        if interaction['status'] >= 400:
+            raise CassetteError(f"HTTP {interaction['status']} gravado para {url}")
+        return interaction['corpo']
+
+    def summary(self):
+        """Resumo da gravação: requisições por endereço, período e tamanho"""
+        by_url = defaultdict(int)
+        for interaction in self.interactions:
+            by_url[json.loads(interaction['requisicao'])[0]] += 1
+        times = [interaction['gravado_em'] for interaction in self.interactions]
+        return {
+            'interacoes': len(self.interactions),
+            'por_endereco': dict(by_url),
+            'inicio': min(times) if times else None,
+            'fim': max(times) if times else None,
+            'bytes_arquivo': os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            'bytes_corpos': sum(len((i.get('corpo') or '').encode('utf-8')) for i in self.interactions),
+        }
+
+_active = None
+_active_lock = threading.Lock()
+_env_checked = False
+
+def active_cassette():
+    """Cassete ativo do processo (ou None); na primeira chamada considera o ambiente"""
+    global _active, _env_checked
+    with _active_lock:
+        if not _env_checked:
+            _env_checked = True
+            if _active is None and DEFAULT_CASSETTE_PATH:
+                _active = Cassette(DEFAULT_CASSETTE_PATH, DEFAULT_CASSETTE_MODE)
+        return _active
+
+@contextmanager
+def use_cassette(cassette):
+    """Ativa um cassete durante o bloco with"""
+    global _active, _env_checked
+    with _active_lock:
+        previous, _active, _env_checked = _active, cassette, True
+    try:
+        yield cassette
+    finally:
+        with _active_lock:
+            _active = previous
+
+def record_session(path, interval, times, api_key=None):
+    """
+    Grava consultas periódicas aos provedores remotos
+
+    Args:
+        path: Arquivo do cassete (acrescenta se existir)
+        interval: Intervalo entre consultas (segundos)
+        times: Número de consultas
+        api_key: Chave da WeatherAPI.com (padrão: WEATHERAPI_KEY)
+
+    Returns:
+        Cassette gravado
+    """
+    from providers import OpenMeteoProvider, WeatherAPIProvider
+
+    cassette = Cassette(path, 'gravar')
+    api_key = api_key or os.environ.get("WEATHERAPI_KEY", "SUA_CHAVE_API_AQUI")
+    providers = [WeatherAPIProvider(api_key), OpenMeteoProvider()]
+    with use_cassette(cassette):
+        for i in range(times):
+            if i:
+                time.sleep(interval)
+            # Todos os provedores remotos são consultados, não só o primeiro que responde
+            for provider in providers:
+                try:
+                    provider.fetch()
+                    status = "ok"
+                except Exception as e:
+                    status = f"falhou ({e})"
+                print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {provider.name}: {status}")
+    cassette.close()
+    return cassette
+
+def replay_benchmark(path, speed=0, charts=False, seed=0):
+    """
+    Reproduz um cassete do início ao fim medindo coleta, risco e gráficos
+
+    Cada passo consulta a cadeia de provedores remotos (a resposta vem do
+    cassete e é interpretada pelos provedores), avalia o risco e, se pedido,
+    renderiza o gráfico de maré e precipitação. A maré é simulada com semente
+    fixa, já que a coleta de maré não passa pela rede.
+
+    Returns:
+        dict: 'passos' (horário gravado, provedor, nível, pontuação) e
+              'tempos' (segundos totais por etapa)
+    """
+    from providers import OpenMeteoProvider, ProviderChain, ProviderChainError, WeatherAPIProvider
+    from recalert_core import RiskAssessor, TideDataManager
+
+    cassette = Cassette(path, 'reproduzir', speed)
+    # Chave fictícia: a chave não é gravada nem usada para identificar as requisições
+    chain = ProviderChain([WeatherAPIProvider("reproducao"), OpenMeteoProvider()])
+    tide_data = TideDataManager(use_simulated_data=True, seed=seed).get_tide_data()
+    timings = defaultdict(float)
+    steps = []
+    with use_cassette(cassette):
+        while cassette.remaining():
+            remaining = cassette.remaining()
+            start = time.perf_counter()
+            try:
+                source, weather_data, forecast_data = chain.fetch()
+            except ProviderChainError:
+                # Respostas restantes só de provedores que a cadeia não consulta mais
+                if cassette.remaining() == remaining:
+                    break
+                continue
+            timings['coleta'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            level, _ = RiskAssessor.assess_risk(weather_data, forecast_data, tide_data)
+            timings['risco'] += time.perf_counter() - start
+
+            if charts:
+                from chart_renderer import render_chart
+                start = time.perf_counter()
+                render_chart('mare_precipitacao', forecast_data, tide_data)
+                timings['grafico'] += time.perf_counter() - start
+
+            steps.append({
+                'gravado_em': cassette.clock.isoformat(timespec='minutes') if cassette.clock else None,
+                'fonte': source,
+                'nivel': level,
+                'precipitacao_24h': forecast_data.get('precipitacao_24h'),
+                'precipitacao_proximas_24h': forecast_data.get('precipitacao_proximas_24h'),
+            })
+    chain.executor.shutdown(wait=False)
+    return {'passos': steps, 'tempos': {name: round(value, 4) for name, value in timings.items()}}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grava e reproduz o tráfego dos provedores")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    record_parser = subparsers.add_parser("gravar", help="Grava consultas periódicas aos provedores")
+    record_parser.add_argument("arquivo", help="Arquivo do cassete")
+    record_parser.add_argument("--intervalo", type=float, default=1800, help="Segundos entre consultas")
+    record_parser.add_argument("--vezes", type=int, default=1, help="Número de consultas")
+
+    replay_parser = subparsers.add_parser("reproduzir", help="Reproduz e mede coleta, risco e gráficos")
+    replay_parser.add_argument("arquivo", help="Arquivo do cassete")
+    replay_parser.add_argument("--velocidade", type=float, default=0,
+                               help="Divide a latência gravada (1 = tempo real; 0 = sem espera)")
+    replay_parser.add_argument("--graficos", action="store_true", help="Também renderiza os gráficos")
+    replay_parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+
+    info_parser = subparsers.add_parser("info", help="Resume o conteúdo de um cassete")
+    info_parser.add_argument("arquivo", help="Arquivo do cassete")
+
+    args = parser.parse_args(argv)
+    if args.comando == "gravar":
+        cassette = record_session(args.arquivo, args.intervalo, args.vezes)
+        print(json.dumps(cassette.summary(), ensure_ascii=False))
+    elif args.comando == "info":
+        print(json.dumps(Cassette(args.arquivo).summary(), ensure_ascii=False, indent=2))
+    else:
+        result = replay_benchmark(args.arquivo, args.velocidade, args.graficos)
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        else:
+            for step in result['passos']:
+                print(f"{step['gravado_em']}  {step['fonte']:<12} {step['nivel']:<6} "
+                      f"chuva 24h {step['precipitacao_24h']} mm, próximas 24h {step['precipitacao_proximas_24h']} mm")
+            count = max(len(result['passos']), 1)
+            print("Tempo por passo: " + ", ".join(
+                f"{name} {total / count * 1000:.1f} ms" for name, total in result['tempos'].items()
+            ))
+    return 0
+
+if __name__ == "__main__":
+    # providers importa o módulo "cassette": o cassete ativo precisa ser o mesmo
+    from cassette import main
+    sys.exit(main())
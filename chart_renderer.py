@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Renderização de gráficos fora da thread do Streamlit - Monitor de Maré e Clima - Recife
+
+Este módulo monta os gráficos Matplotlib e os rasteriza em um pool de
+processos com o backend Agg, devolvendo bytes PNG ou SVG. A sessão continua
+respondendo enquanto o gráfico é desenhado; até a nova imagem ficar pronta,
+a página exibe a anterior. As mesmas imagens servem de anexo para e-mails de
+alerta e relatórios. Não depende do Streamlit.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import matplotlib
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+
+from view_model import build_view_model
+
+# Processos do pool de renderização
+DEFAULT_WORKERS = 2
+
+# Resolução das imagens PNG
+DEFAULT_DPI = 100
+
+# Imagens prontas mantidas por processo (as mais recentes)
+MAX_CACHED_IMAGES = 32
+
+def create_matplotlib_graphs(forecast_data, tide_data, view=None):
+    """
+    Cria gráficos usando Matplotlib para exibição no Streamlit
+    
+    Args:
+        forecast_data: Dados de previsão meteorológica
+        tide_data: Dados de maré
+        view: Modelo de visualização do snapshot (ver view_model; montado
+              a partir dos dados se omitido)
+        
+    Returns:
+        Figure: Figura do Matplotlib com os gráficos
+    """
+    view = view or build_view_model({}, forecast_data, tide_data)
+    tide = view['mare']
+    precipitation = view['precipitacao']
+
+    # Configuração do tema escuro
+    plt.style.use('dark_background')
+    
+    # Cria figura com dois subplots
+    fig = Figure(figsize=(10, 8), facecolor='#1E1E1E')
+    
+    # Gráfico de maré
+    ax1 = fig.add_subplot(211)
+    
+    # Se temos pelo menos dois pontos, plota o gráfico de maré
+    if tide['curva'] is not None:
+        # Plota a linha de maré (mesma curva interpolada do gráfico interativo)
+        ax1.plot(tide['curva']['tempos'], tide['curva']['alturas'], color='#3498DB', linewidth=2)
+        
+        # Plota os pontos de maré conhecidos
+        ax1.scatter(tide['tempos'], tide['alturas'], color='#3498DB', s=50, zorder=5)
+        
+        # Adiciona linha horizontal para maré atual
+        current_height = tide_data.get('mare_atual', {}).get('altura', 0)
+        ax1.axhline(y=current_height, color='#F39C12', linestyle='--', alpha=0.7)
+        
+        # Adiciona texto para maré atual
+        ax1.text(tide['tempos'][0], current_height, f"Atual: {current_height} m",
+                color='#F39C12', ha='left', va='bottom')
+    
+    # Configura o gráfico de maré
+    ax1.set_title("Evolução da Maré", color='#FFFFFF')
+    ax1.set_ylabel("Altura (m)", color='#FFFFFF')
+    ax1.tick_params(axis='both', colors='#FFFFFF')
+    ax1.grid(True, alpha=0.3)
+    
+    # Formata o eixo x para exibir apenas horas
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    
+    # Cria subplot para precipitação
+    ax2 = fig.add_subplot(212)
+    
+    # Plota barras de precipitação das últimas 24h e próximas 24h
+    past, future = precipitation['passado'], precipitation['futuro']
+    if past['tempos'] or future['tempos']:
+        # Cores diferentes para passado (verde) e futuro (verde-água)
+        colors = ['#2ECC71'] * len(past['tempos']) + ['#1ABC9C'] * len(future['tempos'])
+        ax2.bar(past['tempos'] + future['tempos'], past['valores'] + future['valores'],
+                width=0.02, color=colors, alpha=0.7)
+        
+        # Adiciona linha vertical para o momento atual
+        now = view['agora']
+        ax2.axvline(x=now, color='#F39C12', linestyle='--', alpha=0.7)
+        ax2.text(now, precipitation['maximo'] * 0.9, "Agora",
+                color='#F39C12', ha='center', va='top', rotation=90)
+    
+    # Configura o gráfico de precipitação
+    ax2.set_title("Precipitação", color='#FFFFFF')
+    ax2.set_ylabel("Precipitação (mm)", color='#FFFFFF')
+    ax2.set_xlabel("Hora", color='#FFFFFF')
+    ax2.tick_params(axis='both', colors='#FFFFFF')
+    ax2.grid(True, alpha=0.3)
+    
+    # Formata o eixo x para exibir apenas horas
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    
+    # Ajusta o layout
+    fig.tight_layout()
+    
+    return fig
+
+def figure_bytes(fig, fmt='png', dpi=DEFAULT_DPI):
+    """Serializa uma figura Matplotlib em bytes PNG ou SVG"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, facecolor=fig.get_facecolor())
+    return buffer.getvalue()
+
+# Gráficos disponíveis para renderização: nome -> função (forecast_data, tide_data, view) -> Figure
+CHARTS = {
+    'mare_precipitacao': create_matplotlib_graphs,
+}
+
+def _init_worker():
+    # Backend sem interface gráfica: os processos apenas rasterizam
+    matplotlib.use('Agg')
+
+def _ready():
+    return True
+
+def _minute(now=None):
+    return (now or datetime.now()).replace(second=0, microsecond=0)
+
+def render_chart(chart, forecast_data, tide_data, fmt='png', dpi=DEFAULT_DPI, now=None):
+    """
+    Monta e rasteriza um gráfico (executado nos processos do pool)
+
+    Args:
+        chart: Nome do gráfico (chave de CHARTS)
+        forecast_data: Dados de previsão
+        tide_data: Dados de maré
+        fmt: 'png' ou 'svg'
+        dpi: Resolução do PNG
+        now: Momento marcado como "Agora" (padrão: agora)
+
+    Returns:
+        bytes: Imagem
+    """
+    view = build_view_model({}, forecast_data, tide_data, _minute(now))
+    return figure_bytes(CHARTS[chart](forecast_data, tide_data, view), fmt, dpi)
+
+def chart_key(chart, forecast_data, tide_data, fmt='png', now=None):
+    """
+    Chave de cache de uma imagem
+
+    Muda quando os dados mudam e a cada minuto, pois o gráfico marca o
+    momento atual (linha "Agora" e divisão entre passado e futuro).
+    """
+    payload = json.dumps([chart, forecast_data, tide_data, fmt, _minute(now)], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class ChartRenderer:
+    """
+    Classe para renderizar gráficos em um pool de processos e guardar os resultados
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self.restarts = 0
+        self._images = {}
+        self._pending = {}
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._executor = self._create_executor()
+
+    def _create_executor(self):
+        # 'spawn' evita copiar as threads do servidor para os processos filhos
+        executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+        self._start_workers(executor, self.max_workers)
+        return executor
+
+    def _start_workers(self, executor, count):
+        """Inicia todos os processos sem que eles reexecutem o script da página"""
+        # O Streamlit instala o script da página como __main__, e o modo 'spawn'
+        # reimporta o __main__ em cada processo filho (o que rodaria a interface
+        # inteira). Os processos são criados agora, de uma vez, com um __main__
+        # vazio; o pool não cria outros depois.
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            for _ in range(count):
+                executor.submit(_ready)
+        finally:
+            sys.modules['__main__'] = main
+
+    def request(self, chart, forecast_data, tide_data, fmt='png', now=None):
+        """
+        Pede uma imagem sem bloquear
+
+        Args:
+            now: Momento marcado no gráfico (padrão: agora; arredondado para o minuto)
+
+        Returns:
+            Tuple: (imagem em bytes ou None, True se for a versão dos dados
+                   atuais; False indica a imagem anterior enquanto a nova é gerada)
+        """
+        now = _minute(now)
+        key = chart_key(chart, forecast_data, tide_data, fmt, now)
+        with self._lock:
+            if key in self._images:
+                return self._images[key], True
+            if key not in self._pending:
+                future = self._submit(render_chart, chart, forecast_data, tide_data, fmt, DEFAULT_DPI, now)
+                self._pending[key] = future
+                future.add_done_callback(lambda f, key=key, name=(chart, fmt): self._store(key, name, f))
+            return self._latest.get((chart, fmt)), False
+
+    def _submit(self, *args):
+        """Envia uma tarefa ao pool, recriando-o se um processo morreu (chamado com _lock)"""
+        try:
+            return self._executor.submit(*args)
+        except BrokenProcessPool:
+            # Um processo encerrado de forma anormal inutiliza o pool inteiro; os
+            # novos processos também são iniciados de uma vez, sem o __main__ da página
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._create_executor()
+            self.restarts += 1
+            return self._executor.submit(*args)
+
+    def wait(self, chart, forecast_data, tide_data, fmt='png', timeout=None, now=None):
+        """
+        Espera a imagem dos dados atuais por até timeout segundos
+
+        Returns:
+            bytes: Imagem ou None se não ficar pronta a tempo
+        """
+        now = _minute(now)
+        image, ready = self.request(chart, forecast_data, tide_data, fmt, now)
+        if ready:
+            return image
+        key = chart_key(chart, forecast_data, tide_data, fmt, now)
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                return None
+        with self._lock:
+            return self._images.get(key)
+
+    def _store(self, key, name, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            image = future.result()
+            self._images[key] = image
+            self._latest[name] = image
+            while len(self._images) > MAX_CACHED_IMAGES:
+                self._images.pop(next(iter(self._images)))
+
+    def export_images(self):
+        """Imagens prontas e as últimas de cada gráfico (para salvar em disco)"""
+        with self._lock:
+            return {'imagens': dict(self._images), 'ultimas': dict(self._latest)}
+
+    def restore_images(self, snapshot):
+        """
+        Restaura imagens salvas por export_images sem substituir as atuais
+
+        Returns:
+            int: Número de imagens restauradas
+        """
+        with self._lock:
+            missing = {key: image for key, image in snapshot['imagens'].items() if key not in self._images}
+            # As restauradas ficam antes das atuais na ordem de remoção
+            self._images = {**missing, **self._images}
+            while len(self._images) > MAX_CACHED_IMAGES:
+                self._images.pop(next(iter(self._images)))
+            for name, image in snapshot['ultimas'].items():
+                self._latest.setdefault(name, image)
+        return len(missing)
+
+    def close(self):
+        """Encerra o pool de processos"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Janelas de coincidência entre chuva forte e maré alta - Monitor de Maré e Clima - Recife
+
+A combinação "Chuva Forte + Maré Alta" das regras de risco compara apenas
+dois números (chuva de 24h e maré máxima do dia). Este módulo percorre o
+horizonte inteiro, hora a hora e para várias estações de uma vez, e encontra
+cada intervalo em que a chuva acumulada acima do limiar coincide com a maré
+acima do limiar:
+
+- a chuva acumulada na janela móvel vem de uma soma acumulada;
+- as duas condições viram máscaras booleanas, combinadas com um E lógico;
+- o início e o fim de cada intervalo são as bordas da máscara (diferença
+  entre passos vizinhos), e os máximos de cada intervalo saem de uma redução
+  segmentada.
+
+Tudo é linear no número de estações x passos, sem comparar intervalos de
+chuva com intervalos de maré dois a dois. As janelas são ordenadas por
+severidade e, em empate, pela antecedência.
+
+Uso (cenário sintético, várias estações):
+    python coincidence.py --estacoes 50 --dias 365
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from risk_rules import get_rules
+from tide_table import TideEventIndex
+
+# Limiares usados se as regras não tiverem a combinação de chuva e maré
+DEFAULT_RAIN_MM = 20.0
+DEFAULT_TIDE_M = 2.0
+
+# Janela móvel da chuva acumulada (horas; 24 corresponde a 'precipitacao_24h')
+DEFAULT_RAIN_WINDOW_HOURS = 24
+
+def rule_thresholds(rules=None):
+    """
+    Limiares de chuva e maré da combinação "Chuva Forte + Maré Alta"
+
+    Returns:
+        Tuple: (chuva de 24h em mm, maré em m) da primeira combinação que usa
+               'precipitacao_24h' e 'mare_maxima' (ou os valores padrão)
+    """
+    rules = rules or get_rules()
+    for combo in rules.combinations:
+        limits = {condition['entrada']: condition.get('min') for condition in combo['condicoes']}
+        if limits.get('precipitacao_24h') is not None and limits.get('mare_maxima') is not None:
+            return float(limits['precipitacao_24h']), float(limits['mare_maxima'])
+    return DEFAULT_RAIN_MM, DEFAULT_TIDE_M
+
+def rolling_sum(values, window):
+    """
+    Soma móvel ao longo do último eixo (janela terminada em cada passo)
+
+    Nos primeiros passos a janela é parcial.
+    """
+    cumulative = np.cumsum(values, axis=-1, dtype=np.float64)
+    shifted = np.zeros_like(cumulative)
+    if window < values.shape[-1]:
+        shifted[..., window:] = cumulative[..., :-window]
+    return cumulative - shifted
+
+def find_coincidences(times, rain, tide, rain_threshold=None, tide_threshold=None,
+                      rain_window=DEFAULT_RAIN_WINDOW_HOURS, now=None, stations=None, top=None):
+    """
+    Encontra os intervalos de chuva forte coincidentes com maré alta
+
+    Args:
+        times: Array datetime64 regular com os passos (horários)
+        rain: Array (estações x passos) ou (passos,) de chuva por passo (mm)
+        tide: Array de mesma forma com a altura da maré (m; NaN = desconhecida)
+        rain_threshold: Chuva acumulada mínima na janela (padrão: regras)
+        tide_threshold: Altura mínima da maré (padrão: regras)
+        rain_window: Passos da janela móvel da chuva
+        now: Referência da antecedência; janelas encerradas antes dela são
+             ignoradas (padrão: primeiro passo)
+        stations: Nomes das estações (padrão: índices)
+        top: Número máximo de janelas retornadas (padrão: todas)
+
+    Returns:
+        list: dicts com 'estacao', 'inicio', 'fim' (exclusivo), 'duracao_h',
+              'antecedencia_h' (0 se já em curso), 'chuva_max_mm',
+              'mare_max_m' e 'severidade', da mais severa para a menos
+              severa e, em empate, da mais próxima para a mais distante
+    """
+    defaults = rule_thresholds() if rain_threshold is None or tide_threshold is None else None
+    rain_threshold = defaults[0] if rain_threshold is None else rain_threshold
+    tide_threshold = defaults[1] if tide_threshold is None else tide_threshold
+
+    times = np.asarray(times).astype('datetime64[m]')
+    rain = np.atleast_2d(np.nan_to_num(np.asarray(rain, dtype=np.float64)))
+    tide = np.atleast_2d(np.asarray(tide, dtype=np.float64))
+    n_stations, n_steps = rain.shape
+    if n_steps == 0:
+        return []
+    step = times[1] - times[0] if n_steps > 1 else np.timedelta64(60, 'm')
+
+    accumulated = rolling_sum(rain, rain_window)
+    with np.errstate(invalid='ignore'):
+        both = (accumulated >= rain_threshold) & (tide >= tide_threshold)
+
+    # Bordas dos intervalos: +1 onde a máscara liga, -1 logo após desligar
+    edges = np.diff(np.pad(both.view(np.int8), ((0, 0), (1, 1))), axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+    if start_rows.size == 0:
+        return []
+
+    # Máximos por intervalo com uma redução segmentada: os passos marcados, em
+    # ordem de linha, já vêm agrupados por intervalo
+    lengths = end_cols - start_cols
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    marked = np.flatnonzero(both)
+    rain_peak = np.maximum.reduceat(accumulated.ravel()[marked], offsets)
+    tide_peak = np.maximum.reduceat(tide.ravel()[marked], offsets)
+    # Severidade: excedência combinada de chuva e maré, ponderada pela duração
+    duration_h = lengths * (step / np.timedelta64(1, 'h'))
+    severity = (rain_peak / rain_threshold) * (tide_peak / tide_threshold) * np.sqrt(duration_h)
+
+    starts = times[0] + start_cols * step
+    ends = times[0] + end_cols * step
+    reference = np.datetime64(now, 'm') if now is not None else times[0]
+    keep = ends > reference
+    lead_h = np.maximum((starts - reference) / np.timedelta64(1, 'h'), 0.0)
+
+    order = np.lexsort((lead_h, -severity))
+    order = order[keep[order]][:top]
+    names = stations if stations is not None else list(range(n_stations))
+    return [
+        {
+            'estacao': names[start_rows[i]],
+            'inicio': starts[i].astype(datetime),
+            'fim': ends[i].astype(datetime),
+            'duracao_h': round(float(duration_h[i]), 2),
+            'antecedencia_h': round(float(lead_h[i]), 2),
+            'chuva_max_mm': round(float(rain_peak[i]), 1),
+            'mare_max_m': round(float(tide_peak[i]), 2),
+            'severidade': round(float(severity[i]), 3),
+        }
+        for i in order
+    ]
+
+def snapshot_coincidences(forecast_data, tide_data, now=None, top=None):
+    """
+    Janelas de coincidência para os dados da aplicação (uma estação)
+
+    A chuva vem das horas da previsão (últimas e próximas horas) e a maré é
+    interpolada nos mesmos horários a partir dos extremos conhecidos.
+
+    Args:
+        forecast_data: Dados de previsão (com 'horas')
+        tide_data: Dados de maré (com 'mares_estendidas' ou 'mares')
+        now: Referência da antecedência (padrão: agora)
+        top: Número máximo de janelas
+
+    Returns:
+        list: Ver find_coincidences
+    """
+    hours = forecast_data.get('horas', [])
+    if len(hours) < 2:
+        return []
+    times = np.array([hour['hora'].replace(' ', 'T') for hour in hours], dtype='datetime64[m]')
+    rain = np.array([hour.get('precipitacao') or 0 for hour in hours], dtype=np.float64)
+    index = TideEventIndex(tide_data.get('mares_estendidas') or tide_data.get('mares', []))
+    tide = index.heights_at(times)
+    return find_coincidences(times, rain, tide, now=now or datetime.now(), top=top)
+
+def main(argv=None):
+    from scenario import ScenarioGenerator
+
+    parser = argparse.ArgumentParser(description="Janelas de chuva forte com maré alta em um cenário sintético")
+    parser.add_argument("--estacoes", type=int, default=10, help="Número de estações")
+    parser.add_argument("--dias", type=int, default=90, help="Horizonte em dias")
+    parser.add_argument("--janela", type=int, default=DEFAULT_RAIN_WINDOW_HOURS,
+                        help="Horas da chuva acumulada")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do cenário")
+    parser.add_argument("--top", type=int, default=10, help="Janelas exibidas")
+    args = parser.parse_args(argv)
+
+    scenario = ScenarioGenerator(seed=args.semente, n_stations=args.estacoes, hours=args.dias * 24).generate()
+    start = time.perf_counter()
+    windows = find_coincidences(scenario['tempo'], scenario['chuva'], scenario['mare'], rain_window=args.janela)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(windows)} janelas em {args.estacoes} estações x {args.dias * 24} horas "
+          f"({elapsed * 1000:.1f} ms)")
+    for window in windows[:args.top]:
+        print(f"estação {window['estacao']:>3}  {window['inicio']:%Y-%m-%d %H:%M}  {window['duracao_h']:>4.0f} h  "
+              f"chuva {window['chuva_max_mm']:6.1f} mm  maré {window['mare_max_m']:.2f} m  "
+              f"severidade {window['severidade']:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
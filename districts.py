@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Chuva e risco por bairro para o Monitor de Maré e Clima - Recife
+
+Este módulo agrega grades de previsão de precipitação (no formato de várias
+localidades do Open-Meteo) por polígono de bairro. Um índice espacial
+pré-calculado associa cada célula da grade aos bairros que ela cobre, com o
+peso da fração de área; a agregação de todas as horas é então uma soma
+ponderada vetorizada, e cada bairro recebe a sua própria pontuação de risco.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from accumulation import AccumulationIndex
+from risk_rules import get_rules, snapshot_inputs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Arquivos padrão (podem ser alterados por variáveis de ambiente)
+DEFAULT_DISTRICTS_PATH = os.environ.get(
+    "RECALERT_DISTRICTS", os.path.join(FIXTURES_DIR, "bairros_recife.geojson")
+)
+DEFAULT_GRID_PATH = os.environ.get(
+    "RECALERT_RAIN_GRID", os.path.join(FIXTURES_DIR, "grade_precipitacao.json")
+)
+
+# Subamostras por lado usadas para estimar a fração de cada célula dentro de um bairro
+DEFAULT_SUBSAMPLES = 4
+
+def load_districts(path=None):
+    """
+    Lê os polígonos dos bairros de um GeoJSON (Polygon ou MultiPolygon)
+
+    Args:
+        path: Caminho do arquivo (padrão: DEFAULT_DISTRICTS_PATH)
+
+    Returns:
+        list: dicts com 'nome' e 'aneis' (arrays lon/lat; buracos incluídos)
+    """
+    with open(path or DEFAULT_DISTRICTS_PATH, 'r', encoding='utf-8') as f:
+        collection = json.load(f)
+    districts = []
+    for feature in collection['features']:
+        geometry = feature['geometry']
+        polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+        rings = [np.asarray(ring, dtype=np.float64) for polygon in polygons for ring in polygon]
+        districts.append({'nome': feature['properties'].get('nome'), 'aneis': rings})
+    return districts
+
+def load_precipitation_grid(path=None, start=None):
+    """
+    Lê uma grade de precipitação horária no formato de várias localidades do Open-Meteo
+
+    Args:
+        path: Caminho do arquivo (padrão: DEFAULT_GRID_PATH)
+        start: Se informado, desloca os horários para que a grade comece nesta
+               hora (usado para demonstrar a grade de exemplo com dados simulados)
+
+    Returns:
+        dict: 'latitudes', 'longitudes' (por célula), 'tempo' (datetime64[h])
+              e 'precipitacao' (células x horas, float32)
+    """
+    with open(path or DEFAULT_GRID_PATH, 'r', encoding='utf-8') as f:
+        cells = json.load(f)
+    if isinstance(cells, dict):
+        cells = [cells]
+    times = np.array(cells[0]['hourly']['time'], dtype='datetime64[h]')
+    precipitation = np.array(
+        [[np.nan if v is None else v for v in cell['hourly']['precipitation']] for cell in cells],
+        dtype=np.float32
+    )
+    if start is not None:
+        times = times - times[0] + np.datetime64(start, 'h')
+    return {
+        'latitudes': np.array([cell['latitude'] for cell in cells], dtype=np.float64),
+        'longitudes': np.array([cell['longitude'] for cell in cells], dtype=np.float64),
+        'tempo': times,
+        'precipitacao': np.nan_to_num(precipitation),
+    }
+
+def points_in_polygon(x, y, rings):
+    """
+    Teste ponto-em-polígono vetorizado (regra par-ímpar, considera buracos)
+
+    Args:
+        x, y: Arrays de longitudes e latitudes
+        rings: Lista de anéis (arrays N x 2 de lon/lat)
+
+    Returns:
+        Array booleano com os pontos internos
+    """
+    inside = np.zeros(x.shape, dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+        for ax, ay, bx, by in zip(x1, y1, x2, y2):
+            if ay == by:
+                continue
+            crosses = (ay > y) != (by > y)
+            x_cross = ax + (y - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (x < x_cross)
+    return inside
+
+class DistrictIndex:
+    """
+    Índice espacial célula -> bairro para uma grade regular
+
+    Guarda, em formato esparso (CSR), as células que cada bairro cobre e o peso
+    de cada uma (fração da área do bairro). A construção é feita uma vez por
+    grade; a agregação depois custa uma leitura indexada e uma soma por bairro.
+    """
+
+    def __init__(self, districts, latitudes, longitudes, subsamples: int = DEFAULT_SUBSAMPLES):
+        self.names = [district['nome'] for district in districts]
+        lat_values = np.unique(latitudes)
+        lon_values = np.unique(longitudes)
+        lat_step = np.diff(lat_values).min() if lat_values.size > 1 else 0.01
+        lon_step = np.diff(lon_values).min() if lon_values.size > 1 else 0.01
+
+        # Grade regular: posição (linha, coluna) -> célula, usada como índice espacial
+        rows = np.rint((latitudes - lat_values[0]) / lat_step).astype(np.int64)
+        cols = np.rint((longitudes - lon_values[0]) / lon_step).astype(np.int64)
+        if not (np.allclose(lat_values[0] + rows * lat_step, latitudes)
+                and np.allclose(lon_values[0] + cols * lon_step, longitudes)):
+            raise ValueError("A grade de precipitação não é regular")
+        lookup = np.full((rows.max() + 1, cols.max() + 1), -1, dtype=np.int64)
+        lookup[rows, cols] = np.arange(latitudes.size)
+
+        # Deslocamentos das subamostras dentro de uma célula (centrada no ponto da grade)
+        offsets = (np.arange(subsamples) + 0.5) / subsamples - 0.5
+        sub_dy, sub_dx = [a.ravel() for a in np.meshgrid(offsets * lat_step, offsets * lon_step, indexing='ij')]
+
+        indptr = [0]
+        cell_indices = []
+        weights = []
+        for district in districts:
+            points = np.vstack(district['aneis'])
+            lon_min, lat_min = points.min(axis=0)
+            lon_max, lat_max = points.max(axis=0)
+            # Candidatas: células cujo retângulo intersecta o retângulo do bairro
+            r0 = max(0, int(np.floor((lat_min - lat_values[0]) / lat_step - 0.5)))
+            r1 = min(lookup.shape[0] - 1, int(np.ceil((lat_max - lat_values[0]) / lat_step + 0.5)))
+            c0 = max(0, int(np.floor((lon_min - lon_values[0]) / lon_step - 0.5)))
+            c1 = min(lookup.shape[1] - 1, int(np.ceil((lon_max - lon_values[0]) / lon_step + 0.5)))
+            candidates = lookup[r0:r1 + 1, c0:c1 + 1].ravel() if r0 <= r1 and c0 <= c1 else np.empty(0, np.int64)
+            candidates = candidates[candidates >= 0]
+
+            hits = np.zeros(candidates.size)
+            if candidates.size:
+                sx = (longitudes[candidates][:, None] + sub_dx).ravel()
+                sy = (latitudes[candidates][:, None] + sub_dy).ravel()
+                hits = points_in_polygon(sx, sy, district['aneis']).reshape(candidates.size, -1).sum(axis=1)
+            selected = hits > 0
+            if not selected.any():
+                # Bairro menor que uma subamostra: usa a célula mais próxima do centro
+                center = points.mean(axis=0)
+                nearest = np.argmin((longitudes - center[0]) ** 2 + (latitudes - center[1]) ** 2)
+                candidates, hits, selected = np.array([nearest]), np.ones(1), np.ones(1, dtype=bool)
+            cell_indices.append(candidates[selected])
+            weights.append(hits[selected] / hits[selected].sum())
+            indptr.append(indptr[-1] + int(selected.sum()))
+
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.cells = np.concatenate(cell_indices).astype(np.int64)
+        self.weights = np.concatenate(weights).astype(np.float32)
+
+    def aggregate(self, values):
+        """
+        Média ponderada por área de cada bairro
+
+        Args:
+            values: Array (células x horas) ou (células,)
+
+        Returns:
+            Array (bairros x horas) ou (bairros,)
+        """
+        weighted = values[self.cells] * (self.weights[:, None] if values.ndim == 2 else self.weights)
+        return np.add.reduceat(weighted, self.indptr[:-1], axis=0)
+
+def assess_districts(index, grid, tide_data, weather_data, now=None):
+    """
+    Acumulados de chuva e risco por bairro
+
+    A maré e a pressão são comuns à cidade; a chuva das últimas e das próximas
+    24h vem da grade agregada por bairro.
+
+    Args:
+        index: DistrictIndex da grade
+        grid: Grade de precipitação (ver load_precipitation_grid)
+        tide_data: Dados de maré
+        weather_data: Dados meteorológicos atuais
+        now: Horário de referência (padrão: agora)
+
+    Returns:
+        list: dicts por bairro ('bairro', 'precipitacao_24h',
+              'precipitacao_proximas_24h', 'nivel', 'pontuacao'), do maior
+              para o menor risco
+    """
+    now = now or datetime.now()
+    hourly = index.aggregate(grid['precipitacao'])
+    accumulation = AccumulationIndex.from_series(grid['tempo'][0].astype(datetime), hourly)
+    # Soma das horas disponíveis, como 'precipitacao_24h' da previsão
+    past, future = accumulation.past(now, 24, partial=True), accumulation.future(now, 24, partial=True)
+
+    rules = get_rules()
+    inputs = dict(snapshot_inputs(weather_data, {}, tide_data),
+                  precipitacao_24h=past, precipitacao_proximas_24h=future)
+    result = rules.evaluate(inputs)
+    levels = rules.level_names_for(result['nivel'])
+    order = np.argsort(-result['pontuacao'], kind='stable')
+    return [
+        {
+            'bairro': index.names[i],
+            'precipitacao_24h': round(float(past[i]), 1),
+            'precipitacao_proximas_24h': round(float(future[i]), 1),
+            'nivel': levels[i],
+            'pontuacao': float(result['pontuacao'][i]),
+        }
+        for i in order
+    ]
@@ -12,9 +12,12 @@ import json
 import os
 import smtplib
 from email.mime.text import MIMEText
+from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
+from view_model import build_view_model
+
 class EmailConfig:
     """Classe para gerenciar configurações de e-mail no Streamlit"""
     
@@ -209,7 +212,156 @@ def test_email_config(sender_email, sender_password, recipient_email,
     except Exception as e:
         return (False, f"Erro ao testar configurações de e-mail: {e}")
 
-def send_alert_email(weather_data, forecast_data, tide_data, risk_level, risk_description):
+# Variações da mensagem: título, cor do cabeçalho, assunto e rodapé
+MESSAGE_KINDS = {
+    'alerta': {
+        'titulo': "Alerta de Risco de Alagamento - Recife",
+        'cor': "#E74C3C",
+        'assunto': "ALERTA: Risco {nivel} de Alagamento em Recife",
+        'rodape': "<p>Este é um alerta automático gerado pelo Monitor de Maré e Clima - Recife.</p>"
+                  "<p>Por favor, tome as precauções necessárias e acompanhe os canais oficiais de informação.</p>",
+    },
+    'relatorio': {
+        'titulo': "Relatório Diário - Recife",
+        'cor': "#3498DB",
+        'assunto': "Relatório diário de {data}: risco {nivel} em Recife",
+        'rodape': "<p>Relatório diário automático do Monitor de Maré e Clima - Recife.</p>",
+    },
+}
+
+def load_email_config(path="email_config.json"):
+    """
+    Lê as configurações de e-mail do arquivo, sem o Streamlit (linha de comando)
+
+    Returns:
+        dict: Configurações (as ausentes ficam vazias ou com o padrão)
+    """
+    config = {"sender_email": "", "sender_password": "", "recipient_email": "",
+              "smtp_server": "smtp.gmail.com", "smtp_port": 587}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    return config
+
+def build_message(config, weather_data, forecast_data, tide_data, risk_level, risk_description,
+                  chart_png=None, view=None, kind='alerta'):
+    """
+    Monta o e-mail de alerta ou de relatório diário
+
+    Args:
+        config: Configurações de e-mail (remetente e destinatário)
+        weather_data: Dados meteorológicos atuais
+        forecast_data: Dados de previsão
+        tide_data: Dados de maré
+        risk_level: Nível de risco
+        risk_description: Descrição do risco
+        chart_png: Gráfico de maré e precipitação em PNG, exibido no corpo
+                   (opcional, ver chart_renderer)
+        view: Modelo de visualização do snapshot (ver view_model; montado a
+              partir dos dados se omitido)
+        kind: 'alerta' ou 'relatorio' (chave de MESSAGE_KINDS)
+
+    Returns:
+        MIMEMultipart: Mensagem pronta para envio
+    """
+    variant = MESSAGE_KINDS[kind]
+    msg = MIMEMultipart('related' if chart_png else 'mixed')
+    msg['From'] = config["sender_email"]
+    msg['To'] = config["recipient_email"]
+    msg['Subject'] = variant['assunto'].format(nivel=risk_level, data=datetime.now().strftime("%d/%m/%Y"))
+
+    # Corpo do e-mail, com os mesmos campos formatados exibidos na página
+    view = view or build_view_model(weather_data, forecast_data, tide_data)
+    weather, tide, precipitation = view['clima'], view['mare'], view['precipitacao']
+    now = datetime.now().strftime("%d/%m/%Y %H:%M")
+    chart_html = '<div class="section"><h3>Gráfico</h3><img src="cid:grafico"></div>' if chart_png else ""
+    title, color, footer = variant['titulo'], variant['cor'], variant['rodape']
+
+    body = f"""
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; }}
+            .header {{ background-color: {color}; color: white; padding: 10px; text-align: center; }}
+            .content {{ padding: 15px; }}
+            .section {{ margin-bottom: 20px; }}
+            .risk-high {{ color: #E74C3C; font-weight: bold; }}
+            .risk-medium {{ color: #F39C12; font-weight: bold; }}
+            .risk-low {{ color: #2ECC71; font-weight: bold; }}
+            table {{ border-collapse: collapse; width: 100%; }}
+            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
+            th {{ background-color: #f2f2f2; }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h2>{title}</h2>
+            <p>Gerado em {now}</p>
+        </div>
+        <div class="content">
+            <div class="section">
+                <h3>Nível de Risco: <span class="risk-high">{risk_level}</span></h3>
+                <p>{risk_description}</p>
+            </div>
+            
+            <div class="section">
+                <h3>Condições Meteorológicas Atuais</h3>
+                <table>
+                    <tr><th>Temperatura</th><td>{weather['temperatura']}</td></tr>
+                    <tr><th>Condição</th><td>{weather['condicao']}</td></tr>
+                    <tr><th>Precipitação</th><td>{weather['precipitacao']}</td></tr>
+                    <tr><th>Pressão</th><td>{weather['pressao']}</td></tr>
+                    <tr><th>Umidade</th><td>{weather['umidade']}</td></tr>
+                </table>
+            </div>
+            
+            <div class="section">
+                <h3>Previsão de Chuva</h3>
+                <table>
+                    <tr><th>Últimas 24h</th><td>{precipitation['ultimas_24h']} mm</td></tr>
+                    <tr><th>Próximas 24h</th><td>{precipitation['proximas_24h']} mm</td></tr>
+                </table>
+            </div>
+            
+            <div class="section">
+                <h3>Condições de Maré</h3>
+                <table>
+                    <tr><th>Maré Atual</th><td>{tide['altura_atual']} m ({tide['status']})</td></tr>
+                    <tr><th>Próxima Maré</th><td>{tide['proxima']['tipo']} de {tide['proxima']['altura']} m às {tide['proxima']['hora']}</td></tr>
+                    <tr><th>Maré Máxima do Dia</th><td>{tide['maxima']['altura']} m às {tide['maxima']['hora']}</td></tr>
+                </table>
+            </div>
+            
+            {chart_html}
+            <div class="section">
+                {footer}
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+    msg.attach(MIMEText(body, 'html'))
+    if chart_png:
+        image = MIMEImage(chart_png, 'png')
+        image.add_header('Content-ID', '<grafico>')
+        image.add_header('Content-Disposition', 'inline', filename='mare_precipitacao.png')
+        msg.attach(image)
+    return msg
+
+def _send(config, msg):
+    """Envia uma mensagem pelo servidor SMTP das configurações"""
+    server = smtplib.SMTP(config["smtp_server"], config["smtp_port"])
+    server.starttls()
+    server.login(config["sender_email"], config["sender_password"])
+    server.send_message(msg)
+    server.quit()
+
+def _complete(config):
+    return config["sender_email"] and config["sender_password"] and config["recipient_email"]
+
+def send_alert_email(weather_data, forecast_data, tide_data, risk_level, risk_description, chart_png=None,
+                     view=None, config=None):
     """
     Envia e-mail de alerta
     
@@ -219,106 +371,50 @@ def send_alert_email(weather_data, forecast_data, tide_data, risk_level, risk_de
         tide_data: Dados de maré
         risk_level: Nível de risco
         risk_description: Descrição do risco
+        chart_png: Gráfico de maré e precipitação em PNG (opcional, ver chart_renderer)
+        view: Modelo de visualização do snapshot (ver view_model; montado a
+              partir dos dados se omitido)
+        config: Configurações de e-mail (padrão: as da sessão do Streamlit)
         
     Returns:
         Tuple: (sucesso, mensagem)
     """
     # Obtém configurações de e-mail
-    email_config = EmailConfig().get_config()
+    email_config = config or EmailConfig().get_config()
     
     # Verifica se as configurações estão completas
-    if not email_config["sender_email"] or not email_config["sender_password"] or not email_config["recipient_email"]:
+    if not _complete(email_config):
         return (False, "Configurações de e-mail incompletas")
     
     try:
-        # Cria a mensagem
-        msg = MIMEMultipart()
-        msg['From'] = email_config["sender_email"]
-        msg['To'] = email_config["recipient_email"]
-        msg['Subject'] = f"ALERTA: Risco {risk_level} de Alagamento em Recife"
-        
-        # Corpo do e-mail
-        now = datetime.now().strftime("%d/%m/%Y %H:%M")
-        
-        body = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; }}
-                .header {{ background-color: #E74C3C; color: white; padding: 10px; text-align: center; }}
-                .content {{ padding: 15px; }}
-                .section {{ margin-bottom: 20px; }}
-                .risk-high {{ color: #E74C3C; font-weight: bold; }}
-                .risk-medium {{ color: #F39C12; font-weight: bold; }}
-                .risk-low {{ color: #2ECC71; font-weight: bold; }}
-                table {{ border-collapse: collapse; width: 100%; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h2>Alerta de Risco de Alagamento - Recife</h2>
-                <p>Gerado em {now}</p>
-            </div>
-            <div class="content">
-                <div class="section">
-                    <h3>Nível de Risco: <span class="risk-high">{risk_level}</span></h3>
-                    <p>{risk_description}</p>
-                </div>
-                
-                <div class="section">
-                    <h3>Condições Meteorológicas Atuais</h3>
-                    <table>
-                        <tr><th>Temperatura</th><td>{weather_data.get('temperatura')}°C</td></tr>
-                        <tr><th>Condição</th><td>{weather_data.get('condicao')}</td></tr>
-                        <tr><th>Precipitação</th><td>{weather_data.get('precipitacao_mm')} mm</td></tr>
-                        <tr><th>Pressão</th><td>{weather_data.get('pressao_hpa')} hPa</td></tr>
-                        <tr><th>Umidade</th><td>{weather_data.get('umidade')}%</td></tr>
-                    </table>
-                </div>
-                
-                <div class="section">
-                    <h3>Previsão de Chuva</h3>
-                    <table>
-                        <tr><th>Últimas 24h</th><td>{forecast_data.get('precipitacao_24h')} mm</td></tr>
-                        <tr><th>Próximas 24h</th><td>{forecast_data.get('precipitacao_proximas_24h')} mm</td></tr>
-                    </table>
-                </div>
-                
-                <div class="section">
-                    <h3>Condições de Maré</h3>
-                    <table>
-                        <tr><th>Maré Atual</th><td>{tide_data.get('mare_atual', {}).get('altura')} m ({tide_data.get('mare_atual', {}).get('status')})</td></tr>
-                        <tr><th>Próxima Maré</th><td>{tide_data.get('proxima_mare', {}).get('tipo')} de {tide_data.get('proxima_mare', {}).get('altura')} m às {tide_data.get('proxima_mare', {}).get('hora')}</td></tr>
-                        <tr><th>Maré Máxima do Dia</th><td>{tide_data.get('mare_maxima', {}).get('altura')} m às {tide_data.get('mare_maxima', {}).get('hora')}</td></tr>
-                    </table>
-                </div>
-                
-                <div class="section">
-                    <p>Este é um alerta automático gerado pelo Monitor de Maré e Clima - Recife.</p>
-                    <p>Por favor, tome as precauções necessárias e acompanhe os canais oficiais de informação.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        # Conecta ao servidor SMTP
-        server = smtplib.SMTP(email_config["smtp_server"], email_config["smtp_port"])
-        server.starttls()
-        server.login(email_config["sender_email"], email_config["sender_password"])
-        
-        # Envia o e-mail
-        server.send_message(msg)
-        server.quit()
-        
+        _send(email_config, build_message(email_config, weather_data, forecast_data, tide_data,
+                                          risk_level, risk_description, chart_png, view))
         return (True, "E-mail de alerta enviado com sucesso")
     except Exception as e:
         return (False, f"Erro ao enviar e-mail: {e}")
 
+def send_daily_report(weather_data, forecast_data, tide_data, risk_level, risk_description, chart_png=None,
+                      view=None, config=None):
+    """
+    Envia o relatório diário (mesmo conteúdo do alerta, em qualquer nível de risco)
+
+    Args:
+        config: Configurações de e-mail (padrão: load_email_config())
+        Demais argumentos como em send_alert_email
+
+    Returns:
+        Tuple: (sucesso, mensagem)
+    """
+    email_config = config or load_email_config()
+    if not _complete(email_config):
+        return (False, "Configurações de e-mail incompletas")
+    try:
+        _send(email_config, build_message(email_config, weather_data, forecast_data, tide_data,
+                                          risk_level, risk_description, chart_png, view, kind='relatorio'))
+        return (True, "Relatório diário enviado com sucesso")
+    except Exception as e:
+        return (False, f"Erro ao enviar e-mail: {e}")
+
 def render_alert_button(weather_data, forecast_data, tide_data, risk_level, risk_description):
     """
     Renderiza o botão de alerta por e-mail quando o risco é alto
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Risco por conjunto (Monte Carlo) para o Monitor de Maré e Clima - Recife
+
+A avaliação pontual trata a previsão como exata: 28 mm e 31 mm de chuva
+prevista resultam em níveis diferentes. Este módulo perturba as entradas de
+chuva e maré segundo as distribuições de erro da seção "incertezas" de
+risk_rules.json, pontua milhares de amostras de uma só vez com o avaliador
+vetorizado das regras e informa a probabilidade de cada nível de risco.
+"""
+
+import numpy as np
+
+from risk_rules import get_rules
+
+# Número padrão de amostras do conjunto
+DEFAULT_SAMPLES = 4000
+
+# Entradas que não podem ficar negativas após a perturbação
+NON_NEGATIVE_INPUTS = ('precipitacao_24h', 'precipitacao_proximas_24h', 'precipitacao_nowcast_3h')
+
+def perturb_inputs(inputs, uncertainties, samples, rng):
+    """
+    Gera as amostras perturbadas das entradas
+
+    Args:
+        inputs: dict nome -> valor escalar ou array (ex.: uma posição por localidade)
+        uncertainties: dict nome -> distribuição de erro (ver risk_rules)
+        samples: Número de amostras
+        rng: numpy.random.Generator
+
+    Returns:
+        dict: nome -> array (amostras, *forma da entrada)
+    """
+    # Todas as entradas na mesma forma (escalares repetidos por localidade)
+    values = {name: np.asarray(v, dtype=np.float64) for name, v in inputs.items() if v is not None}
+    shape = np.broadcast_shapes(*(v.shape for v in values.values())) if values else ()
+    draws = {}
+    perturbed = {}
+    for name, value in inputs.items():
+        if value is None:
+            perturbed[name] = None
+            continue
+        value = np.broadcast_to(values[name], shape)
+        spec = uncertainties.get(name)
+        if spec is None:
+            perturbed[name] = np.broadcast_to(value, (samples,) + value.shape)
+            continue
+        # Entradas do mesmo grupo compartilham o sorteio (erros correlacionados)
+        group = spec.get('grupo', name)
+        if group not in draws:
+            if spec['distribuicao'] == 'uniforme':
+                draws[group] = rng.uniform(-1.0, 1.0, (samples,) + value.shape)
+            else:
+                draws[group] = rng.standard_normal((samples,) + value.shape)
+        z = draws[group]
+        if spec['distribuicao'] == 'lognormal':
+            sample = value * np.exp(spec['sigma'] * z)
+        elif spec['distribuicao'] == 'uniforme':
+            sample = value + spec['amplitude'] * z
+        else:
+            sample = value + spec['desvio'] * z
+        if name in NON_NEGATIVE_INPUTS:
+            sample = np.maximum(sample, 0.0)
+        perturbed[name] = sample
+    return perturbed
+
+def ensemble_risk(inputs, samples=DEFAULT_SAMPLES, seed=None, rules=None):
+    """
+    Probabilidade de cada nível de risco sob incerteza das entradas
+
+    Args:
+        inputs: Entradas das regras (ver risk_rules.snapshot_inputs); valores
+                podem ser arrays para avaliar várias localidades juntas
+        samples: Número de amostras
+        seed: Semente (resultados reprodutíveis)
+        rules: Regras compiladas (padrão: get_rules())
+
+    Returns:
+        dict: 'probabilidades' (nível -> probabilidade, escalar ou array por
+              localidade), 'pontuacao_media', 'pontuacao_p90' e 'amostras'
+    """
+    rules = rules or get_rules()
+    rng = np.random.default_rng(seed)
+    perturbed = perturb_inputs(inputs, rules.uncertainties, samples, rng)
+    result = rules.evaluate(perturbed)
+    levels = result['nivel']
+    probabilities = {
+        name: (levels == i).mean(axis=0) for i, name in enumerate(rules.level_names)
+    }
+    scores = result['pontuacao']
+    return {
+        'probabilidades': probabilities,
+        'pontuacao_media': scores.mean(axis=0),
+        'pontuacao_p90': np.percentile(scores, 90, axis=0),
+        'amostras': samples,
+    }
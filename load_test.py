@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Teste de carga do Monitor de Maré e Clima - Recife
+
+Inicia um servidor Streamlit com recalert.py e conecta N sessões simultâneas
+pelo mesmo websocket usado pelo navegador. Cada sessão faz a execução inicial
+da página e depois reexecuções:
+- 'pagina': a página inteira;
+- 'fragmentos': as seções com atualização automática, como os temporizadores
+  do navegador fazem.
+
+O servidor usa dados simulados e arquivos de cache temporários. O relatório
+traz, para cada número de sessões:
+- os percentis de latência por ação;
+- a memória do servidor por sessão;
+- a memória dos caches (métricas do próprio Streamlit);
+- acertos, falhas e remoções do cache de dados compartilhado.
+
+Uso:
+    python load_test.py --sessoes 1 5 10 20 --reexecucoes 5
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+from shared_cache import EVENTS, SQLiteCacheBackend
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recalert.py")
+
+DEFAULT_PORT = 8599
+
+# Tempo máximo de espera pelo servidor e por uma execução (segundos)
+STARTUP_TIMEOUT = 60
+RUN_TIMEOUT = 120
+
+PERCENTILES = (50, 90, 99)
+
+# Intervalo de amostragem da memória do servidor (segundos)
+MEMORY_SAMPLE_INTERVAL = 0.05
+
+METRIC_PATTERN = re.compile(r'^cache_memory_bytes\{cache_type="([^"]*)",cache="([^"]*)"\} (\d+)$')
+
+def start_server(port, directory):
+    """
+    Inicia o servidor Streamlit com dados simulados e arquivos isolados
+
+    Returns:
+        subprocess.Popen do servidor (já respondendo)
+    """
+    env = dict(os.environ)
+    env.update({
+        "RECALERT_CACHE_BACKEND": "sqlite",
+        "RECALERT_CACHE_DB": os.path.join(directory, "cache.db"),
+        "RECALERT_RATE_LIMIT_DB": os.path.join(directory, "rate_limit.db"),
+        "RECALERT_LOCAL_STORE": os.path.join(directory, "ultimo_clima.json"),
+        "RECALERT_WARM_START": os.path.join(directory, "reinicio_a_quente.json"),
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"O servidor terminou com código {server.returncode}")
+        try:
+            if requests.get(f"http://localhost:{port}/_stcore/health", timeout=1).ok:
+                return server
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("O servidor não respondeu a tempo")
+
+def _process_rss(pid):
+    with open(f"/proc/{pid}/status", 'r') as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def _descendants(pid):
+    """Processos descendentes de pid (lidos de /proc/<pid>/stat)"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # O nome do processo vem entre parênteses e pode conter espaços
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(entry))
+    found, pending = [], [pid]
+    while pending:
+        children = parents.get(pending.pop(), [])
+        found.extend(children)
+        pending.extend(children)
+    return found
+
+def rss_bytes(pid):
+    """
+    Memória residente do servidor e dos processos filhos (bytes; None fora do Linux)
+
+    Os processos de renderização dos gráficos são filhos do servidor; sem
+    eles a memória por sessão ficaria subestimada.
+    """
+    try:
+        total = _process_rss(pid)
+    except OSError:
+        return None
+    for child in _descendants(pid):
+        try:
+            total += _process_rss(child)
+        except OSError:
+            # O processo terminou entre a listagem e a leitura
+            continue
+    return total
+
+def cache_metrics(base_url):
+    """Bytes por cache, lidos de /_stcore/metrics"""
+    totals = {}
+    response = requests.get(f"{base_url}/_stcore/metrics", timeout=10)
+    for line in response.text.splitlines():
+        match = METRIC_PATTERN.match(line)
+        if match:
+            cache_type, name, size = match.groups()
+            totals[f"{cache_type}:{name}" if name else cache_type] = int(size)
+    return totals
+
+class Session:
+    """
+    Sessão de navegador simulada sobre o websocket do Streamlit
+    """
+
+    def __init__(self, websocket):
+        self._ws = websocket
+        self.fragments = set()
+
+    def run(self, fragment_id=None):
+        """
+        Pede uma execução e espera o fim do script
+
+        Args:
+            fragment_id: Reexecuta apenas este fragmento (None: a página inteira)
+
+        Returns:
+            float: Latência até o fim da execução (segundos)
+
+        Raises:
+            RuntimeError: Erro de compilação ou exceção exibida pelo script
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+            message.rerun_script.is_auto_rerun = True
+        start = time.perf_counter()
+        self._ws.send(message.SerializeToString())
+        exceptions = []
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(self._ws.recv(timeout=RUN_TIMEOUT))
+            kind = reply.WhichOneof('type')
+            if kind == 'auto_rerun':
+                self.fragments.add(reply.auto_rerun.fragment_id)
+            elif kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+                if reply.delta.new_element.WhichOneof('type') == 'exception':
+                    exception = reply.delta.new_element.exception
+                    exceptions.append(f"{exception.type}: {exception.message}")
+            elif kind == 'script_finished':
+                if reply.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("Erro de compilação do script")
+                # O Streamlit exibe a exceção na página e encerra a execução normalmente
+                if exceptions:
+                    raise RuntimeError(f"Exceção no script: {exceptions[0]}")
+                return time.perf_counter() - start
+
+def run_session(ws_url, actions, barrier, done, latencies, errors):
+    """
+    Uma sessão: execução inicial seguida das ações pedidas
+
+    Args:
+        ws_url: Endereço do websocket do servidor
+        actions: Lista de ações ('pagina' ou 'fragmentos')
+        barrier: Sincroniza o início das sessões
+        done: Sincroniza o fim das sessões
+        latencies: dict ação -> lista de latências (compartilhado)
+        errors: Lista de erros (compartilhada)
+    """
+    from websockets.sync.client import connect
+
+    try:
+        with connect(ws_url, max_size=None, open_timeout=RUN_TIMEOUT) as websocket:
+            session = Session(websocket)
+            barrier.wait()
+            latencies['inicial'].append(session.run())
+            for action in actions:
+                if action == 'fragmentos':
+                    for fragment_id in sorted(session.fragments):
+                        latencies[action].append(session.run(fragment_id))
+                else:
+                    latencies[action].append(session.run())
+            # A sessão fica aberta até todas terminarem, para a medida de memória
+            done.wait()
+    except Exception as e:
+        errors.append(str(e) or type(e).__name__)
+        barrier.abort()
+        done.abort()
+
+def run_level(base_url, pid, cache, sessions, actions):
+    """
+    Executa `sessions` sessões simultâneas
+
+    Args:
+        base_url: Endereço do servidor
+        pid: Processo do servidor (memória)
+        cache: SQLiteCacheBackend do servidor (contadores do cache de dados)
+        sessions: Número de sessões
+        actions: Ações de cada sessão após a execução inicial
+
+    Returns:
+        dict: 'sessoes', 'duracao', 'latencias' (percentis por ação),
+              'memoria_por_sessao', 'memoria_servidor', 'erros', 'caches' e
+              'cache_dados' (eventos durante o nível, bytes e entradas)
+    """
+    ws_url = base_url.replace("http", "ws", 1) + "/_stcore/stream"
+    latencies = defaultdict(list)
+    errors = []
+    barrier = threading.Barrier(sessions)
+    done = threading.Barrier(sessions + 1)
+    threads = [
+        threading.Thread(target=run_session, args=(ws_url, actions, barrier, done, latencies, errors), daemon=True)
+        for _ in range(sessions)
+    ]
+
+    baseline = rss_bytes(pid)
+    cache_before = cache.stats()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    # Pico de memória enquanto as sessões estão abertas
+    peak = baseline
+    while done.n_waiting < sessions and any(thread.is_alive() for thread in threads):
+        time.sleep(MEMORY_SAMPLE_INTERVAL)
+        peak = max(peak or 0, rss_bytes(pid) or 0)
+    caches = cache_metrics(base_url)
+    try:
+        done.wait()
+    except threading.BrokenBarrierError:
+        pass
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    cache_after = cache.stats()
+    data_cache = {event: cache_after[event] - cache_before[event] for event in EVENTS}
+    data_cache.update(bytes=cache_after['bytes'], entradas=cache_after['entradas'])
+
+    summary = {}
+    for action, values in latencies.items():
+        values = np.asarray(values)
+        summary[action] = dict(
+            {f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES},
+            maximo=round(float(values.max()), 3),
+            execucoes=int(values.size)
+        )
+    return {
+        'sessoes': sessions,
+        'duracao': round(elapsed, 2),
+        'latencias': summary,
+        'memoria_por_sessao': (peak - baseline) // sessions if baseline else None,
+        'memoria_servidor': peak if baseline else None,
+        'erros': errors,
+        'caches': caches,
+        'cache_dados': data_cache,
+    }
+
+def format_report(results):
+    """Relatório em texto dos níveis de carga executados"""
+    lines = []
+    for result in results:
+        lines.append(f"== {result['sessoes']} sessões ({result['duracao']} s, "
+                     f"{len(result['erros'])} erros) ==")
+        for action, stats in result['latencias'].items():
+            percentiles = "  ".join(f"p{p} {stats[f'p{p}'] * 1000:7.0f} ms" for p in PERCENTILES)
+            lines.append(f"  {action:<11} {percentiles}  máx {stats['maximo'] * 1000:7.0f} ms"
+                         f"  ({stats['execucoes']} execuções)")
+        if result['memoria_servidor'] is not None:
+            lines.append(f"  memória: {result['memoria_por_sessao'] / 2**20:.1f} MB por sessão, "
+                         f"pico de {result['memoria_servidor'] / 2**20:.0f} MB no servidor")
+        # st.cache_resource informa 1 byte por entrada, sem medir o objeto
+        lines.append("  caches: " + ", ".join(
+            f"{name} {size / 1024:.0f} KB" for name, size in sorted(result['caches'].items()) if size > 1
+        ))
+        data_cache = result['cache_dados']
+        lines.append(f"  cache de dados: {data_cache['acertos']} acertos, {data_cache['falhas']} falhas, "
+                     f"{data_cache['remocoes']} remoções, {data_cache['bytes'] / 1024:.0f} KB "
+                     f"em {data_cache['entradas']} entradas")
+        for error in result['erros'][:5]:
+            lines.append(f"  erro: {error}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões simultâneas do Streamlit")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 5, 10],
+                        help="Números de sessões simultâneas, executados em sequência")
+    parser.add_argument("--reexecucoes", type=int, default=5,
+                        help="Reexecuções por sessão após a inicial")
+    parser.add_argument("--acoes", choices=["pagina", "fragmentos"], nargs="+",
+                        default=["pagina", "fragmentos"],
+                        help="Ações alternadas nas reexecuções")
+    parser.add_argument("--porta", type=int, default=DEFAULT_PORT, help="Porta do servidor de teste")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    actions = [args.acoes[i % len(args.acoes)] for i in range(args.reexecucoes)]
+    base_url = f"http://localhost:{args.porta}"
+    directory = tempfile.mkdtemp(prefix="recalert_carga_")
+    server = start_server(args.porta, directory)
+    try:
+        cache = SQLiteCacheBackend(os.path.join(directory, "cache.db"))
+        # Uma sessão isolada antes da carga: importa os módulos e enche os caches
+        warm_up = run_level(base_url, server.pid, cache, 1, [])
+        cold = warm_up['latencias'].get('inicial', {}).get('maximo')
+        results = [run_level(base_url, server.pid, cache, sessions, actions) for sessions in args.sessoes]
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        print(json.dumps({'cache_frio': cold, 'niveis': results}, ensure_ascii=False, indent=2))
+    else:
+        print(f"Primeira execução (caches frios): {cold * 1000:.0f} ms" if cold else
+              f"Falha no aquecimento: {warm_up['erros']}")
+        print(format_report(results))
+    return 1 if warm_up['erros'] or any(result['erros'] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
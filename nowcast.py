@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Previsão imediata (nowcasting) de chuva para o Monitor de Maré e Clima - Recife
+
+Alagamentos repentinos no Recife acontecem em 30 a 120 minutos, mais rápido
+do que a previsão dos provedores é atualizada. Este módulo extrapola as
+próximas horas de chuva a partir das observações recentes com suavização
+exponencial de Holt com tendência amortecida, vetorizada para todas as
+estações de uma vez.
+
+As "observações" são as horas já encerradas da previsão horária obtida (que
+os provedores reajustam com os dados observados), e não medições de
+pluviômetro. A previsão horária começa à meia-noite; as horas do dia anterior
+vêm do armazenamento local (LocalStoreProvider.earlier_hours).
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Parâmetros candidatos: cada estação usa a combinação com menor erro de um passo
+# (alpha = 1 e beta = 0 equivalem à persistência da última observação)
+ALPHAS = (0.2, 0.4, 0.6, 0.8, 1.0)
+BETAS = (0.0, 0.1)
+
+# Amortecimento da tendência (phi < 1 faz a extrapolação convergir)
+DAMPING = 0.5
+
+# Observações recentes usadas no ajuste (em passos)
+DEFAULT_WINDOW = 12
+
+def holt_damped(series, alpha, beta, phi=DAMPING):
+    """
+    Suavização de Holt com tendência amortecida, vetorizada
+
+    Args:
+        series: Array (..., passos); as dimensões iniciais são independentes
+        alpha: Suavização do nível (escalar ou array compatível com series[..., 0])
+        beta: Suavização da tendência (idem)
+        phi: Amortecimento da tendência
+
+    Returns:
+        Tuple: (nível final, tendência final, soma dos erros quadráticos de um passo)
+    """
+    series = np.asarray(series, dtype=np.float64)
+    shape = np.broadcast_shapes(series.shape[:-1], np.shape(alpha), np.shape(beta))
+    level = np.broadcast_to(series[..., 0], shape).copy()
+    trend = np.zeros_like(level)
+    sse = np.zeros_like(level)
+    for t in range(1, series.shape[-1]):
+        observed = series[..., t]
+        forecast = level + phi * trend
+        sse += (observed - forecast) ** 2
+        new_level = alpha * observed + (1 - alpha) * forecast
+        trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        level = new_level
+    return level, trend, sse
+
+def nowcast(series, horizon, window=DEFAULT_WINDOW, phi=DAMPING):
+    """
+    Extrapola a chuva das próximas `horizon` etapas para todas as estações
+
+    Os parâmetros de suavização são escolhidos por estação, entre ALPHAS x
+    BETAS, pelo menor erro de previsão um passo à frente na janela recente.
+
+    Args:
+        series: Array (estações x passos) com a chuva observada por passo (mm)
+        horizon: Número de passos a prever
+        window: Número de observações recentes usadas
+        phi: Amortecimento da tendência
+
+    Returns:
+        Array (estações x horizon) com a chuva prevista por passo (mm, >= 0)
+    """
+    recent = np.atleast_2d(np.asarray(series, dtype=np.float64))[:, -window:]
+    recent = np.nan_to_num(recent)
+    alphas, betas = np.meshgrid(ALPHAS, BETAS, indexing='ij')
+    alphas = alphas.ravel()[:, None]
+    betas = betas.ravel()[:, None]
+
+    # Todas as combinações de parâmetros e estações em uma única passada
+    level, trend, sse = holt_damped(recent[None, :, :], alphas, betas, phi)
+    best = np.argmin(sse, axis=0)
+    stations = np.arange(recent.shape[0])
+    level, trend = level[best, stations], trend[best, stations]
+
+    # Previsão h passos à frente: nível + (phi + phi^2 + ... + phi^h) * tendência
+    damping = np.cumsum(phi ** np.arange(1, horizon + 1))
+    return np.clip(level[:, None] + damping[None, :] * trend[:, None], 0, None)
+
+def nowcast_summary(times, series, horizon=3, window=DEFAULT_WINDOW):
+    """
+    Previsão imediata no formato usado pela aplicação
+
+    Args:
+        times: Array datetime64 dos passos observados (regular)
+        series: Array (estações x passos) ou (passos,) de chuva observada
+        horizon: Passos a prever
+        window: Observações recentes usadas
+
+    Returns:
+        dict: 'tempo' (passos previstos), 'chuva' (estações x horizon) e
+              'acumulado' (total previsto por estação)
+    """
+    times = np.asarray(times)
+    step = times[-1] - times[-2] if times.size > 1 else np.timedelta64(1, 'h')
+    rain = nowcast(series, horizon, window)
+    return {
+        'tempo': times[-1] + step * np.arange(1, horizon + 1),
+        'chuva': np.round(rain, 2),
+        'acumulado': np.round(rain.sum(axis=1), 1),
+    }
+
+def observed_series(hours, now):
+    """
+    Horas já encerradas da lista 'horas' da previsão, como série observada
+
+    Apenas as horas que terminaram até `now` (o horário dos dados, e não o
+    relógio atual) contam como observação; as seguintes ainda são previsão.
+
+    Args:
+        hours: Lista de dicts com 'hora' ("%Y-%m-%d %H:%M") e 'precipitacao'
+        now: Horário de referência dos dados
+
+    Returns:
+        Tuple: (array datetime64 dos passos, array de chuva) ou None se houver
+               menos de duas horas observadas consecutivas
+    """
+    observed = []
+    for hour in hours:
+        try:
+            start = datetime.strptime(hour['hora'], "%Y-%m-%d %H:%M")
+        except (KeyError, ValueError):
+            continue
+        if start + timedelta(hours=1) <= now:
+            observed.append((start, hour.get('precipitacao') or 0))
+    observed.sort(key=lambda item: item[0])
+    # A suavização supõe passos regulares: usa apenas o trecho contínuo mais recente
+    for i in range(len(observed) - 1, 0, -1):
+        if observed[i][0] - observed[i - 1][0] != timedelta(hours=1):
+            observed = observed[i:]
+            break
+    if len(observed) < 2:
+        return None
+    times = np.array([start for start, _ in observed], dtype='datetime64[m]')
+    return times, np.array([rain for _, rain in observed], dtype=np.float64)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Serialização de dados simples em JSON - Monitor de Maré e Clima - Recife
+
+Os arquivos compartilhados entre processos (cache de dados e snapshot de
+reinício a quente) guardam apenas dados simples: dicts, listas, textos,
+números, None, tuplas, datas, bytes e arrays NumPy numéricos. Os tipos que o
+JSON não representa diretamente recebem uma marcação de tipo. Ao contrário
+do pickle, ler um arquivo adulterado nunca executa código: no máximo altera
+os dados exibidos até a próxima atualização.
+
+Mesmo assim, os arquivos só são lidos se pertencerem ao usuário do processo
+e não puderem ser alterados por outros usuários (ver trusted); réplicas que
+compartilham arquivos precisam rodar com o mesmo usuário, em um diretório ao
+qual só ele tenha acesso.
+"""
+
+import base64
+import json
+import os
+import stat
+from datetime import date, datetime
+
+import numpy as np
+
+# Chave que marca valores que o JSON não representa diretamente
+TYPE_KEY = '$tipo'
+
+class UntrustedFileError(PermissionError):
+    """Arquivo compartilhado que outro usuário pode ter alterado"""
+
+def encode(value):
+    """Converte um valor em dados JSON (TypeError para tipos não suportados)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return encode(value.item())
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {TYPE_KEY: 'tupla', 'valor': [encode(item) for item in value]}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and TYPE_KEY not in value:
+            return {key: encode(item) for key, item in value.items()}
+        return {TYPE_KEY: 'dict', 'valor': [[encode(k), encode(v)] for k, v in value.items()]}
+    if isinstance(value, datetime):
+        return {TYPE_KEY: 'datetime', 'valor': value.isoformat()}
+    if isinstance(value, date):
+        return {TYPE_KEY: 'date', 'valor': value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {TYPE_KEY: 'bytes', 'valor': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'biufcmM':
+        return {
+            TYPE_KEY: 'ndarray',
+            'dtype': value.dtype.str,
+            'forma': list(value.shape),
+            'valor': base64.b64encode(np.ascontiguousarray(value).tobytes()).decode('ascii'),
+        }
+    raise TypeError(f"tipo não suportado: {type(value).__name__}")
+
+def decode(value):
+    """Inverso de encode"""
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    kind = value.get(TYPE_KEY)
+    if kind is None:
+        return {key: decode(item) for key, item in value.items()}
+    if kind == 'tupla':
+        return tuple(decode(item) for item in value['valor'])
+    if kind == 'dict':
+        return {_hashable(decode(k)): decode(v) for k, v in value['valor']}
+    if kind == 'datetime':
+        return datetime.fromisoformat(value['valor'])
+    if kind == 'date':
+        return date.fromisoformat(value['valor'])
+    if kind == 'bytes':
+        return base64.b64decode(value['valor'])
+    if kind == 'ndarray':
+        data = base64.b64decode(value['valor'])
+        return np.frombuffer(data, dtype=np.dtype(value['dtype'])).reshape(value['forma']).copy()
+    raise ValueError(f"tipo desconhecido: {kind}")
+
+def _hashable(key):
+    return tuple(_hashable(item) for item in key) if isinstance(key, list) else key
+
+def dumps(value):
+    """Serializa um valor em bytes JSON (UTF-8)"""
+    return json.dumps(encode(value), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads(data):
+    """Inverso de dumps"""
+    return decode(json.loads(data))
+
+def trusted(path):
+    """True se o arquivo pertence ao usuário do processo e só ele pode alterá-lo"""
+    info = os.stat(path)
+    if hasattr(os, 'getuid') and info.st_uid != os.getuid():
+        return False
+    return not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
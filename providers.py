@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Provedores de dados meteorológicos para o Monitor de Maré e Clima - Recife
+
+Este módulo define a cadeia ordenada de provedores usada pelo WeatherDataManager
+(WeatherAPI.com, Open-Meteo, armazenamento local e simulador). Cada provedor tem
+um disjuntor (circuit breaker) que acompanha falhas e latências; quando o
+provedor principal demora mais que o seu p95, uma requisição paralela (hedge) é
+enviada ao provedor remoto seguinte e vale a primeira resposta bem-sucedida.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from accumulation import AccumulationIndex
+from cassette import active_cassette
+from rate_limiter import RateLimitExceeded
+
+# Coordenadas de referência do Recife
+RECIFE_LATITUDE = -8.05
+RECIFE_LONGITUDE = -34.88
+
+# Tempo limite de cada requisição HTTP (segundos)
+REQUEST_TIMEOUT = 10
+
+# Atraso do hedge enquanto não há amostras suficientes para estimar o p95 (segundos)
+DEFAULT_HEDGE_DELAY = 1.5
+
+# Arquivo com o último conjunto de dados obtido de um provedor remoto
+LOCAL_STORE_PATH = os.environ.get("RECALERT_LOCAL_STORE", "ultimo_clima.json")
+
+# Descrição dos códigos de tempo WMO usados pelo Open-Meteo
+WMO_CONDITIONS = {
+    0: "Céu limpo", 1: "Predominantemente limpo", 2: "Parcialmente nublado", 3: "Nublado",
+    45: "Nevoeiro", 48: "Nevoeiro", 51: "Garoa leve", 53: "Garoa", 55: "Garoa forte",
+    61: "Chuva leve", 63: "Chuva", 65: "Chuva forte", 80: "Pancadas de chuva leves",
+    81: "Pancadas de chuva", 82: "Pancadas de chuva fortes", 95: "Trovoada",
+    96: "Trovoada com granizo", 99: "Trovoada com granizo",
+}
+
+COMPASS_POINTS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+
+class ProviderChainError(Exception):
+    """Exceção levantada quando nenhum provedor da cadeia retornou dados"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors) or "nenhum provedor disponível"
+        super().__init__(f"Falha em todos os provedores ({details})")
+
+class CircuitBreaker:
+    """
+    Disjuntor com acompanhamento de latência para um provedor
+
+    Após failure_threshold falhas consecutivas o disjuntor abre e o provedor é
+    ignorado por reset_timeout segundos; depois disso uma única tentativa
+    (meio-aberto) decide se ele volta a ser usado.
+    """
+    CLOSED = "fechado"
+    OPEN = "aberto"
+    HALF_OPEN = "meio-aberto"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60, window: int = 50):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latencies = deque(maxlen=window)
+        self.failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Indica se o provedor pode receber uma requisição agora"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def release(self, rearm=False):
+        """
+        Devolve a tentativa de meio-aberto que terminou sem resultado
+
+        Sem essa devolução o disjuntor ficaria meio-aberto para sempre, pois
+        allow() só libera uma tentativa na passagem de aberto para meio-aberto.
+
+        Args:
+            rearm: Se True, recomeça a contagem de reset_timeout (a próxima
+                   tentativa espera); senão ela pode ocorrer na próxima consulta
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                if rearm:
+                    self.opened_at = time.monotonic()
+
+    def record_success(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def p95(self, min_samples: int = 5):
+        """Percentil 95 das latências recentes, ou None com poucas amostras"""
+        with self._lock:
+            if len(self.latencies) < min_samples:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+def _http_get_json(url, params):
+    """
+    Executa um GET e retorna o corpo JSON
+
+    Com um cassete ativo (ver cassette.py), a resposta é gravada ou, no modo
+    de reprodução, lida da gravação sem acessar a rede.
+    """
+    cassette = active_cassette()
+    if cassette is not None and cassette.replaying:
+        return json.loads(cassette.play(url, params))
+    # Importado sob demanda: a verificação por linha de comando com dados em
+    # cache ou simulados não paga o custo de carregar o requests
+    import requests
+    start = time.monotonic()
+    try:
+        response = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        if cassette is not None:
+            cassette.record(url, params, elapsed=time.monotonic() - start, error=e)
+        raise
+    if cassette is not None:
+        cassette.record(url, params, response.status_code, response.text, time.monotonic() - start)
+    response.raise_for_status()
+    return response.json()
+
+def _precipitation_totals(hours, now):
+    """Acumulados de precipitação passados e futuros a partir da lista de horas"""
+    return AccumulationIndex.from_hours(hours).summary(now)
+
+class WeatherProvider:
+    """
+    Classe base dos provedores da cadeia
+
+    Subclasses implementam fetch() e retornam (dados_atuais, previsao) no
+    formato usado pela aplicação.
+    """
+    name = "provedor"
+    # Provedores remotos podem receber hedge e têm seus resultados guardados localmente
+    remote = True
+
+    def __init__(self):
+        self.breaker = CircuitBreaker()
+
+    def fetch(self):
+        raise NotImplementedError
+
+class WeatherAPIProvider(WeatherProvider):
+    """Provedor WeatherAPI.com (previsão com dados atuais em uma única chamada)"""
+    name = "WeatherAPI"
+
+    def __init__(self, api_key, location="Recife", base_url="http://api.weatherapi.com/v1", rate_limiter=None):
+        super().__init__()
+        self.api_key = api_key
+        self.location = location
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter
+
+    def fetch(self):
+        if not self.api_key or self.api_key == "SUA_CHAVE_API_AQUI":
+            raise ValueError("chave da API não configurada")
+        if self.rate_limiter:
+            self.rate_limiter.require('weatherapi')
+        data = _http_get_json(
+            f"{self.base_url}/forecast.json",
+            {'key': self.api_key, 'q': self.location, 'days': 2, 'lang': 'pt', 'aqi': 'no', 'alerts': 'no'}
+        )
+        return self._format_current(data), self._format_forecast(data)
+
+    def _format_current(self, data):
+        current = data['current']
+        location = data['location']
+        return {
+            'temperatura': current['temp_c'],
+            'sensacao_termica': current['feelslike_c'],
+            'precipitacao_mm': current['precip_mm'],
+            'pressao_hpa': current['pressure_mb'],
+            'umidade': current['humidity'],
+            'vento_kph': current['wind_kph'],
+            'direcao_vento': current['wind_dir'],
+            'condicao': current['condition']['text'],
+            'icone': current['condition']['icon'],
+            'ultima_atualizacao': current['last_updated'],
+            'cidade': location['name'],
+            'regiao': location['region'],
+            'pais': location['country'],
+            'hora_local': location['localtime']
+        }
+
+    def _format_forecast(self, data):
+        days = data['forecast']['forecastday']
+        hours = []
+        for day in days:
+            for hour in day['hour']:
+                hours.append({
+                    'hora': hour['time'],
+                    'temperatura': hour['temp_c'],
+                    'precipitacao': hour['precip_mm'],
+                    'chance_chuva': hour['chance_of_rain'],
+                    'pressao': hour['pressure_mb'],
+                    'condicao': hour['condition']['text'],
+                    'icone': hour['condition']['icon']
+                })
+        summaries = [
+            {
+                'temp_max': day['day']['maxtemp_c'],
+                'temp_min': day['day']['mintemp_c'],
+                'precipitacao_total': day['day']['totalprecip_mm'],
+                'chance_chuva': day['day']['daily_chance_of_rain'],
+                'condicao': day['day']['condition']['text']
+            }
+            for day in days
+        ]
+        now = datetime.strptime(data['location']['localtime'], "%Y-%m-%d %H:%M")
+        accumulations = _precipitation_totals(hours, now)
+        return {
+            'hoje': summaries[0] if summaries else {},
+            'amanha': summaries[1] if len(summaries) > 1 else {},
+            **accumulations,
+            'horas': hours
+        }
+
+class OpenMeteoProvider(WeatherProvider):
+    """Provedor Open-Meteo (sem chave; inclui as últimas 24h via past_days)"""
+    name = "Open-Meteo"
+    url = "https://api.open-meteo.com/v1/forecast"
+
+    def __init__(self, latitude=RECIFE_LATITUDE, longitude=RECIFE_LONGITUDE, rate_limiter=None):
+        super().__init__()
+        self.latitude = latitude
+        self.longitude = longitude
+        self.rate_limiter = rate_limiter
+
+    def fetch(self):
+        if self.rate_limiter:
+            self.rate_limiter.require('openmeteo')
+        data = _http_get_json(self.url, {
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'current': "temperature_2m,apparent_temperature,precipitation,pressure_msl,"
+                       "relative_humidity_2m,wind_speed_10m,wind_direction_10m,weather_code",
+            'hourly': "temperature_2m,precipitation,precipitation_probability,pressure_msl,weather_code",
+            'daily': "temperature_2m_max,temperature_2m_min,precipitation_sum,precipitation_probability_max,weather_code",
+            'past_days': 1,
+            'forecast_days': 2,
+            'timezone': "America/Sao_Paulo"
+        })
+        return self._format_current(data), self._format_forecast(data)
+
+    def _format_current(self, data):
+        current = data['current']
+        timestamp = current['time'].replace('T', ' ')
+        direction = COMPASS_POINTS[int((current['wind_direction_10m'] % 360) / 45 + 0.5) % 8]
+        return {
+            'temperatura': current['temperature_2m'],
+            'sensacao_termica': current['apparent_temperature'],
+            'precipitacao_mm': current['precipitation'],
+            'pressao_hpa': round(current['pressure_msl']),
+            'umidade': current['relative_humidity_2m'],
+            'vento_kph': current['wind_speed_10m'],
+            'direcao_vento': direction,
+            'condicao': WMO_CONDITIONS.get(current['weather_code'], "Indisponível"),
+            'icone': "",
+            'ultima_atualizacao': timestamp,
+            'cidade': "Recife",
+            'regiao': "Pernambuco",
+            'pais': "Brasil",
+            'hora_local': timestamp
+        }
+
+    def _format_forecast(self, data):
+        hourly = data['hourly']
+        hours = []
+        for i, timestamp in enumerate(hourly['time']):
+            code = hourly['weather_code'][i]
+            hours.append({
+                'hora': timestamp.replace('T', ' '),
+                'temperatura': hourly['temperature_2m'][i],
+                'precipitacao': hourly['precipitation'][i] or 0,
+                'chance_chuva': hourly['precipitation_probability'][i] or 0,
+                'pressao': round(hourly['pressure_msl'][i] or 0),
+                'condicao': WMO_CONDITIONS.get(code, "Indisponível"),
+                'icone': ""
+            })
+        daily = data['daily']
+        today = datetime.strptime(data['current']['time'], "%Y-%m-%dT%H:%M")
+        summaries = {}
+        for i, day in enumerate(daily['time']):
+            summaries[day] = {
+                'temp_max': daily['temperature_2m_max'][i],
+                'temp_min': daily['temperature_2m_min'][i],
+                'precipitacao_total': daily['precipitation_sum'][i],
+                'chance_chuva': daily['precipitation_probability_max'][i],
+                'condicao': WMO_CONDITIONS.get(daily['weather_code'][i], "Indisponível")
+            }
+        accumulations = _precipitation_totals(hours, today)
+        return {
+            'hoje': summaries.get(today.strftime("%Y-%m-%d"), {}),
+            'amanha': summaries.get((today + timedelta(days=1)).strftime("%Y-%m-%d"), {}),
+            **accumulations,
+            'horas': hours
+        }
+
+class LocalStoreProvider(WeatherProvider):
+    """Último conjunto de dados obtido de um provedor remoto, guardado em arquivo"""
+    name = "Armazenamento local"
+    remote = False
+
+    def __init__(self, path=None, max_age_hours=24):
+        super().__init__()
+        self.path = path or LOCAL_STORE_PATH
+        self.max_age = timedelta(hours=max_age_hours)
+
+    def _read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def fetch(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError("nenhum dado salvo")
+        stored = self._read()
+        saved_at = datetime.fromisoformat(stored['salvo_em'])
+        if datetime.now() - saved_at > self.max_age:
+            raise ValueError(f"dados salvos em {saved_at:%d/%m %H:%M} estão desatualizados")
+        return stored['atual'], stored['previsao']
+
+    def earlier_hours(self, hours):
+        """
+        Horas guardadas anteriores à primeira de `hours` (até max_age atrás)
+
+        As previsões horárias dos provedores começam à meia-noite do dia
+        corrente; as horas do dia anterior guardadas aqui estendem a série de
+        horas já encerradas para além da meia-noite.
+
+        Args:
+            hours: Lista 'horas' de uma previsão
+
+        Returns:
+            list: Horas guardadas, em ordem cronológica (vazia sem arquivo)
+        """
+        try:
+            stored = self._read()
+            saved = stored.get('horas_anteriores', []) + stored['previsao'].get('horas', [])
+        except (OSError, ValueError, KeyError, AttributeError):
+            return []
+        first = min((hour['hora'] for hour in hours if 'hora' in hour), default=None)
+        cutoff = (datetime.now() - self.max_age).strftime("%Y-%m-%d %H:%M")
+        kept = {
+            hour['hora']: hour for hour in saved
+            if isinstance(hour, dict) and cutoff <= hour.get('hora', '') and (first is None or hour['hora'] < first)
+        }
+        return [kept[key] for key in sorted(kept)]
+
+    def save(self, source, current, forecast):
+        """
+        Grava o resultado de forma atômica para leitores em outros processos
+
+        As horas do último dia anteriores à nova previsão são mantidas em
+        'horas_anteriores' (ver earlier_hours).
+        """
+        payload = {
+            'fonte': source,
+            'salvo_em': datetime.now().isoformat(timespec='seconds'),
+            'atual': current,
+            'previsao': forecast,
+            'horas_anteriores': self.earlier_hours(forecast.get('horas', []))
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class SimulatedProvider(WeatherProvider):
+    """Último recurso: dados simulados"""
+    name = "Simulador"
+    remote = False
+
+    def __init__(self, simulate):
+        super().__init__()
+        self.simulate = simulate
+
+    def fetch(self):
+        return self.simulate()
+
+class ProviderChain:
+    """
+    Classe para consultar provedores em ordem, com disjuntores e hedge
+    """
+
+    def __init__(self, providers, store: LocalStoreProvider = None, max_workers: int = 4):
+        self.providers = providers
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="provedor")
+
+    def _call(self, provider):
+        """Executa um provedor registrando latência ou falha no seu disjuntor"""
+        start = time.monotonic()
+        try:
+            result = provider.fetch()
+        except RateLimitExceeded:
+            # Cota local esgotada não indica problema no provedor, mas a
+            # tentativa de meio-aberto não decidiu nada e volta a esperar
+            provider.breaker.release(rearm=True)
+            raise
+        except Exception:
+            provider.breaker.record_failure()
+            raise
+        provider.breaker.record_success(time.monotonic() - start)
+        return result
+
+    def _hedge_delay(self, provider):
+        p95 = provider.breaker.p95()
+        return p95 if p95 is not None else DEFAULT_HEDGE_DELAY
+
+    def fetch(self):
+        """
+        Obtém dados do primeiro provedor disponível
+
+        Returns:
+            Tuple: (nome_do_provedor, dados_atuais, previsao)
+        """
+        candidates = [p for p in self.providers if p.breaker.allow()]
+        errors = [(p.name, f"disjuntor {p.breaker.state}") for p in self.providers if p not in candidates]
+        pending = {}
+        next_index = 0
+        hedge_at = None
+
+        def launch():
+            nonlocal next_index, hedge_at
+            provider = candidates[next_index]
+            next_index += 1
+            pending[self.executor.submit(self._call, provider)] = provider
+            # Prazo do próximo hedge: p95 do mais prioritário pendente, contado desta partida
+            leader = min(pending.values(), key=self.providers.index)
+            hedge_at = time.monotonic() + self._hedge_delay(leader)
+
+        try:
+            if candidates:
+                launch()
+            while pending:
+                # Hedge apenas para o próximo provedor remoto; o prazo não recomeça a cada volta
+                timeout = None
+                if next_index < len(candidates) and candidates[next_index].remote:
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+
+                for future in sorted(done, key=lambda f: self.providers.index(pending[f])):
+                    provider = pending.pop(future)
+                    try:
+                        current, forecast = future.result()
+                    except Exception as e:
+                        errors.append((provider.name, e))
+                        continue
+                    if provider.remote and self.store is not None:
+                        self.store.save(provider.name, current, forecast)
+                    return provider.name, current, forecast
+
+                if not pending and next_index < len(candidates):
+                    launch()
+            raise ProviderChainError(errors)
+        finally:
+            # Candidatos que não chegaram a ser consultados devolvem a tentativa de meio-aberto
+            for provider in candidates[next_index:]:
+                provider.breaker.release()
+
+    def status(self):
+        """Estado dos disjuntores e p95 de cada provedor"""
+        return [
+            {'provedor': p.name, 'estado': p.breaker.state, 'p95_s': p.breaker.p95()}
+            for p in self.providers
+        ]
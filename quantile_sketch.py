@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Climatologia por esboços de quantis para o Monitor de Maré e Clima - Recife
+
+Este módulo mantém esboços de quantis em fluxo (estilo KLL), um por estação,
+variável, mês e hora do dia, atualizados à medida que as observações chegam.
+Cada esboço ocupa memória limitada (algumas centenas de valores, qualquer que
+seja o volume de dados) e responde perguntas como "esta chuva está acima do
+percentil 95 para esta época do ano?" em microssegundos.
+
+A climatologia observada (DEFAULT_CLIMATOLOGY_PATH) cresce com os dados
+reais coletados: record_observations incorpora a chuva de 24h e a maré atual
+de cada snapshot, uma vez por hora. Uma climatologia montada a partir do
+gerador de cenários fica em outro arquivo e é marcada como sintética: seus
+percentis só têm significado para os próprios dados simulados e não devem
+ser apresentados como climatologia real. Esboços com menos de
+MIN_OBSERVATIONS valores ainda não respondem percentis.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import tempfile
+import zlib
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+import numpy as np
+
+# Precisão padrão dos esboços (erro de posto ~ 1.7 / K)
+DEFAULT_K = 200
+
+# Fator de redução da capacidade entre níveis do KLL
+CAPACITY_DECAY = 2 / 3
+
+# Arquivos padrão das climatologias observada e sintética (podem ser alterados por variáveis de ambiente)
+DEFAULT_CLIMATOLOGY_PATH = os.environ.get("RECALERT_CLIMATOLOGY", "climatologia.json")
+DEFAULT_SYNTHETIC_CLIMATOLOGY_PATH = os.environ.get("RECALERT_SYNTHETIC_CLIMATOLOGY", "climatologia_sintetica.json")
+
+# Observações mínimas de um esboço (mês e hora) antes de responder percentis
+MIN_OBSERVATIONS = 20
+
+class KLLSketch:
+    """
+    Esboço de quantis KLL
+
+    Os valores ficam em compactadores empilhados; o nível h representa 2^h
+    observações por item. Quando um nível enche, metade dos itens (pares ou
+    ímpares, ao acaso) sobe para o nível seguinte.
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = None):
+        self.k = k
+        self.count = 0
+        self.compactors = [[]]
+        self._rng = random.Random(seed)
+        self._sorted = None
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                items.sort()
+                # Com número ímpar de itens, o último permanece no nível atual
+                keep = [items.pop()] if len(items) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.compactors[level + 1].extend(items[offset::2])
+                self.compactors[level] = keep
+                # Reinicia: a nova pilha pode ter reduzido a capacidade dos níveis baixos
+                level = 0
+                continue
+            level += 1
+
+    def update(self, value):
+        """Acrescenta uma observação"""
+        self.compactors[0].append(float(value))
+        self.count += 1
+        self._sorted = None
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values):
+        """Acrescenta várias observações (NaN é ignorado)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        # Em blocos do tamanho de uma compactação, mantendo a memória limitada
+        step = max(2, self._capacity(0))
+        for start in range(0, values.size, step):
+            chunk = values[start:start + step]
+            self.compactors[0].extend(chunk.tolist())
+            self.count += chunk.size
+            self._compress()
+        self._sorted = None
+
+    def merge(self, other):
+        """Incorpora outro esboço (ex.: de outro processo)"""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self._sorted = None
+        self._compress()
+
+    @property
+    def size(self):
+        """Número de valores guardados (limita a memória)"""
+        return sum(len(items) for items in self.compactors)
+
+    def _cumulative(self):
+        if self._sorted is None:
+            pairs = sorted(
+                (value, 1 << level) for level, items in enumerate(self.compactors) for value in items
+            )
+            values = [value for value, _ in pairs]
+            cumulative = []
+            total = 0
+            for _, weight in pairs:
+                total += weight
+                cumulative.append(total)
+            self._sorted = (values, cumulative, total)
+        return self._sorted
+
+    def quantile(self, q):
+        """
+        Valor aproximado do quantil q (0 a 1)
+
+        Returns:
+            float: Quantil estimado ou None se o esboço estiver vazio
+        """
+        values, cumulative, total = self._cumulative()
+        if not values:
+            return None
+        index = bisect_left(cumulative, q * total)
+        return values[min(index, len(values) - 1)]
+
+    def rank(self, value):
+        """Fração aproximada das observações menores ou iguais a value"""
+        values, cumulative, total = self._cumulative()
+        if not values:
+            return None
+        index = bisect_right(values, value)
+        return cumulative[index - 1] / total if index else 0.0
+
+    def to_dict(self):
+        return {'k': self.k, 'contagem': self.count, 'compactadores': self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.count = data['contagem']
+        sketch.compactors = [list(items) for items in data['compactadores']]
+        return sketch
+
+class ClimatologyStore:
+    """
+    Classe para manter esboços por estação, variável, mês e hora do dia
+    """
+
+    def __init__(self, k: int = DEFAULT_K, synthetic: bool = False, min_count: int = MIN_OBSERVATIONS):
+        self.k = k
+        self.synthetic = synthetic
+        self.min_count = min_count
+        self.sketches = {}
+        # (estação, variável) -> última hora incorporada por observe_latest
+        self.observed_until = {}
+
+    def _sketch(self, station, variable, month, hour, create=False):
+        key = (station, variable, month, hour)
+        sketch = self.sketches.get(key)
+        if sketch is None and create:
+            sketch = self.sketches[key] = KLLSketch(self.k, seed=zlib.crc32(repr(key).encode('utf-8')))
+        return sketch
+
+    def observe(self, station, variable, times, values):
+        """
+        Incorpora observações, agrupadas por mês e hora do dia
+
+        Args:
+            station: Identificador da estação
+            variable: Nome da variável (ex.: 'chuva_24h', 'mare')
+            times: datetime ou array datetime64 com o horário de cada valor
+            values: Valor ou array de valores
+        """
+        times = np.atleast_1d(np.asarray(times, dtype='datetime64[h]'))
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        months = times.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        hours = (times - times.astype('datetime64[D]')).astype(np.int64)
+        groups = months * 24 + hours
+        order = np.argsort(groups, kind='stable')
+        groups, values = groups[order], values[order]
+        bounds = np.flatnonzero(np.diff(groups)) + 1
+        for chunk_groups, chunk in zip(np.split(groups, bounds), np.split(values, bounds)):
+            month, hour = divmod(int(chunk_groups[0]), 24)
+            self._sketch(station, variable, month, hour, create=True).update_many(chunk)
+
+    def observe_latest(self, station, variable, when, value):
+        """
+        Incorpora a observação da hora de `when`, se essa hora ainda não entrou
+
+        Snapshots consultados várias vezes na mesma hora contam uma vez só.
+
+        Returns:
+            bool: True se a observação foi incorporada
+        """
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        last = self.observed_until.get((station, variable))
+        if value is None or (last is not None and hour <= last):
+            return False
+        self.observe(station, variable, np.datetime64(hour, 'h'), value)
+        self.observed_until[(station, variable)] = hour
+        return True
+
+    def _ready_sketch(self, station, variable, when):
+        sketch = self._sketch(station, variable, when.month, when.hour)
+        return sketch if sketch is not None and sketch.count >= self.min_count else None
+
+    def percentile(self, station, variable, when, q):
+        """Valor do quantil q para o mês e a hora de `when` (None sem dados suficientes)"""
+        sketch = self._ready_sketch(station, variable, when)
+        return sketch.quantile(q) if sketch else None
+
+    def rank(self, station, variable, when, value):
+        """Posto percentual (0 a 100) de value na climatologia do mês e da hora de `when`"""
+        sketch = self._ready_sketch(station, variable, when)
+        if sketch is None or value is None:
+            return None
+        return round(100 * sketch.rank(value), 1)
+
+    def is_above(self, station, variable, when, value, q=0.95):
+        """True se value está acima do quantil q para esta época do ano e hora do dia"""
+        threshold = self.percentile(station, variable, when, q)
+        return threshold is not None and value is not None and value > threshold
+
+    def memory_items(self):
+        """Total de valores guardados em todos os esboços"""
+        return sum(sketch.size for sketch in self.sketches.values())
+
+    def save(self, path=None):
+        """Grava a climatologia de forma atômica"""
+        path = path or DEFAULT_CLIMATOLOGY_PATH
+        payload = {
+            'k': self.k,
+            'sintetica': self.synthetic,
+            'observado_ate': [
+                {'estacao': s, 'variavel': v, 'hora': hour.isoformat()}
+                for (s, v), hour in self.observed_until.items()
+            ],
+            'esbocos': [
+                {'estacao': s, 'variavel': v, 'mes': m, 'hora': h, 'esboco': sketch.to_dict()}
+                for (s, v, m, h), sketch in self.sketches.items()
+            ]
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=None):
+        """Lê a climatologia gravada (None se o arquivo não existir)"""
+        path = path or DEFAULT_CLIMATOLOGY_PATH
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        # Arquivos sem a marcação vieram do gerador de cenários (únicos até então)
+        store = cls(payload['k'], synthetic=payload.get('sintetica', True))
+        for entry in payload['esbocos']:
+            key = (entry['estacao'], entry['variavel'], entry['mes'], entry['hora'])
+            store.sketches[key] = KLLSketch.from_dict(entry['esboco'])
+        for entry in payload.get('observado_ate', []):
+            store.observed_until[(entry['estacao'], entry['variavel'])] = datetime.fromisoformat(entry['hora'])
+        return store
+
+def record_observations(weather_data, forecast_data, tide_data, station="Recife", now=None, path=None):
+    """
+    Incorpora um snapshot de dados reais à climatologia observada e a grava
+
+    A chuva das últimas 24h e a maré atual entram uma vez por hora; uma
+    climatologia sintética no mesmo arquivo é substituída por uma nova. Dados
+    do simulador ou do armazenamento local (campo 'fonte') não são observações
+    e ficam de fora.
+
+    Args:
+        weather_data: Dados meteorológicos atuais (usa 'hora_local', se houver)
+        forecast_data: Dados de previsão
+        tide_data: Dados de maré
+        station: Estação da climatologia
+        now: Horário das observações (padrão: 'hora_local' ou agora)
+        path: Arquivo da climatologia observada
+
+    Returns:
+        ClimatologyStore: Climatologia atualizada
+    """
+    from providers import LocalStoreProvider, SimulatedProvider
+
+    not_observed = (SimulatedProvider.name, LocalStoreProvider.name)
+    path = path or DEFAULT_CLIMATOLOGY_PATH
+    if now is None:
+        try:
+            now = datetime.strptime(weather_data.get('hora_local', ''), "%Y-%m-%d %H:%M")
+        except ValueError:
+            now = datetime.now()
+    store = ClimatologyStore.load(path)
+    if store is None or store.synthetic:
+        store = ClimatologyStore()
+    added = False
+    if weather_data.get('fonte') not in not_observed:
+        added |= store.observe_latest(station, 'chuva_24h', now, forecast_data.get('precipitacao_24h'))
+    if tide_data.get('fonte') not in not_observed:
+        added |= store.observe_latest(station, 'mare', now, tide_data.get('mare_atual', {}).get('altura'))
+    if added:
+        store.save(path)
+    return store
+
+def build_from_scenario(years=3, seed=0, station="Recife", k=DEFAULT_K):
+    """
+    Cria uma climatologia a partir do gerador de cenários sintéticos
+
+    Usada quando ainda não há histórico de observações reais: chuva acumulada
+    em 24h (somas prefixadas) e altura da maré, hora a hora. O resultado é
+    marcado como sintético.
+    """
+    from accumulation import AccumulationIndex
+    from scenario import ScenarioGenerator
+
+    hours = int(years * 365 * 24)
+    start = datetime(datetime.now().year - int(math.ceil(years)), 1, 1)
+    scenario = ScenarioGenerator(seed=seed, start=start, hours=hours).generate()
+    rain_24h = AccumulationIndex.from_series(start, scenario['chuva'][0]).trailing_sums(24)[0]
+
+    store = ClimatologyStore(k, synthetic=True)
+    store.observe(station, 'chuva_24h', scenario['tempo'], rain_24h)
+    store.observe(station, 'mare', scenario['tempo'], scenario['mare'][0])
+    return store
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera a climatologia por esboços de quantis")
+    parser.add_argument("--saida", default=DEFAULT_SYNTHETIC_CLIMATOLOGY_PATH, help="Arquivo de saída")
+    parser.add_argument("--anos", type=float, default=3, help="Anos de cenário sintético")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do cenário")
+    args = parser.parse_args()
+    store = build_from_scenario(args.anos, args.semente)
+    store.save(args.saida)
+    print(f"Climatologia sintética gravada em {args.saida}: {len(store.sketches)} esboços, "
+          f"{store.memory_items()} valores guardados")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Limitador de requisições para o Monitor de Maré e Clima - Recife
+
+Este módulo implementa um token bucket por provedor de dados, com contabilização
+de cota diária, compartilhado por todos os processos do servidor através de um
+arquivo SQLite local. Também permite agrupar (coalescer) pedidos de atualização
+repetidos para que apenas um deles chegue aos provedores.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import date
+
+# Orçamento por provedor: reposição por minuto, capacidade de rajada e cota diária
+PROVIDER_BUDGETS = {
+    'weatherapi': {'por_minuto': 6, 'rajada': 4, 'cota_diaria': 1000},
+    'openmeteo': {'por_minuto': 6, 'rajada': 4, 'cota_diaria': 5000},
+    'mare': {'por_minuto': 2, 'rajada': 2, 'cota_diaria': 200},
+}
+
+# Arquivo padrão do estado compartilhado (pode ser alterado por variável de ambiente)
+DEFAULT_DB_PATH = os.environ.get("RECALERT_RATE_LIMIT_DB", "recalert_rate_limit.db")
+
+class RateLimitExceeded(Exception):
+    """Exceção levantada quando o orçamento de um provedor está esgotado"""
+
+    def __init__(self, provider, reason):
+        self.provider = provider
+        self.reason = reason
+        super().__init__(f"Limite de requisições atingido para '{provider}': {reason}")
+
+class RateLimiter:
+    """
+    Classe para controlar o consumo das cotas dos provedores entre processos
+    """
+
+    def __init__(self, db_path: str = None, budgets: dict = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.budgets = budgets or PROVIDER_BUDGETS
+        self._ensure_schema()
+
+    def _connect(self):
+        # Conexão por operação: segura entre threads e processos
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "provider TEXT PRIMARY KEY, tokens REAL, updated REAL, day TEXT, used INTEGER)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refreshes (key TEXT PRIMARY KEY, last REAL)"
+            )
+        finally:
+            conn.close()
+
+    def acquire(self, provider, tokens=1):
+        """
+        Tenta consumir tokens do orçamento de um provedor
+
+        Args:
+            provider: Nome do provedor (chave de PROVIDER_BUDGETS)
+            tokens: Número de requisições a consumir
+
+        Returns:
+            bool: True se a requisição pode ser feita
+        """
+        budget = self.budgets.get(provider)
+        if budget is None:
+            return True
+
+        now = time.time()
+        today = date.today().isoformat()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE garante exclusão mútua entre processos durante a leitura e escrita
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated, day, used FROM buckets WHERE provider = ?", (provider,)
+            ).fetchone()
+            if row is None:
+                available, updated, day, used = budget['rajada'], now, today, 0
+            else:
+                available, updated, day, used = row
+
+            # Reposição proporcional ao tempo decorrido, limitada à capacidade de rajada
+            available = min(budget['rajada'], available + (now - updated) * budget['por_minuto'] / 60)
+            if day != today:
+                day, used = today, 0
+
+            allowed = available >= tokens and used + tokens <= budget['cota_diaria']
+            if allowed:
+                available -= tokens
+                used += tokens
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (provider, tokens, updated, day, used) VALUES (?, ?, ?, ?, ?)",
+                (provider, available, now, day, used)
+            )
+            conn.execute("COMMIT")
+            return allowed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def require(self, provider, tokens=1):
+        """
+        Consome tokens ou levanta RateLimitExceeded
+
+        Args:
+            provider: Nome do provedor
+            tokens: Número de requisições a consumir
+        """
+        if not self.acquire(provider, tokens):
+            usage = self.usage(provider)
+            if usage['usadas_hoje'] + tokens > usage['cota_diaria']:
+                reason = f"cota diária de {usage['cota_diaria']} requisições esgotada"
+            else:
+                reason = "muitas requisições em pouco tempo"
+            raise RateLimitExceeded(provider, reason)
+
+    def usage(self, provider):
+        """
+        Retorna o consumo atual de um provedor
+
+        Args:
+            provider: Nome do provedor
+
+        Returns:
+            dict: Requisições usadas hoje, cota diária e tokens disponíveis
+        """
+        budget = self.budgets.get(provider, {})
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated, day, used FROM buckets WHERE provider = ?", (provider,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            available, used = budget.get('rajada', 0), 0
+        else:
+            available, updated, day, used = row
+            available = min(budget.get('rajada', 0), available + (time.time() - updated) * budget.get('por_minuto', 0) / 60)
+            if day != date.today().isoformat():
+                used = 0
+        return {
+            'usadas_hoje': used,
+            'cota_diaria': budget.get('cota_diaria'),
+            'disponiveis': round(available, 2)
+        }
+
+    def coalesce(self, key, min_interval):
+        """
+        Decide se um pedido de atualização deve ser executado ou agrupado
+
+        Apenas o primeiro pedido dentro de min_interval segundos (entre todos os
+        processos) recebe True; os demais devem reutilizar o resultado dele.
+
+        Args:
+            key: Identificador da operação (ex.: 'forcar_atualizacao')
+            min_interval: Intervalo mínimo entre execuções em segundos
+
+        Returns:
+            bool: True se este pedido deve ser executado
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT last FROM refreshes WHERE key = ?", (key,)).fetchone()
+            run = row is None or now - row[0] >= min_interval
+            if run:
+                conn.execute("INSERT OR REPLACE INTO refreshes (key, last) VALUES (?, ?)", (key, now))
+            conn.execute("COMMIT")
+            return run
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
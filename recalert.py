@@ -12,9 +12,6 @@ Data: Junho/2025
 """
 
 import streamlit as st
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
 import requests
 import json
 import datetime
@@ -26,11 +23,37 @@ import os
 import sys
 import random
 import math
+import numpy as np
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from bs4 import BeautifulSoup
 
+from chart_renderer import ChartRenderer
+from coincidence import snapshot_coincidences
+from districts import DistrictIndex, assess_districts, load_districts, load_precipitation_grid
+from email_manager import send_alert_email
+from ensemble import ensemble_risk
+from nowcast import nowcast_summary, observed_series
+from providers import LocalStoreProvider
+from quantile_sketch import (
+    DEFAULT_CLIMATOLOGY_PATH, DEFAULT_SYNTHETIC_CLIMATOLOGY_PATH, ClimatologyStore, build_from_scenario,
+    record_observations
+)
+from rate_limiter import RateLimiter
+from recalert_core import RiskAssessor, TideDataManager, WeatherDataManager
+from risk_rules import snapshot_inputs
+from risk_tracker import RiskTracker
+from scenario import ScenarioGenerator
+from shared_cache import get_cache_backend, shared_cache
+from view_model import get_view_model
+from visualizacoes import (
+    DEFAULT_VIEWPORT_WIDTH, create_plotly_graphs, figure_json_bytes, render_long_range_chart,
+    reset_long_range_zoom
+)
+from warm_start import WarmStart
+from webhooks import WebhookConfigError, WebhookNotifier, build_alert_payload
+
 # --- Configuração da Página Streamlit ---
 st.set_page_config(
     page_title="Monitor Maré e Clima - Recife",
@@ -44,194 +67,10 @@ st.set_page_config(
     }
 )
 
-# --- Classes de Gerenciamento de Dados (Adaptadas do Original) ---
-
-# (As classes WeatherDataManager, TideDataManager, RiskAssessor, EmailManager
-#  serão copiadas/adaptadas aqui. Por enquanto, placeholders)
-
-class WeatherDataManager:
-    """
-    Classe para gerenciar a coleta e processamento de dados meteorológicos
-    utilizando a WeatherAPI.com ou dados simulados
-    """
-    
-    def __init__(self, api_key: str = None, use_simulated_data: bool = False):
-        self.api_key = api_key or "SUA_CHAVE_API_AQUI"
-        self.base_url = "http://api.weatherapi.com/v1"
-        self.location = "Recife"
-        self.weather_data = {}
-        self.forecast_data = {}
-        self.last_update = None
-        self.use_simulated_data = use_simulated_data
-    
-    # ... (Métodos get_current_weather, get_forecast, _format_*, _get_simulated_*)
-    # (Copiar métodos da versão Tkinter aqui, adaptando se necessário)
-    # Exemplo simplificado:
-    def get_current_weather(self):
-        if self.use_simulated_data:
-            return self._get_simulated_weather_data()
-        # Implementação real da API...
-        return self._get_simulated_weather_data() # Placeholder
-
-    def get_forecast(self, days: int = 2):
-        if self.use_simulated_data:
-             return self._get_simulated_forecast_data()
-        # Implementação real da API...
-        return self._get_simulated_forecast_data() # Placeholder
-
-    def _get_simulated_weather_data(self):
-        # (Copiar implementação da versão Tkinter)
-        now = datetime.now()
-        return {
-            'temperatura': round(28 + (random.random() * 2 - 1) * 4, 1),
-            'sensacao_termica': round(29 + (random.random() * 2 - 1) * 4, 1),
-            'precipitacao_mm': round(random.uniform(0, 5), 1),
-            'pressao_hpa': random.randint(1008, 1018),
-            'umidade': random.randint(70, 95),
-            'vento_kph': round(random.uniform(5, 25), 1),
-            'direcao_vento': random.choice(["N", "NE", "E", "SE", "S", "SW", "W", "NW"]),
-            'condicao': random.choice(["Parcialmente nublado", "Ensolarado", "Nublado", "Chuva leve"]),
-            'icone': "//cdn.weatherapi.com/weather/64x64/day/116.png",
-            'ultima_atualizacao': now.strftime("%Y-%m-%d %H:%M"),
-            'cidade': "Recife",
-            'regiao': "Pernambuco",
-            'pais': "Brasil",
-            'hora_local': now.strftime("%Y-%m-%d %H:%M")
-        }
+# --- Classes de Gerenciamento de Dados ---
 
-    def _get_simulated_forecast_data(self):
-        # (Copiar implementação da versão Tkinter)
-        now = datetime.now()
-        horas = []
-        precip_24h = 0
-        precip_prox_24h = 0
-        for i in range(48):
-            hora_dt = now - timedelta(hours=24) + timedelta(hours=i)
-            precip = round(random.uniform(0, 2), 1) if random.random() < 0.3 else 0
-            horas.append({
-                'hora': hora_dt.strftime("%Y-%m-%d %H:%M"),
-                'temperatura': round(28 + math.sin((hora_dt.hour - 6) * math.pi / 12) * 4 + random.uniform(-1, 1), 1),
-                'precipitacao': precip,
-                'chance_chuva': random.randint(0, 40),
-                'pressao': random.randint(1008, 1018),
-                'condicao': "Nublado" if precip > 0 else "Ensolarado",
-                'icone': "//cdn.weatherapi.com/weather/64x64/day/119.png"
-            })
-            if hora_dt <= now and hora_dt >= now - timedelta(hours=24):
-                 precip_24h += precip
-            if hora_dt >= now and hora_dt <= now + timedelta(hours=24):
-                 precip_prox_24h += precip
-        return {
-            'hoje': {}, # Simplificado
-            'amanha': {}, # Simplificado
-            'precipitacao_24h': round(precip_24h, 1),
-            'precipitacao_proximas_24h': round(precip_prox_24h, 1),
-            'horas': horas
-        }
-
-class TideDataManager:
-    """
-    Classe para gerenciar a coleta e processamento de dados de maré
-    para o Porto do Recife, com suporte a dados simulados
-    """
-    def __init__(self, use_simulated_data: bool = False):
-        self.use_simulated_data = use_simulated_data
-    
-    # ... (Métodos get_tide_data, _scrape_tide_data, _get_simulated_tide_data, _calculate_current_tide, _get_next_tide)
-    # (Copiar métodos da versão Tkinter aqui, adaptando se necessário)
-    # Exemplo simplificado:
-    def get_tide_data(self):
-        if self.use_simulated_data:
-            return self._get_simulated_tide_data()
-        # Implementação real (scraping ou API)
-        return self._get_simulated_tide_data() # Placeholder
-
-    def _get_simulated_tide_data(self):
-        # (Copiar implementação da versão Tkinter)
-        now = datetime.now()
-        today = now.date()
-        day_of_year = today.timetuple().tm_yday
-        base_hour = (day_of_year % 12)
-        tides = []
-        high_tide = 2.0 + 0.3 * math.sin(day_of_year * 2 * math.pi / 29.5) + random.uniform(-0.2, 0.2)
-        low_tide = 0.5 + 0.15 * math.sin(day_of_year * 2 * math.pi / 29.5) + random.uniform(-0.1, 0.1)
-        tide_heights = [high_tide, low_tide, high_tide + random.uniform(-0.1, 0.1), low_tide + random.uniform(-0.1, 0.1)]
-        tide_types = ["alta", "baixa", "alta", "baixa"]
-        for i in range(4):
-            hour = (base_hour + i * 6) % 24
-            minute = random.randint(0, 59)
-            tide_time = datetime(today.year, today.month, today.day, hour, minute)
-            tides.append({
-                'hora': tide_time.strftime("%Y-%m-%d %H:%M"),
-                'altura': round(max(0.1, tide_heights[i]), 2),
-                'tipo': tide_types[i]
-            })
-        tides.sort(key=lambda x: datetime.strptime(x['hora'], "%Y-%m-%d %H:%M"))
-        current_tide = self._calculate_current_tide(tides) # Precisa da implementação completa
-        return {
-            'mares': tides,
-            'mare_atual': current_tide if current_tide else {'altura': 1.0, 'status': 'desconhecido', 'hora': now.strftime("%Y-%m-%d %H:%M")},
-            'mare_maxima': max(tides, key=lambda x: x['altura']) if tides else {},
-            'mare_minima': min(tides, key=lambda x: x['altura']) if tides else {},
-            'proxima_mare': self._get_next_tide(tides) if tides else {}
-        }
-
-    def _calculate_current_tide(self, tides):
-         # (Copiar implementação da versão Tkinter)
-         # Placeholder simplificado
-         if not tides: return None
-         now = datetime.now()
-         heights = [t['altura'] for t in tides]
-         avg_height = sum(heights) / len(heights) if heights else 1.0
-         status = 'enchente' if random.random() > 0.5 else 'vazante'
-         return {'hora': now.strftime("%Y-%m-%d %H:%M"), 'altura': round(avg_height + random.uniform(-0.5, 0.5), 2), 'status': status}
-
-    def _get_next_tide(self, tides):
-        # (Copiar implementação da versão Tkinter)
-        # Placeholder simplificado
-        if not tides: return None
-        now = datetime.now()
-        for tide in tides:
-            tide_time = datetime.strptime(tide['hora'], "%Y-%m-%d %H:%M")
-            if tide_time > now:
-                return tide
-        return tides[0] # Retorna a primeira do dia se nenhuma for encontrada
-
-class RiskAssessor:
-    """
-    Classe para avaliar o nível de risco com base nos dados meteorológicos e de maré
-    """
-    RISK_LOW = "Baixo"
-    RISK_MEDIUM = "Moderado"
-    RISK_HIGH = "Alto"
-    
-    @staticmethod
-    def assess_risk(weather_data, forecast_data, tide_data):
-        # (Copiar implementação da versão Tkinter)
-        risk_score = 0
-        risk_factors = []
-        precip_24h = forecast_data.get('precipitacao_24h', 0)
-        precip_next_24h = forecast_data.get('precipitacao_proximas_24h', 0)
-        current_tide_height = tide_data.get('mare_atual', {}).get('altura', 0)
-        max_tide_height = tide_data.get('mare_maxima', {}).get('altura', 0)
-        pressure = weather_data.get('pressao_hpa')
-
-        if precip_24h >= 30: risk_score += 3; risk_factors.append(f"Prec. 24h: {precip_24h:.1f} mm")
-        elif precip_24h >= 10: risk_score += 1
-        if precip_next_24h >= 30: risk_score += 3; risk_factors.append(f"Prev. Chuva 24h: {precip_next_24h:.1f} mm")
-        elif precip_next_24h >= 10: risk_score += 1
-        if current_tide_height >= 2.0: risk_score += 2; risk_factors.append(f"Maré Atual: {current_tide_height:.2f} m")
-        elif current_tide_height >= 1.5: risk_score += 1
-        if max_tide_height >= 2.2: risk_score += 2; risk_factors.append(f"Maré Máx.: {max_tide_height:.2f} m")
-        elif max_tide_height >= 1.8: risk_score += 1
-        if pressure is not None and pressure < 1000: risk_score += 1; risk_factors.append(f"Pressão Baixa: {pressure} hPa")
-        if precip_24h >= 20 and max_tide_height >= 2.0: risk_score += 2; risk_factors.append("Chuva Forte + Maré Alta")
-
-        if risk_score >= 5: risk_level = RiskAssessor.RISK_HIGH
-        elif risk_score >= 2: risk_level = RiskAssessor.RISK_MEDIUM
-        else: risk_level = RiskAssessor.RISK_LOW
-        description = "Fatores: " + ", ".join(risk_factors) if risk_factors else "Sem fatores significativos."
-        return (risk_level, description)
+# WeatherDataManager, TideDataManager e RiskAssessor ficam em recalert_core.py,
+# que não depende do Streamlit e é compartilhado com a linha de comando.
 
 class EmailManager:
     """
@@ -260,14 +99,6 @@ class EmailManager:
         self.config = self._load_config_from_state() # Atualiza config interna
         return True
 
-    def send_alert(self, weather_data, forecast_data, tide_data, risk_level, risk_description):
-        # (Copiar implementação da versão Tkinter, usando self.config)
-        # Placeholder simplificado
-        if not self.config["sender_email"] or not self.config["sender_password"] or not self.config["recipient_email"]:
-            return (False, "Configurações de e-mail incompletas")
-        st.success(f"(Simulado) E-mail de alerta {risk_level} enviado para {self.config['recipient_email']}")
-        return (True, "E-mail de alerta enviado com sucesso (simulado)")
-
     def test_config(self):
         # (Copiar implementação da versão Tkinter, usando self.config)
         # Placeholder simplificado
@@ -278,23 +109,186 @@ class EmailManager:
 
 # --- Funções de Obtenção de Dados com Cache ---
 
+# Intervalo mínimo entre atualizações forçadas, somando todos os usuários e processos
+MIN_FORCED_REFRESH_SECONDS = 60
+
+@st.cache_resource
+def get_rate_limiter():
+    """Limitador de requisições compartilhado (estado em arquivo, comum a todos os processos)"""
+    return RateLimiter()
+
+# Localidade monitorada pela página (com a fonte, forma a chave do acompanhamento de risco)
+LOCATION = "Recife"
+
+@st.cache_resource
+def get_risk_tracker():
+    """Acompanhamento incremental de risco do processo (reavalia só quando as entradas mudam)"""
+    return RiskTracker()
+
+@st.cache_resource
+def get_synthetic_climatology():
+    """Climatologia do cenário sintético (do arquivo ou gerada na primeira chamada)"""
+    return ClimatologyStore.load(DEFAULT_SYNTHETIC_CLIMATOLOGY_PATH) or build_from_scenario()
+
+@st.cache_resource(max_entries=2)
+def _load_observed_climatology(mtime):
+    # Chave pela data de modificação: uma nova gravação (de qualquer réplica) é relida
+    climatology = ClimatologyStore.load(DEFAULT_CLIMATOLOGY_PATH)
+    return None if climatology is None or climatology.synthetic else climatology
+
+def climatology_for(use_simulated_data):
+    """
+    Climatologia aplicável à fonte de dados, ou None
+
+    Dados simulados usam a climatologia sintética; dados reais, a climatologia
+    observada, que cresce a cada snapshot coletado (ver observe_climatology).
+    """
+    if use_simulated_data:
+        return get_synthetic_climatology()
+    try:
+        return _load_observed_climatology(os.path.getmtime(DEFAULT_CLIMATOLOGY_PATH))
+    except OSError:
+        return None
+
+@st.cache_resource
+def get_chart_renderer():
+    """Pool de processos compartilhado que renderiza os gráficos em imagem"""
+    return ChartRenderer()
+
+@st.cache_resource
+def get_webhook_notifier():
+    """Notificador de webhooks do processo (filas e conexões mantidas entre alertas)"""
+    return WebhookNotifier()
+
+# Tempo máximo de espera pelas entregas de webhook na interface (segundos)
+WEBHOOK_WAIT_SECONDS = 10
+
+# Espera máxima por um gráfico em renderização (segundos)
+CHART_WAIT_SECONDS = 5
+
+# Largura do gráfico de histórico longo em pixels (o layout é "wide"; telas
+# maiores ou menores ajustam por variável de ambiente)
+HISTORY_CHART_WIDTH = int(os.environ.get("RECALERT_CHART_WIDTH", DEFAULT_VIEWPORT_WIDTH))
+
+# Janelas de coincidência de chuva e maré exibidas (as mais severas)
+COINCIDENCE_WINDOWS = 5
+
 # Usar cache para evitar recarregar dados a cada interação
-@st.cache_data(ttl=1800) # Cache por 30 minutos
+@st.cache_resource
+def get_provider_chain():
+    """Cadeia de provedores do processo (mantém disjuntores e latências entre atualizações)"""
+    return WeatherDataManager.build_provider_chain(
+        os.environ.get("WEATHERAPI_KEY", "SUA_CHAVE_API_AQUI"), get_rate_limiter()
+    )
+
+# Cache compartilhado entre réplicas: todas leem o mesmo snapshot e só uma atualiza
+@shared_cache(ttl=1800) # Cache por 30 minutos
 def fetch_weather_data(use_simulated_data=True):
     """Busca dados meteorológicos atuais e previsão"""
-    manager = WeatherDataManager(use_simulated_data=use_simulated_data)
+    if use_simulated_data:
+        # Sem provedores consultados: nem o limitador nem a cadeia são criados
+        manager = WeatherDataManager(use_simulated_data=True)
+    else:
+        manager = WeatherDataManager(rate_limiter=get_rate_limiter(), provider_chain=get_provider_chain())
     current = manager.get_current_weather()
     forecast = manager.get_forecast()
     return current, forecast
 
-@st.cache_data(ttl=1800) # Cache por 30 minutos
+@shared_cache(ttl=1800) # Cache por 30 minutos
 def fetch_tide_data(use_simulated_data=True):
     """Busca dados de maré"""
-    manager = TideDataManager(use_simulated_data=use_simulated_data)
+    if use_simulated_data:
+        manager = TideDataManager(use_simulated_data=True)
+    else:
+        manager = TideDataManager(rate_limiter=get_rate_limiter())
     return manager.get_tide_data()
 
+@shared_cache(ttl=1800) # Cache por 30 minutos
+def fetch_history(days=30, use_simulated_data=True):
+    """Busca o histórico horário de maré e chuva para gráficos de longo período"""
+    if not use_simulated_data:
+        return None
+    hours = days * 24
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+    scenario = ScenarioGenerator(seed=0, start=start, hours=hours).generate()
+    return scenario['tempo'], scenario['mare'][0], scenario['chuva'][0]
+
+@shared_cache(ttl=1800) # Uma vez por snapshot, em uma réplica só
+def observe_climatology(use_simulated_data=True):
+    """
+    Incorpora o snapshot de dados reais à climatologia observada
+
+    Returns:
+        int: Esboços da climatologia observada (None com dados simulados)
+    """
+    if use_simulated_data:
+        return None
+    weather_data, forecast_data = fetch_weather_data(use_simulated_data)
+    tide_data = fetch_tide_data(use_simulated_data)
+    try:
+        return len(record_observations(weather_data, forecast_data, tide_data, LOCATION).sketches)
+    except OSError:
+        # Sem gravação no disco a página continua; a próxima atualização tenta de novo
+        return None
+
+# Horas previstas pela previsão imediata e intervalo entre recálculos (segundos)
+NOWCAST_HOURS = 3
+NOWCAST_TTL_SECONDS = 300
+
+@shared_cache(ttl=NOWCAST_TTL_SECONDS)
+def fetch_nowcast(use_simulated_data=True):
+    """Previsão imediata de chuva a partir das horas já observadas nos dados meteorológicos"""
+    weather_data, forecast_data = fetch_weather_data(use_simulated_data)
+    try:
+        reference = datetime.strptime(weather_data.get('hora_local', ''), "%Y-%m-%d %H:%M")
+    except ValueError:
+        reference = datetime.now()
+    hours = forecast_data.get('horas', [])
+    if not use_simulated_data:
+        hours = LocalStoreProvider().earlier_hours(hours) + hours
+    observed = observed_series(hours, reference)
+    if observed is None:
+        return None
+    return nowcast_summary(*observed, horizon=NOWCAST_HOURS)
+
+@shared_cache(ttl=1800) # Cache por 30 minutos
+def fetch_rain_grid(use_simulated_data=True):
+    """
+    Busca a grade de precipitação por célula
+
+    Com dados simulados, usa a grade de exemplo deslocada para as últimas e
+    próximas 24h. Com dados reais, só há grade se RECALERT_RAIN_GRID apontar
+    para um arquivo.
+    """
+    if use_simulated_data:
+        start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=24)
+        return load_precipitation_grid(start=start)
+    if "RECALERT_RAIN_GRID" not in os.environ:
+        return None
+    return load_precipitation_grid()
+
+@st.cache_resource
+def get_warm_start():
+    """
+    Restaura o último snapshot salvo (dados, riscos e gráficos) e passa a
+    salvá-lo periodicamente; executado uma vez por processo, antes da
+    primeira consulta
+    """
+    warm_start = WarmStart(get_cache_backend(), get_risk_tracker(), get_chart_renderer())
+    warm_start.restore()
+    warm_start.start()
+    return warm_start
+
+@st.cache_resource
+def get_district_index(latitudes, longitudes):
+    """Índice célula -> bairro (construído uma vez por grade)"""
+    return DistrictIndex(load_districts(), np.asarray(latitudes), np.asarray(longitudes))
+
 # --- Inicialização do Estado da Sessão ---
 
+# Um servidor recém-iniciado já atende a primeira sessão com os caches do snapshot anterior
+get_warm_start()
+
 # Usar st.session_state para manter dados entre reruns
 if 'initialized' not in st.session_state:
     st.session_state.initialized = True
@@ -308,32 +302,95 @@ if 'initialized' not in st.session_state:
 
 # --- Interface Principal Streamlit ---
 
-st.title("🌊 Monitor de Maré e Clima - Recife")
+# Intervalo de atualização automática das seções de dados (em segundos)
+AUTO_REFRESH_SECONDS = 300
 
-# --- Barra Lateral (Sidebar) para Configurações ---
-with st.sidebar:
-    st.header("Configurações")
-    
+def risk_context(use_simulated_data):
+    """
+    Climatologia e chuva da previsão imediata usadas pelas regras de risco
+
+    Returns:
+        Tuple: (climatologia ou None, chuva prevista para as próximas 3h ou None)
+    """
+    nowcast = fetch_nowcast(use_simulated_data)
+    nowcast_mm = float(nowcast['acumulado'][0]) if nowcast is not None else None
+    return climatology_for(use_simulated_data), nowcast_mm
+
+def load_dashboard_data():
+    """
+    Obtém dados (do cache) e avalia o risco
+
+    Cada seção da página chama esta função de forma independente; como as
+    buscas usam o cache compartilhado, apenas a primeira chamada após expirar o cache
+    consulta os provedores (em qualquer réplica do servidor).
+
+    Returns:
+        Tuple: (weather_data, forecast_data, tide_data, risk_level, risk_description)
+               ou None se os dados não puderem ser carregados
+    """
+    try:
+        weather_data, forecast_data = fetch_weather_data(st.session_state.use_simulated_data)
+        tide_data = fetch_tide_data(st.session_state.use_simulated_data)
+        observe_climatology(st.session_state.use_simulated_data)
+        
+        # Calcula o risco
+        risk_level, risk_description = RiskAssessor.assess_tracked(
+            get_risk_tracker(), (LOCATION, st.session_state.use_simulated_data),
+            weather_data, forecast_data, tide_data, *risk_context(st.session_state.use_simulated_data)
+        )
+    except Exception as e:
+        st.session_state.load_error = str(e)
+        return None
+    st.session_state.load_error = None
+    return weather_data, forecast_data, tide_data, risk_level, risk_description
+
+@st.fragment
+def render_data_source_settings():
+    """Seção da barra lateral com a fonte de dados e atualização forçada"""
     # Opção para usar dados simulados
     use_simulated = st.checkbox("Usar Dados Simulados", value=st.session_state.use_simulated_data)
     if use_simulated != st.session_state.use_simulated_data:
         st.session_state.use_simulated_data = use_simulated
-        # Limpar cache ao mudar a fonte de dados
-        fetch_weather_data.clear()
-        fetch_tide_data.clear()
+        # A fonte faz parte da chave do cache; basta recarregar a página inteira
         st.rerun()
         
     st.info("Dados reais requerem configuração de API e podem falhar.")
 
-    # Botão para forçar atualização
+    # Botão para forçar atualização; pedidos repetidos em sequência são agrupados
     if st.button("Forçar Atualização de Dados"):
-        fetch_weather_data.clear()
-        fetch_tide_data.clear()
-        st.rerun()
-
-    st.markdown("---")
-    st.header("Configurações de E-mail")
-    
+        if get_rate_limiter().coalesce('forcar_atualizacao', MIN_FORCED_REFRESH_SECONDS):
+            # Invalida o cache compartilhado: vale para todas as réplicas
+            fetch_weather_data.clear()
+            fetch_tide_data.clear()
+            fetch_nowcast.clear()
+            st.rerun()
+        st.info("Os dados foram atualizados há menos de um minuto; exibindo a atualização mais recente.")
+
+    if not st.session_state.use_simulated_data:
+        usage = get_rate_limiter().usage('weatherapi')
+        st.caption(f"WeatherAPI: {usage['usadas_hoje']}/{usage['cota_diaria']} requisições hoje")
+
+    with st.expander("Cache de dados"):
+        stats = get_cache_backend().stats()
+        hit_rate = f"{stats['taxa_acertos']:.0%}" if stats['taxa_acertos'] is not None else "-"
+        st.caption(f"{stats['bytes'] / 1024:.0f} KB de {stats['limite_bytes'] / 2**20:.0f} MB em "
+                   f"{stats['entradas']} entradas ({stats['politica'].upper()}) · acertos {hit_rate} · "
+                   f"{stats['remocoes']} remoções")
+        st.table({
+            'Função': [name.rsplit('.', 1)[-1] for name in stats['por_funcao']],
+            'Acertos': [f['acertos'] for f in stats['por_funcao'].values()],
+            'Falhas': [f['falhas'] for f in stats['por_funcao'].values()],
+            'Remoções': [f['remocoes'] for f in stats['por_funcao'].values()],
+            'KB': [round(f['bytes'] / 1024, 1) for f in stats['por_funcao'].values()],
+        })
+        restored = get_warm_start().restored
+        if restored:
+            st.caption(f"Reinício a quente: {restored['entradas']} entradas, {restored['graficos']} gráficos "
+                       f"e {restored['riscos']} riscos restaurados do snapshot de {restored['salvo_em']:%d/%m %H:%M}")
+
+@st.fragment
+def render_email_settings():
+    """Seção da barra lateral com a configuração de e-mail (reexecuta sozinha)"""
     email_manager = EmailManager() # Instancia para usar métodos de salvar/testar
     
     with st.form("email_config_form"):
@@ -366,64 +423,73 @@ with st.sidebar:
         else:
             st.error(message)
 
-# --- Carregamento dos Dados ---
+def _mm(value):
+    """Acumulado formatado para tabela ("—" quando indisponível)"""
+    return "—" if value is None else f"{value:.1f}"
+
+@st.fragment(run_every=AUTO_REFRESH_SECONDS)
+def render_current_conditions():
+    """Seção de condições atuais, atualizada automaticamente"""
+    # Exibe spinner enquanto carrega
+    with st.spinner("Carregando dados..."):
+        data = load_dashboard_data()
+    if data is None:
+        st.error(f"Erro ao carregar dados: {st.session_state.load_error}")
+        st.warning("Não foi possível carregar os dados. Verifique as configurações ou tente novamente mais tarde.")
+        return
+    weather_data, forecast_data, tide_data, risk_level, risk_description = data
+
+    # Campos derivados uma vez por snapshot e compartilhados entre seções e sessões
+    view = get_view_model(weather_data, forecast_data, tide_data)
+    weather, tide = view['clima'], view['mare']
 
-# Exibe spinner enquanto carrega
-with st.spinner("Carregando dados..."):
-    try:
-        weather_data, forecast_data = fetch_weather_data(st.session_state.use_simulated_data)
-        tide_data = fetch_tide_data(st.session_state.use_simulated_data)
-        
-        # Calcula o risco
-        risk_level, risk_description = RiskAssessor.assess_risk(
-            weather_data, forecast_data, tide_data
-        )
-        
-        data_loaded = True
-    except Exception as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        # Define dados vazios para evitar erros na interface
-        weather_data, forecast_data, tide_data = {}, {}, {}
-        risk_level, risk_description = "Indisponível", "Erro ao carregar dados."
-        data_loaded = False
-
-# --- Exibição dos Dados (Layout Principal) ---
-
-if data_loaded:
     # Layout em colunas para dados atuais
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("🌦️ Dados Meteorológicos Atuais")
-        # (Implementar exibição dos dados weather_data)
-        st.metric("Temperatura", f"{weather_data.get('temperatura', 'N/A')}°C", f"{weather_data.get('sensacao_termica', 'N/A')}°C Sensação")
-        st.write(f"**Condição:** {weather_data.get('condicao', 'N/A')}")
-        st.write(f"**Precipitação (agora):** {weather_data.get('precipitacao_mm', 0)} mm")
-        st.write(f"**Pressão:** {weather_data.get('pressao_hpa', 'N/A')} hPa")
-        st.write(f"**Umidade:** {weather_data.get('umidade', 'N/A')}%" )
-        st.write(f"**Vento:** {weather_data.get('vento_kph', 'N/A')} km/h {weather_data.get('direcao_vento', '')}")
-        st.caption(f"Atualizado em: {weather_data.get('ultima_atualizacao', 'N/A')}")
+        st.metric("Temperatura", weather['temperatura'], weather['sensacao'])
+        st.write(f"**Condição:** {weather['condicao']}")
+        st.write(f"**Precipitação (agora):** {weather['precipitacao']}")
+        st.write(f"**Pressão:** {weather['pressao']}")
+        st.write(f"**Umidade:** {weather['umidade']}")
+        st.write(f"**Vento:** {weather['vento']}")
+        st.caption(weather['rodape'])
+
+        nowcast = fetch_nowcast(st.session_state.use_simulated_data)
+        if nowcast is not None:
+            st.write(f"**Previsão imediata ({NOWCAST_HOURS}h):** {nowcast['acumulado'][0]} mm")
+
+        acumulados = forecast_data.get('acumulados')
+        if acumulados:
+            with st.expander("Acumulados de chuva"):
+                # Janelas que os dados não cobrem por inteiro não têm acumulado
+                st.table({
+                    'Janela': list(acumulados['passado']),
+                    'Últimas (mm)': [_mm(v) for v in acumulados['passado'].values()],
+                    'Próximas (mm)': [_mm(acumulados['futuro'].get(k)) for k in acumulados['passado']],
+                })
 
     with col2:
         st.subheader("🌊 Dados de Maré Atuais")
-        # (Implementar exibição dos dados tide_data)
-        current_tide = tide_data.get('mare_atual', {})
-        status_text = "Enchente" if current_tide.get('status') == 'enchente' else "Vazante"
-        st.metric("Altura Atual", f"{current_tide.get('altura', 'N/A')} m", status_text)
+        st.metric("Altura Atual", f"{tide['altura_atual']} m", tide['status'])
         
-        next_tide = tide_data.get('proxima_mare', {})
-        tide_type = "Alta" if next_tide.get('tipo') == 'alta' else "Baixa"
-        st.write(f"**Próxima Maré:** {tide_type} de {next_tide.get('altura', 'N/A')} m às {next_tide.get('hora', 'N/A')}")
+        next_tide = tide['proxima']
+        st.write(f"**Próxima Maré:** {next_tide['tipo']} de {next_tide['altura']} m às {next_tide['hora']}")
         
         st.write("**Marés do Dia:**")
-        for tide in tide_data.get('mares', []):
-             tide_type_day = "Alta" if tide.get('tipo') == 'alta' else "Baixa"
-             st.write(f"- {tide.get('hora', '')}: {tide_type_day} de {tide.get('altura', 'N/A')} m")
-        st.caption(f"Atualizado em: {current_tide.get('hora', 'N/A')}")
+        for event in tide['eventos']:
+             st.write(f"- {event['texto']}")
+        st.caption(f"Atualizado em: {tide['atualizado']}")
+
+@st.fragment(run_every=AUTO_REFRESH_SECONDS)
+def render_risk_section():
+    """Seção de avaliação de risco e alerta por e-mail"""
+    data = load_dashboard_data()
+    if data is None:
+        return
+    weather_data, forecast_data, tide_data, risk_level, risk_description = data
 
-    st.markdown("---")
-
-    # --- Avaliação de Risco ---
     st.subheader("🚨 Avaliação de Risco")
     
     if risk_level == RiskAssessor.RISK_HIGH:
@@ -434,34 +500,182 @@ if data_loaded:
         st.success(f"**Nível de Risco: {risk_level}**")
         
     st.write(risk_description)
+    state = get_risk_tracker().state((LOCATION, st.session_state.use_simulated_data))
+    if state and state['nivel_anterior']:
+        st.caption(f"Nível alterado de {state['nivel_anterior']} para {state['nivel']} "
+                   f"em {state['alterado_em']:%d/%m %H:%M}")
+
+    # Probabilidade de cada nível considerando a incerteza de chuva e maré, com as
+    # mesmas entradas do nível exibido (semente fixa: o resultado não oscila
+    # entre atualizações com os mesmos dados)
+    climatology, nowcast_mm = risk_context(st.session_state.use_simulated_data)
+    ensemble = ensemble_risk(
+        snapshot_inputs(weather_data, forecast_data, tide_data, climatology, nowcast_mm=nowcast_mm), seed=0
+    )
+    st.caption(f"Probabilidades ({ensemble['amostras']} cenários): " + " · ".join(
+        f"{level} {probability:.0%}" for level, probability in ensemble['probabilidades'].items()
+    ))
+
+    # Posição das condições atuais na climatologia do mês e da hora do dia
+    # (com dados simulados, identificada como sintética; com dados reais, depois
+    # que a climatologia observada tiver observações suficientes para a hora)
+    climatology = climatology_for(st.session_state.use_simulated_data)
+    now = datetime.now()
+    if climatology is not None:
+        rain_rank = climatology.rank(LOCATION, 'chuva_24h', now, forecast_data.get('precipitacao_24h'))
+        tide_rank = climatology.rank(LOCATION, 'mare', now, tide_data.get('mare_atual', {}).get('altura'))
+        if rain_rank is not None and tide_rank is not None:
+            source = " da climatologia sintética" if climatology.synthetic else ""
+            st.caption(f"Para {now:%m}/{now:%H}h (mês/hora): chuva 24h no percentil {rain_rank:.0f}, "
+                       f"maré atual no percentil {tide_rank:.0f}{source}")
+            if climatology.is_above(LOCATION, 'chuva_24h', now, forecast_data.get('precipitacao_24h')):
+                st.warning("Chuva de 24h acima do percentil 95 para esta época do ano e hora do dia.")
+
+    # Chuva agregada por bairro a partir da grade de precipitação
+    grid = fetch_rain_grid(st.session_state.use_simulated_data)
+    if grid is not None:
+        with st.expander("Risco por bairro"):
+            index = get_district_index(grid['latitudes'], grid['longitudes'])
+            districts = assess_districts(index, grid, tide_data, weather_data)
+            st.table({
+                'Bairro': [d['bairro'] for d in districts],
+                'Chuva 24h (mm)': [d['precipitacao_24h'] for d in districts],
+                'Próximas 24h (mm)': [d['precipitacao_proximas_24h'] for d in districts],
+                'Nível': [d['nivel'] for d in districts],
+            })
+            if st.session_state.use_simulated_data:
+                st.caption("Grade de exemplo e contornos de bairros aproximados.")
+
+    # Intervalos do horizonte em que a chuva acumulada e a maré passam juntas dos limiares
+    with st.expander("Chuva forte com maré alta"):
+        windows = snapshot_coincidences(forecast_data, tide_data, top=COINCIDENCE_WINDOWS)
+        if windows:
+            st.table({
+                'Início': [f"{w['inicio']:%d/%m %H:%M}" for w in windows],
+                'Duração (h)': [w['duracao_h'] for w in windows],
+                'Em (h)': [w['antecedencia_h'] for w in windows],
+                'Chuva 24h (mm)': [w['chuva_max_mm'] for w in windows],
+                'Maré (m)': [w['mare_max_m'] for w in windows],
+                'Severidade': [w['severidade'] for w in windows],
+            })
+        else:
+            st.caption("Nenhuma coincidência de chuva forte e maré alta nas últimas e próximas horas.")
     
     # Botão de Alerta
     if risk_level == RiskAssessor.RISK_HIGH:
         if st.button("Enviar Alerta por E-mail", type="primary"):
-            email_manager = EmailManager() # Recarrega config do state
-            success, message = email_manager.send_alert(
-                weather_data, forecast_data, tide_data, risk_level, risk_description
-            )
+            view = get_view_model(weather_data, forecast_data, tide_data)
+            with st.spinner("Enviando alerta por e-mail..."):
+                # Mesma imagem da aba "Imagem" (já pronta na maioria das vezes)
+                chart_png = get_chart_renderer().wait('mare_precipitacao', forecast_data, tide_data,
+                                                      timeout=CHART_WAIT_SECONDS, now=view['agora'])
+                success, message = send_alert_email(
+                    weather_data, forecast_data, tide_data, risk_level, risk_description,
+                    chart_png=chart_png, view=view, config=EmailManager().config
+                )
             if success:
                 st.success(message)
             else:
                 st.error(message)
 
-    st.markdown("---")
+        try:
+            notifier = get_webhook_notifier()
+        except WebhookConfigError as e:
+            st.warning(f"Webhooks desativados: {e}")
+            notifier = None
+        if notifier and notifier.endpoints and st.button("Enviar Alerta por Webhook"):
+            payload = build_alert_payload(weather_data, forecast_data, tide_data, risk_level, risk_description)
+            with st.spinner("Enviando alerta aos webhooks..."):
+                results = notifier.send(payload, wait_timeout=WEBHOOK_WAIT_SECONDS)
+            for name, result in results.items():
+                if result['ok']:
+                    st.success(f"{name}: alerta entregue")
+                elif result['erro'] == "pendente":
+                    st.warning(f"{name}: entrega ainda em andamento")
+                else:
+                    st.error(f"{name}: {result['erro']}")
+
+@st.fragment(run_every=AUTO_REFRESH_SECONDS)
+def render_charts():
+    """Seção de gráficos; trocar de período ou ampliar reexecuta apenas esta seção"""
+    data = load_dashboard_data()
+    if data is None:
+        return
+    weather_data, forecast_data, tide_data = data[:3]
+    view = get_view_model(weather_data, forecast_data, tide_data)
 
-    # --- Gráficos ---
     st.subheader("📊 Gráficos")
     
-    with st.spinner("Gerando gráficos..."):
-        # (Implementar função para criar e exibir gráficos com matplotlib ou plotly)
-        # Placeholder:
-        st.write("Gráficos serão exibidos aqui.")
-        # Exemplo com Matplotlib (requer implementação da função create_graphs)
-        # fig = create_graphs(forecast_data, tide_data)
-        # st.pyplot(fig)
-
-else:
-    st.warning("Não foi possível carregar os dados. Verifique as configurações ou tente novamente mais tarde.")
+    tab_short, tab_long, tab_image = st.tabs(["Últimas e próximas 24h", "Histórico longo", "Imagem"])
+
+    with tab_short:
+        with st.spinner("Gerando gráficos..."):
+            fig = create_plotly_graphs(forecast_data, tide_data, view)
+            st.plotly_chart(fig)
+            st.caption(f"Dados do gráfico: {figure_json_bytes(fig) / 1024:.1f} KB por atualização")
+
+    with tab_long:
+        history_days = st.selectbox(
+            "Período",
+            [7, 30, 90, 365],
+            index=1,
+            format_func=lambda days: f"{days} dias",
+            # Um zoom do período anterior não vale para o novo
+            on_change=reset_long_range_zoom
+        )
+        history = fetch_history(history_days, st.session_state.use_simulated_data)
+        if history is None:
+            st.info("Histórico longo disponível apenas com dados simulados.")
+        else:
+            with st.spinner("Gerando gráficos..."):
+                render_long_range_chart(*history, width_px=HISTORY_CHART_WIDTH)
+
+    with tab_image:
+        # Renderizado em outro processo: o restante da página já foi enviado e a
+        # imagem anterior fica visível até a nova ficar pronta
+        renderer = get_chart_renderer()
+        renderer.request('mare_precipitacao', forecast_data, tide_data, fmt='svg', now=view['agora'])
+        placeholder = st.empty()
+        image, ready = renderer.request('mare_precipitacao', forecast_data, tide_data, now=view['agora'])
+        if not ready:
+            with placeholder.container():
+                if image is not None:
+                    st.image(image)
+                st.caption("Atualizando gráfico...")
+            image = renderer.wait('mare_precipitacao', forecast_data, tide_data, timeout=CHART_WAIT_SECONDS,
+                                  now=view['agora'])
+        with placeholder.container():
+            if image is None:
+                st.caption("Gráfico indisponível no momento.")
+            else:
+                st.image(image)
+                svg = renderer.wait('mare_precipitacao', forecast_data, tide_data, fmt='svg',
+                                    timeout=CHART_WAIT_SECONDS, now=view['agora'])
+                col_png, col_svg = st.columns(2)
+                col_png.download_button("Baixar PNG", image, file_name="mare_precipitacao.png", mime="image/png")
+                if svg is not None:
+                    col_svg.download_button("Baixar SVG", svg, file_name="mare_precipitacao.svg",
+                                            mime="image/svg+xml")
+
+st.title("🌊 Monitor de Maré e Clima - Recife")
+
+# --- Barra Lateral (Sidebar) para Configurações ---
+with st.sidebar:
+    st.header("Configurações")
+    render_data_source_settings()
+
+    st.markdown("---")
+    st.header("Configurações de E-mail")
+    render_email_settings()
+
+# --- Exibição dos Dados (Layout Principal) ---
+# Cada seção é um fragmento: interações reexecutam apenas a própria seção
+
+render_current_conditions()
+st.markdown("---")
+render_risk_section()
+st.markdown("---")
+render_charts()
 
 # --- Rodapé ---
 st.markdown("---")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Verificação por linha de comando do Monitor de Maré e Clima - Recife
+
+Carrega os dados (reais, em cache ou simulados), avalia o risco com o
+RiskAssessor e imprime o resultado em JSON ou no formato de plugins do Nagios.
+O código de saída reflete o nível de risco, para uso em cron e sistemas de
+monitoramento. A verificação não importa Streamlit, matplotlib nem Plotly.
+
+O relatório diário envia por e-mail (configurações de email_config.json) o
+mesmo conteúdo do alerta, com o gráfico de maré e precipitação no corpo.
+
+Uso:
+    python recalert_cli.py check --fonte cache --formato nagios
+    python recalert_cli.py relatorio --fonte cache
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from ensemble import ensemble_risk
+from providers import LocalStoreProvider
+from quantile_sketch import DEFAULT_SYNTHETIC_CLIMATOLOGY_PATH, ClimatologyStore, record_observations
+from recalert_core import RiskAssessor, TideDataManager, WeatherDataManager
+from risk_rules import get_rules, snapshot_inputs
+
+# Códigos de saída no padrão dos plugins do Nagios
+EXIT_OK = 0
+EXIT_WARNING = 1
+EXIT_CRITICAL = 2
+EXIT_UNKNOWN = 3
+
+NAGIOS_STATUS = {EXIT_OK: "OK", EXIT_WARNING: "WARNING", EXIT_CRITICAL: "CRITICAL", EXIT_UNKNOWN: "UNKNOWN"}
+
+# Unidades das entradas das regras nos dados de desempenho (perfdata)
+PERFDATA_UNITS = {'precipitacao_24h': 'mm', 'precipitacao_proximas_24h': 'mm',
+                  'mare_atual': 'm', 'mare_maxima': 'm', 'pressao': 'hPa',
+                  'precipitacao_24h_percentil': '%', 'mare_atual_percentil': '%'}
+
+def load_data(source, seed=None):
+    """
+    Obtém os dados meteorológicos e de maré
+
+    Args:
+        source: 'real' (cadeia de provedores), 'cache' (último dado salvo e
+                tábua de marés) ou 'simulado'
+        seed: Semente dos dados simulados
+
+    Returns:
+        Tuple: (fonte, weather_data, forecast_data, tide_data)
+    """
+    if source == 'simulado':
+        weather = WeatherDataManager(use_simulated_data=True, seed=seed)
+        tide = TideDataManager(use_simulated_data=True, seed=seed)
+        return "Simulador", weather.get_current_weather(), weather.get_forecast(), tide.get_tide_data()
+
+    if source == 'cache':
+        store = LocalStoreProvider()
+        current, forecast = store.fetch()
+        # Maré da tábua binária local; sem ela, o mesmo caminho usado pela aplicação web
+        tide_data = TideDataManager().get_tide_data()
+        return store.name, current, forecast, tide_data
+
+    weather = WeatherDataManager()
+    current = weather.get_current_weather()
+    return weather.source, current, weather.get_forecast(), TideDataManager().get_tide_data()
+
+def exit_code_for(level):
+    """Código de saída do nível de risco: o menor nível é OK e os dois seguintes WARNING/CRITICAL"""
+    names = get_rules().level_names
+    if level not in names:
+        return EXIT_UNKNOWN
+    # level_names vai do nível mais alto para o mais baixo
+    return min(EXIT_CRITICAL, len(names) - 1 - names.index(level))
+
+def format_nagios(result):
+    """Linha única no formato de plugin do Nagios, com dados de desempenho"""
+    status = NAGIOS_STATUS[result['codigo_saida']]
+    if 'erro' in result:
+        return f"RECALERT {status} - {result['erro']}"
+    perfdata = " ".join(
+        f"{name}={value}{PERFDATA_UNITS.get(name, '')}"
+        for name, value in result['entradas'].items() if value is not None
+    )
+    return f"RECALERT {status} - Risco {result['nivel']}: {result['descricao']} | {perfdata}"
+
+def check(args):
+    """Executa a verificação e retorna (texto de saída, código de saída)"""
+    try:
+        source, weather_data, forecast_data, tide_data = load_data(args.fonte, args.semente)
+        # Climatologia apenas se já gravada: gerá-la aqui atrasaria a verificação.
+        # Dados simulados usam a sintética; dados reais recém-coletados também
+        # são incorporados à climatologia observada.
+        if args.fonte == 'simulado':
+            climatology = ClimatologyStore.load(DEFAULT_SYNTHETIC_CLIMATOLOGY_PATH)
+        elif args.fonte == 'real':
+            climatology = record_observations(weather_data, forecast_data, tide_data)
+        else:
+            climatology = ClimatologyStore.load()
+            if climatology is not None and climatology.synthetic:
+                climatology = None
+        level, description = RiskAssessor.assess_risk(weather_data, forecast_data, tide_data, climatology)
+        code = exit_code_for(level)
+        result = {
+            'nivel': level,
+            'descricao': description,
+            'fonte': source,
+            'verificado_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'entradas': snapshot_inputs(weather_data, forecast_data, tide_data, climatology),
+            'codigo_saida': code
+        }
+        if args.amostras:
+            ensemble = ensemble_risk(result['entradas'], samples=args.amostras, seed=args.semente)
+            result['probabilidades'] = {
+                level: round(float(p), 4) for level, p in ensemble['probabilidades'].items()
+            }
+    except Exception as e:
+        code = EXIT_UNKNOWN
+        result = {'erro': str(e) or type(e).__name__, 'codigo_saida': code}
+
+    if args.formato == 'nagios':
+        return format_nagios(result), code
+    return json.dumps(result, ensure_ascii=False), code
+
+def report(args):
+    """Monta e envia (ou grava em arquivo) o relatório diário; retorna (texto, código de saída)"""
+    # Importados aqui: a verificação não depende do matplotlib nem do Streamlit
+    from chart_renderer import render_chart
+    from email_manager import build_message, load_email_config, send_daily_report
+
+    try:
+        _, weather_data, forecast_data, tide_data = load_data(args.fonte, args.semente)
+        level, description = RiskAssessor.assess_risk(weather_data, forecast_data, tide_data)
+        chart_png = render_chart('mare_precipitacao', forecast_data, tide_data)
+        config = load_email_config(args.config)
+        if args.saida:
+            message = build_message(config, weather_data, forecast_data, tide_data, level, description,
+                                    chart_png, kind='relatorio')
+            with open(args.saida, 'wb') as f:
+                f.write(message.as_bytes())
+            return f"Relatório gravado em {args.saida}", EXIT_OK
+        success, message = send_daily_report(weather_data, forecast_data, tide_data, level, description,
+                                             chart_png, config=config)
+        return message, EXIT_OK if success else EXIT_UNKNOWN
+    except Exception as e:
+        return f"Erro ao gerar o relatório: {e}", EXIT_UNKNOWN
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="recalert", description="Monitor de Maré e Clima - Recife")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    check_parser = subparsers.add_parser("check", help="Avalia o risco atual e sai com o código do nível")
+    check_parser.add_argument("--fonte", choices=["real", "cache", "simulado"], default="cache",
+                              help="Origem dos dados (padrão: cache)")
+    check_parser.add_argument("--formato", choices=["json", "nagios"], default="json",
+                              help="Formato da saída (padrão: json)")
+    check_parser.add_argument("--semente", type=int, default=None, help="Semente dos dados simulados")
+    check_parser.add_argument("--amostras", type=int, default=0,
+                              help="Inclui a probabilidade de cada nível com N cenários perturbados")
+    report_parser = subparsers.add_parser("relatorio", help="Envia o relatório diário por e-mail")
+    report_parser.add_argument("--fonte", choices=["real", "cache", "simulado"], default="cache",
+                               help="Origem dos dados (padrão: cache)")
+    report_parser.add_argument("--semente", type=int, default=None, help="Semente dos dados simulados")
+    report_parser.add_argument("--config", default="email_config.json", help="Configurações de e-mail")
+    report_parser.add_argument("--saida", help="Grava a mensagem (.eml) em vez de enviá-la")
+    args = parser.parse_args(argv)
+
+    output, code = check(args) if args.comando == "check" else report(args)
+    print(output)
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Regras de risco declarativas para o Monitor de Maré e Clima - Recife
+
+Este módulo lê as regras de avaliação de risco de um arquivo JSON (limiares,
+pontos, fatores combinados e faixas de nível) e as compila uma única vez em um
+avaliador vetorizado com NumPy, capaz de pontuar tanto um único conjunto de
+dados quanto arrays grandes. O arquivo é recarregado automaticamente quando é
+alterado, sem reiniciar o servidor.
+
+Formato das condições: "min" significa valor >= limite e "max" significa
+valor < limite. Entradas ausentes (None/NaN) nunca satisfazem uma condição.
+Além das entradas absolutas, as regras podem usar 'precipitacao_24h_percentil'
+e 'mare_atual_percentil' (0 a 100, relativos à climatologia do mês e da hora),
+disponíveis quando a avaliação recebe uma climatologia, e
+'precipitacao_nowcast_3h', quando há previsão imediata.
+
+A seção opcional "incertezas" descreve o erro de cada entrada ("normal" com
+"desvio", "lognormal" com "sigma" ou "uniforme" com "amplitude"); entradas do
+mesmo "grupo" recebem o mesmo sorteio. Ela é usada pelo modo de conjunto.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Arquivo padrão das regras (pode ser alterado por variável de ambiente)
+DEFAULT_RULES_PATH = os.environ.get(
+    "RECALERT_RISK_RULES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "risk_rules.json")
+)
+
+# Intervalo mínimo entre verificações de alteração do arquivo (segundos)
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Parâmetro obrigatório de cada distribuição de erro da seção "incertezas"
+DISTRIBUTION_PARAMETERS = {'normal': 'desvio', 'lognormal': 'sigma', 'uniforme': 'amplitude'}
+
+class RiskRulesError(ValueError):
+    """Exceção levantada quando o arquivo de regras é inválido"""
+
+def snapshot_inputs(weather_data, forecast_data, tide_data, climatology=None, station="Recife", now=None,
+                    nowcast_mm=None):
+    """
+    Extrai as entradas das regras a partir dos dados da aplicação
+
+    Com uma climatologia (quantile_sketch.ClimatologyStore), inclui também o
+    posto percentual (0 a 100) da chuva de 24h e da maré atual em relação ao
+    mesmo mês e hora do dia, para regras relativas à época do ano.
+
+    Args:
+        weather_data: Dados meteorológicos atuais
+        forecast_data: Dados de previsão
+        tide_data: Dados de maré
+        climatology: Climatologia opcional
+        station: Estação da climatologia
+        now: Horário de referência da climatologia (padrão: agora)
+        nowcast_mm: Chuva prevista pela previsão imediata para as próximas 3h
+
+    Returns:
+        dict: Valores por nome de entrada (None quando indisponível)
+    """
+    inputs = {
+        'precipitacao_24h': forecast_data.get('precipitacao_24h', 0),
+        'precipitacao_proximas_24h': forecast_data.get('precipitacao_proximas_24h', 0),
+        'mare_atual': tide_data.get('mare_atual', {}).get('altura', 0),
+        'mare_maxima': tide_data.get('mare_maxima', {}).get('altura', 0),
+        'pressao': weather_data.get('pressao_hpa'),
+    }
+    if nowcast_mm is not None:
+        inputs['precipitacao_nowcast_3h'] = nowcast_mm
+    if climatology is not None:
+        now = now or datetime.now()
+        inputs['precipitacao_24h_percentil'] = climatology.rank(
+            station, 'chuva_24h', now, inputs['precipitacao_24h'])
+        inputs['mare_atual_percentil'] = climatology.rank(station, 'mare', now, inputs['mare_atual'])
+    return inputs
+
+def _condition_mask(condition, values):
+    """Máscara booleana de uma condição ('min' e/ou 'max') sobre um array"""
+    mask = ~np.isnan(values)
+    if condition.get('min') is not None:
+        mask &= values >= condition['min']
+    if condition.get('max') is not None:
+        mask &= values < condition['max']
+    return mask
+
+def format_factors(templates, inputs):
+    """
+    Monta os fatores descritivos com os valores das entradas
+
+    Args:
+        templates: Lista de (modelo, entrada); entrada None para modelos fixos
+        inputs: dict nome -> valor escalar
+
+    Returns:
+        list: Textos dos fatores
+    """
+    return [template.format(valor=inputs.get(name)) if name else template for template, name in templates]
+
+class CompiledRules:
+    """
+    Avaliador vetorizado gerado a partir da configuração de regras
+    """
+
+    def __init__(self, config):
+        try:
+            self.rules = [
+                {
+                    'entrada': rule['entrada'],
+                    'faixas': [dict(band, pontos=float(band['pontos'])) for band in rule['faixas']]
+                }
+                for rule in config.get('regras', [])
+            ]
+            self.combinations = [
+                {
+                    'condicoes': list(combo['condicoes']),
+                    'pontos': float(combo['pontos']),
+                    'fator': combo.get('fator')
+                }
+                for combo in config.get('combinacoes', [])
+            ]
+            # Níveis ordenados do maior limite para o menor; 'min' nulo é o nível padrão
+            levels = sorted(config['niveis'], key=lambda lv: -np.inf if lv.get('min') is None else lv['min'],
+                            reverse=True)
+            self.level_names = [lv['nivel'] for lv in levels]
+            self.level_cutoffs = np.array(
+                [-np.inf if lv.get('min') is None else lv['min'] for lv in levels], dtype=np.float64
+            )
+            # Distribuições de erro das entradas usadas pelo modo de conjunto (ensemble.py)
+            self.uncertainties = {
+                name: dict(spec) for name, spec in config.get('incertezas', {}).items()
+            }
+            for name, spec in self.uncertainties.items():
+                parameter = DISTRIBUTION_PARAMETERS.get(spec.get('distribuicao'))
+                if parameter is None:
+                    raise ValueError(f"distribuição desconhecida: {spec.get('distribuicao')}")
+                if parameter not in spec:
+                    raise ValueError(f"incerteza de {name} sem '{parameter}' ({spec['distribuicao']})")
+                spec[parameter] = float(spec[parameter])
+                if not spec[parameter] >= 0:
+                    raise ValueError(f"'{parameter}' negativo na incerteza de {name}")
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise RiskRulesError(f"Regras de risco inválidas: {e}") from e
+        if not self.level_names:
+            raise RiskRulesError("Regras de risco inválidas: nenhum nível definido")
+
+        self.inputs = sorted(
+            {rule['entrada'] for rule in self.rules}
+            | {cond['entrada'] for combo in self.combinations for cond in combo['condicoes']}
+        )
+
+        # Limites usados por cada entrada, em ordem crescente: valores entre dois
+        # limites vizinhos satisfazem exatamente as mesmas condições
+        conditions = [(rule['entrada'], band) for rule in self.rules for band in rule['faixas']]
+        conditions += [(cond['entrada'], cond) for combo in self.combinations for cond in combo['condicoes']]
+        try:
+            self.cut_points = {
+                name: np.array(sorted({
+                    float(condition[bound]) for entrada, condition in conditions if entrada == name
+                    for bound in ('min', 'max') if condition.get(bound) is not None
+                }), dtype=np.float64)
+                for name in self.inputs
+            }
+        except (TypeError, ValueError) as e:
+            raise RiskRulesError(f"Regras de risco inválidas: {e}") from e
+
+        # Versão das regras: hash do conteúdo (igual em todos os processos e
+        # reinícios, diferente sempre que algum limite ou peso muda)
+        self.version = hashlib.sha1(
+            json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:16]
+
+    def bin_of(self, name, value):
+        """
+        Intervalo entre limites em que o valor de uma entrada cai
+
+        Os intervalos são fechados à esquerda, como as condições "min"/"max".
+
+        Returns:
+            int: Número de limites menores ou iguais ao valor (None se ausente)
+        """
+        if value is None or np.isnan(value):
+            return None
+        return int(np.searchsorted(self.cut_points.get(name, ()), value, side='right'))
+
+    def _as_arrays(self, inputs):
+        arrays = {}
+        for name in self.inputs:
+            value = inputs.get(name)
+            arrays[name] = np.asarray(np.nan if value is None else value, dtype=np.float64)
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values())) if arrays else ()
+        return {name: np.broadcast_to(a, shape) for name, a in arrays.items()}, shape
+
+    def evaluate(self, inputs, with_factors=False):
+        """
+        Pontua um ou vários conjuntos de entradas de uma vez
+
+        Args:
+            inputs: dict nome -> valor escalar ou array (arrays devem ser compatíveis)
+            with_factors: Se True, inclui as máscaras dos fatores descritivos
+
+        Returns:
+            dict: 'pontuacao' (array), 'nivel' (índices em level_names) e,
+                  opcionalmente, 'fatores' (lista de (modelo, entrada, máscara))
+        """
+        arrays, shape = self._as_arrays(inputs)
+        score = np.zeros(shape, dtype=np.float64)
+        factors = []
+
+        for rule in self.rules:
+            values = arrays[rule['entrada']]
+            # Faixas avaliadas em ordem: vale a primeira satisfeita (como um if/elif)
+            remaining = np.ones(shape, dtype=bool)
+            for band in rule['faixas']:
+                hit = remaining & _condition_mask(band, values)
+                score += np.where(hit, band['pontos'], 0.0)
+                remaining &= ~hit
+                if with_factors and band.get('fator'):
+                    factors.append((band['fator'], rule['entrada'], hit))
+
+        for combo in self.combinations:
+            hit = np.ones(shape, dtype=bool)
+            for condition in combo['condicoes']:
+                hit &= _condition_mask(condition, arrays[condition['entrada']])
+            score += np.where(hit, combo['pontos'], 0.0)
+            if with_factors and combo['fator']:
+                factors.append((combo['fator'], None, hit))
+
+        # Primeiro nível (do mais alto) cujo limite é atingido
+        level = np.argmax(score[..., None] >= self.level_cutoffs, axis=-1)
+        result = {'pontuacao': score, 'nivel': level}
+        if with_factors:
+            result['fatores'] = factors
+        return result
+
+    def level_names_for(self, level_index):
+        """Converte índices de nível em nomes (array de strings)"""
+        return np.asarray(self.level_names, dtype=object)[level_index]
+
+    def assess(self, inputs):
+        """
+        Avalia um único conjunto de entradas
+
+        Args:
+            inputs: dict nome -> valor escalar
+
+        Returns:
+            Tuple: (nivel, lista de fatores descritivos, pontuação)
+        """
+        result = self.evaluate(inputs, with_factors=True)
+        templates = [(template, name) for template, name, mask in result['fatores'] if bool(mask)]
+        return self.level_names[int(result['nivel'])], format_factors(templates, inputs), float(result['pontuacao'])
+
+class RuleSet:
+    """
+    Classe para carregar regras de um arquivo e recarregá-las quando ele mudar
+    """
+
+    def __init__(self, path: str = None, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.path = path or DEFAULT_RULES_PATH
+        self.check_interval = check_interval
+        self.last_error = None
+        self._compiled = None
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            try:
+                config = json.load(f)
+            except json.JSONDecodeError as e:
+                raise RiskRulesError(f"Regras de risco inválidas: {e}") from e
+        return CompiledRules(config)
+
+    def get(self):
+        """
+        Retorna as regras compiladas, recarregando o arquivo se ele mudou
+
+        Um arquivo inválido não derruba a avaliação: as últimas regras válidas
+        continuam em uso e o erro fica disponível em last_error.
+
+        Returns:
+            CompiledRules: Regras em vigor
+        """
+        now = time.monotonic()
+        if self._compiled is not None and now - self._last_check < self.check_interval:
+            return self._compiled
+        with self._lock:
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                if self._compiled is None:
+                    raise RiskRulesError(f"Arquivo de regras não encontrado: {self.path}") from e
+                return self._compiled
+            if mtime != self._mtime:
+                try:
+                    self._compiled = self._load()
+                    self.last_error = None
+                except RiskRulesError as e:
+                    if self._compiled is None:
+                        raise
+                    self.last_error = str(e)
+                self._mtime = mtime
+        return self._compiled
+
+_default_rule_set = None
+
+def get_rules():
+    """Regras compiladas do arquivo padrão (um RuleSet por processo)"""
+    global _default_rule_set
+    if _default_rule_set is None:
+        _default_rule_set = RuleSet()
+    return _default_rule_set.get()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Reavaliação incremental de risco para o Monitor de Maré e Clima - Recife
+
+Este módulo guarda, por localidade, uma impressão digital das entradas das
+regras de risco quantizadas (acumulados de chuva, níveis de maré e pressão) e
+só reavalia o risco quando ela muda. Mudanças de nível geram eventos que os
+alertas e a interface podem assinar.
+
+As entradas são quantizadas pelos próprios limites das regras em vigor: o
+valor de cada entrada é trocado pelo intervalo entre limites vizinhos em que
+ele cai (intervalos fechados à esquerda, como as condições "min"/"max").
+Valores dentro do mesmo intervalo sempre produzem o mesmo nível e a mesma
+pontuação, também depois de uma recarga das regras com limites novos. Os
+fatores descritivos são remontados com os valores atuais a cada consulta.
+"""
+
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from risk_rules import format_factors, get_rules
+
+class RiskTracker:
+    """
+    Classe para avaliar o risco de várias localidades apenas quando as entradas mudam
+    """
+
+    def __init__(self):
+        self.evaluations = 0
+        self._states = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """
+        Registra uma função chamada a cada mudança de nível
+
+        O evento é um dict com 'local', 'nivel_anterior', 'nivel', 'fatores',
+        'pontuacao' e 'alterado_em'. A primeira avaliação de uma localidade
+        também gera evento (com 'nivel_anterior' None).
+
+        Returns:
+            Função sem argumentos que cancela a assinatura
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return lambda: self._unsubscribe(callback)
+
+    def _unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def fingerprint(self, inputs, rules=None):
+        """Impressão digital das entradas quantizadas (inclui a versão das regras)"""
+        rules = rules or get_rules()
+        return (rules.version,) + tuple(rules.bin_of(name, inputs.get(name)) for name in rules.inputs)
+
+    def state(self, location):
+        """Último resultado de uma localidade (ou None)"""
+        return self._states.get(location)
+
+    def export_states(self):
+        """Cópia dos estados de todas as localidades (para salvar em disco)"""
+        with self._lock:
+            return dict(self._states)
+
+    def restore_states(self, states):
+        """
+        Restaura estados salvos das localidades ainda não avaliadas
+
+        A impressão digital inclui a versão (hash do conteúdo) das regras: com
+        as mesmas regras o estado restaurado continua valendo; se elas mudaram,
+        a primeira atualização reavalia e o nível restaurado evita que ela seja
+        anunciada como mudança.
+
+        Returns:
+            int: Número de localidades restauradas
+        """
+        with self._lock:
+            missing = {location: state for location, state in states.items() if location not in self._states}
+            self._states.update(missing)
+        return len(missing)
+
+    def update(self, location, inputs):
+        """
+        Reavalia uma localidade se as entradas quantizadas mudaram
+
+        Args:
+            location: Identificador da localidade
+            inputs: Entradas das regras (ver risk_rules.snapshot_inputs)
+
+        Returns:
+            Tuple: (estado da localidade, True se houve reavaliação)
+        """
+        rules = get_rules()
+        fingerprint = self.fingerprint(inputs, rules)
+        previous = self._states.get(location)
+        if previous is not None and previous['impressao'] == fingerprint:
+            # Mesmo nível e mesmos fatores; só os valores exibidos nos fatores mudam
+            state = dict(previous, fatores=format_factors(previous['modelos_fatores'], inputs))
+            with self._lock:
+                self._states[location] = state
+            return state, False
+
+        result = rules.evaluate(inputs, with_factors=True)
+        templates = [(template, name) for template, name, mask in result['fatores'] if bool(mask)]
+        level = rules.level_names[int(result['nivel'])]
+        self.evaluations += 1
+        state = self._store(location, fingerprint, level, templates, inputs, float(result['pontuacao']), previous)
+        return state, True
+
+    def update_many(self, inputs_by_location):
+        """
+        Reavalia várias localidades de uma vez, apenas as que mudaram
+
+        As localidades alteradas são pontuadas juntas pelo avaliador
+        vetorizado; os fatores descritivos só são montados para elas.
+
+        Args:
+            inputs_by_location: dict localidade -> entradas das regras
+
+        Returns:
+            list: Localidades reavaliadas
+        """
+        rules = get_rules()
+        changed = []
+        for location, inputs in inputs_by_location.items():
+            fingerprint = self.fingerprint(inputs, rules)
+            previous = self._states.get(location)
+            if previous is None or previous['impressao'] != fingerprint:
+                changed.append((location, fingerprint, previous))
+            else:
+                refreshed = dict(previous, fatores=format_factors(previous['modelos_fatores'], inputs))
+                with self._lock:
+                    self._states[location] = refreshed
+        if not changed:
+            return []
+
+        arrays = {
+            name: np.array([
+                np.nan if inputs_by_location[loc].get(name) is None else inputs_by_location[loc][name]
+                for loc, _, _ in changed
+            ], dtype=np.float64)
+            for name in rules.inputs
+        }
+        result = rules.evaluate(arrays, with_factors=True)
+        self.evaluations += len(changed)
+        for i, (location, fingerprint, previous) in enumerate(changed):
+            templates = [(template, name) for template, name, mask in result['fatores'] if mask[i]]
+            level = rules.level_names[int(result['nivel'][i])]
+            self._store(location, fingerprint, level, templates, inputs_by_location[location],
+                        float(result['pontuacao'][i]), previous)
+        return [location for location, _, _ in changed]
+
+    def _store(self, location, fingerprint, level, templates, inputs, score, previous):
+        now = datetime.now()
+        level_changed = previous is None or previous['nivel'] != level
+        factors = format_factors(templates, inputs)
+        state = {
+            'impressao': fingerprint,
+            'nivel': level,
+            'fatores': factors,
+            'modelos_fatores': templates,
+            'pontuacao': score,
+            'avaliado_em': now,
+            'nivel_anterior': previous['nivel'] if level_changed and previous else
+                              (previous or {}).get('nivel_anterior'),
+            'alterado_em': now if level_changed else previous['alterado_em'],
+        }
+        with self._lock:
+            self._states[location] = state
+            subscribers = list(self._subscribers)
+        if level_changed:
+            event = {
+                'local': location,
+                'nivel_anterior': previous['nivel'] if previous else None,
+                'nivel': level,
+                'fatores': factors,
+                'pontuacao': score,
+                'alterado_em': now,
+            }
+            for callback in subscribers:
+                callback(event)
+        return state
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gerador de cenários sintéticos para o Monitor de Maré e Clima - Recife
+
+Este módulo gera séries horárias correlacionadas de chuva, pressão e maré para
+várias estações ao longo de meses ou anos, com tempestades e marés de sizígia
+(king tides) injetadas. Toda a geração é vetorizada com NumPy e determinística:
+a mesma semente produz arrays idênticos byte a byte.
+"""
+
+import hashlib
+from datetime import datetime
+
+import numpy as np
+
+# Constituintes harmônicas aproximadas para o Porto do Recife: (período em horas, amplitude em m)
+TIDE_CONSTITUENTS = (
+    (12.4206012, 0.78),  # M2 - lunar principal semidiurna
+    (12.0000000, 0.27),  # S2 - solar principal semidiurna
+    (12.6583482, 0.15),  # N2 - lunar elíptica
+    (23.9344696, 0.05),  # K1 - luni-solar diurna
+    (25.8193417, 0.05),  # O1 - lunar principal diurna
+)
+MEAN_SEA_LEVEL = 1.30  # Nível médio em relação ao zero da tábua (m)
+
+# Multiplicador mensal de chuva (estação chuvosa de abril a julho)
+MONTHLY_RAIN_FACTOR = np.array(
+    [0.5, 0.7, 1.0, 1.6, 1.9, 2.0, 1.8, 1.1, 0.6, 0.4, 0.4, 0.5], dtype=np.float64
+)
+
+SPRING_NEAP_HOURS = 354.367  # Ciclo de sizígia/quadratura (~14,77 dias)
+ANOMALISTIC_MONTH_HOURS = 661.31  # Ciclo perigeu/apogeu (~27,55 dias)
+
+
+def _ar1(noise, phi):
+    """
+    Aplica um filtro AR(1) ao longo do último eixo via convolução por FFT
+
+    Args:
+        noise: Array de ruído branco (estações x horas)
+        phi: Coeficiente de autocorrelação (0 <= phi < 1)
+
+    Returns:
+        np.ndarray: Série AR(1) com variância unitária
+    """
+    n = noise.shape[-1]
+    length = min(n, int(np.ceil(np.log(1e-4) / np.log(phi))) + 1)
+    kernel = phi ** np.arange(length)
+    size = 1 << int(np.ceil(np.log2(n + length)))
+    out = np.fft.irfft(np.fft.rfft(noise, size) * np.fft.rfft(kernel, size), size)[..., :n]
+    return out / np.sqrt(np.sum(kernel ** 2))
+
+
+def _convolve_impulses(impulses, kernel):
+    """Convolui trens de impulsos (estações x horas) com um envelope fixo"""
+    n = impulses.shape[-1]
+    size = 1 << int(np.ceil(np.log2(n + kernel.size)))
+    out = np.fft.irfft(np.fft.rfft(impulses, size) * np.fft.rfft(kernel, size), size)[..., :n]
+    # Remove resíduos numéricos da FFT para manter zeros exatos
+    out[np.abs(out) < 1e-9] = 0.0
+    return out
+
+
+def _storm_envelope(peak_hour, hours):
+    """Envelope assimétrico de tempestade com máximo igual a 1 em peak_hour"""
+    t = np.arange(hours, dtype=np.float64)
+    return (t / peak_hour) ** 2 * np.exp(2 * (1 - t / peak_hour))
+
+
+class ScenarioGenerator:
+    """
+    Classe para gerar cenários sintéticos de longa duração para várias estações
+    """
+
+    def __init__(self, seed: int = 0, n_stations: int = 1, start: datetime = None,
+                 hours: int = 24 * 30, storms_per_month: float = 1.5,
+                 king_tides_per_year: float = 4.0, spatial_correlation: float = 0.7):
+        self.seed = seed
+        self.n_stations = n_stations
+        self.start = start or datetime(2025, 1, 1)
+        self.hours = hours
+        self.storms_per_month = storms_per_month
+        self.king_tides_per_year = king_tides_per_year
+        self.spatial_correlation = spatial_correlation
+
+    def generate(self):
+        """
+        Gera o cenário completo
+
+        Returns:
+            dict: Séries horárias ('tempo', 'chuva', 'pressao', 'mare' com forma
+                  estações x horas) e listas de eventos injetados
+        """
+        # Um gerador independente por componente: alterar um não desloca os demais
+        seq = np.random.SeedSequence(self.seed)
+        rng_rain, rng_pressure, rng_storm, rng_tide = (np.random.default_rng(s) for s in seq.spawn(4))
+
+        shape = (self.n_stations, self.hours)
+        start = np.datetime64(self.start.replace(minute=0, second=0, microsecond=0), 'h')
+        times = start + np.arange(self.hours).astype('timedelta64[h]')
+        month = times.astype('datetime64[M]').astype(np.int64) % 12
+        hour_abs = (times - np.datetime64('2000-01-01T00', 'h')).astype(np.float64)
+
+        storm_signal, storm_depths, storms = self._storm_signal(rng_storm, month)
+
+        # Chuva de fundo: variável latente com correlação espacial e temporal
+        rho = self.spatial_correlation
+        regional = rng_rain.standard_normal((1, self.hours))
+        local = rng_rain.standard_normal(shape)
+        latent = _ar1(np.sqrt(rho) * regional + np.sqrt(1 - rho) * local, 0.85)
+        wet = latent > 0.9
+        intensity = np.exp(0.8 * latent) * 0.35 * MONTHLY_RAIN_FACTOR[month]
+        rain = np.where(wet, intensity, 0.0) + storm_signal
+        rain = np.round(rain, 1)
+
+        # Pressão: maré atmosférica semidiurna + variação sinótica - depressão das tempestades
+        synoptic = _ar1(rng_pressure.standard_normal(shape) * 0.3 + rng_pressure.standard_normal((1, self.hours)), 0.97)
+        atmospheric_tide = 1.2 * np.cos(2 * np.pi * (hour_abs - 10) / 12)
+        depression = _convolve_impulses(storm_depths, _storm_envelope(12, 72))
+        pressure = 1013.0 + atmospheric_tide + 2.5 * synoptic - depression
+
+        # Maré: harmônicas + modulação de perigeu + sobre-elevação (barômetro invertido) + king tides
+        phases = rng_tide.uniform(0, 2 * np.pi, len(TIDE_CONSTITUENTS))
+        perigee = 1 + 0.08 * np.cos(2 * np.pi * hour_abs / ANOMALISTIC_MONTH_HOURS)
+        astronomical = np.zeros(self.hours)
+        for (period, amplitude), phase in zip(TIDE_CONSTITUENTS, phases):
+            astronomical += amplitude * np.cos(2 * np.pi * hour_abs / period + phase)
+        king_tide, king_events = self._king_tides(rng_tide, hour_abs)
+        surge = 0.01 * (1013.0 - pressure) + 0.15 * np.minimum(storm_signal, 1.0)
+        tide = MEAN_SEA_LEVEL + astronomical * perigee * (1 + king_tide) + surge
+
+        return {
+            'tempo': times,
+            'chuva': rain.astype(np.float32),
+            'pressao': np.round(pressure, 1).astype(np.float32),
+            'mare': np.round(tide, 3).astype(np.float32),
+            'tempestades': storms,
+            'mares_sizigia': king_events,
+        }
+
+    def _storm_signal(self, rng, month):
+        """Sorteia tempestades regionais e retorna a chuva e os impulsos de depressão por estação"""
+        months = self.hours / (24 * 30.44)
+        n_storms = rng.poisson(self.storms_per_month * months)
+        # Tempestades mais prováveis na estação chuvosa
+        weights = MONTHLY_RAIN_FACTOR[month]
+        starts = np.sort(rng.choice(self.hours, size=n_storms, p=weights / weights.sum()))
+        peaks = rng.gamma(4.0, 4.0, n_storms)  # Intensidade máxima em mm/h
+        depths = rng.uniform(3.0, 12.0, n_storms)  # Queda de pressão em hPa
+        # Cada estação sente a tempestade com intensidade e atraso próprios
+        station_factor = rng.uniform(0.5, 1.3, (self.n_stations, n_storms))
+        lag = rng.integers(0, 3, (self.n_stations, n_storms))
+
+        impulses = np.zeros((self.n_stations, self.hours))
+        depth_impulses = np.zeros((self.n_stations, self.hours))
+        positions = np.minimum(starts[None, :] + lag, self.hours - 1)
+        rows = np.broadcast_to(np.arange(self.n_stations)[:, None], positions.shape)
+        np.add.at(impulses, (rows, positions), station_factor * peaks[None, :])
+        np.add.at(depth_impulses, (rows, positions), station_factor * depths[None, :])
+
+        signal = _convolve_impulses(impulses, _storm_envelope(4, 36))
+        events = [
+            {'inicio': int(s), 'pico_mm_h': round(float(p), 1), 'queda_hpa': round(float(d), 1)}
+            for s, p, d in zip(starts, peaks, depths)
+        ]
+        return signal, depth_impulses, events
+
+    def _king_tides(self, rng, hour_abs):
+        """Injeta marés de sizígia reforçadas próximas a luas nova/cheia"""
+        years = self.hours / 8766.0
+        n_events = rng.poisson(self.king_tides_per_year * years)
+        # Máximos de sizígia ocorrem a cada meio ciclo sinódico
+        first = SPRING_NEAP_HOURS - (hour_abs[0] % SPRING_NEAP_HOURS)
+        springs = np.arange(first, self.hours, SPRING_NEAP_HOURS).astype(np.int64)
+        boost = np.zeros(self.hours)
+        if n_events == 0 or springs.size == 0:
+            return boost, []
+        chosen = np.sort(rng.choice(springs, size=min(n_events, springs.size), replace=False))
+        strength = rng.uniform(0.15, 0.35, chosen.size)
+        impulses = np.zeros((1, self.hours))
+        impulses[0, chosen] = strength
+        # Envelope simétrico de ~3 dias centrado na sizígia
+        t = np.arange(-36, 37, dtype=np.float64)
+        boost = _convolve_impulses(impulses, np.exp(-0.5 * (t / 18) ** 2))[0]
+        boost = np.concatenate([boost[36:], np.zeros(36)])
+        events = [{'pico': int(c), 'reforco': round(float(s), 2)} for c, s in zip(chosen, strength)]
+        return boost, events
+
+
+def scenario_digest(scenario):
+    """
+    Calcula um hash SHA-256 dos arrays de um cenário
+
+    Args:
+        scenario: Dicionário retornado por ScenarioGenerator.generate()
+
+    Returns:
+        str: Hash hexadecimal; execuções com a mesma semente produzem o mesmo valor
+    """
+    digest = hashlib.sha256()
+    for key in ('tempo', 'chuva', 'pressao', 'mare'):
+        digest.update(np.ascontiguousarray(scenario[key]).tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,674 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Cache compartilhado entre processos para o Monitor de Maré e Clima - Recife
+
+O st.cache_data guarda os dados dentro de cada processo: atrás de um balanceador
+de carga, cada réplica do Streamlit busca e guarda a sua própria cópia. Este
+módulo oferece backends de cache intercambiáveis; o padrão usa um arquivo
+SQLite local, de forma que todas as réplicas do mesmo host leem o mesmo
+snapshot. Atualizações usam um lock single-flight (apenas um processo consulta
+os provedores por vez) e a invalidação vale para todas as réplicas.
+
+Cada entrada é medida (tamanho serializado) e o total respeita um orçamento
+de bytes, com remoção LRU ou LFU. Os backends contam acertos, falhas,
+remoções e bytes, por função e no total, para que a memória do cache possa
+ser limitada e ajustada em cada instalação.
+
+Os valores guardados precisam ser dados simples (ver plain_data): o arquivo
+é lido por todas as réplicas, e por isso nunca contém objetos serializados
+com pickle. Ele só é aberto se pertencer ao usuário do processo e não puder
+ser alterado por outros usuários.
+
+Invalidação em todas as réplicas pela linha de comando:
+    python shared_cache.py invalidar [prefixo]
+    python shared_cache.py estatisticas
+"""
+
+import argparse
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+
+from plain_data import UntrustedFileError, dumps, loads, trusted
+
+# Arquivo padrão do cache compartilhado (pode ser alterado por variável de ambiente)
+DEFAULT_CACHE_PATH = os.environ.get("RECALERT_CACHE_DB", "recalert_cache.db")
+
+# Backend padrão: 'sqlite' (compartilhado entre processos) ou 'memoria' (apenas o processo)
+DEFAULT_BACKEND = os.environ.get("RECALERT_CACHE_BACKEND", "sqlite")
+
+# Orçamento de bytes do cache e política de remoção ('lru' ou 'lfu')
+DEFAULT_MAX_BYTES = int(os.environ.get("RECALERT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+DEFAULT_POLICY = os.environ.get("RECALERT_CACHE_POLICY", "lru")
+
+EVICTION_POLICIES = ('lru', 'lfu')
+
+# Eventos contados pelos backends
+EVENTS = ('acertos', 'falhas', 'remocoes', 'expiradas')
+
+# Tempo máximo de posse do lock de atualização antes de ser considerado abandonado (segundos)
+LOCK_TIMEOUT = 60.0
+
+# Intervalo entre verificações enquanto outro processo atualiza (segundos)
+WAIT_POLL_INTERVAL = 0.05
+
+# Formato dos valores no arquivo SQLite (2: JSON de plain_data)
+FORMAT_VERSION = 2
+
+# Intervalo entre gravações dos acessos e contadores acumulados em memória (segundos)
+ACCESS_FLUSH_INTERVAL = float(os.environ.get("RECALERT_CACHE_FLUSH_INTERVAL", 5))
+
+def entry_size(value):
+    """Tamanho de um valor em cache: bytes da serialização em JSON"""
+    return len(dumps(value))
+
+def _group(key):
+    # As chaves do decorador shared_cache têm a forma "modulo.funcao:argumentos"
+    return key.partition(":")[0]
+
+class CacheBackend:
+    """
+    Interface dos backends de cache
+
+    Subclasses implementam get/set/invalidate, o par try_lock/unlock usado
+    pelo single-flight, _record (contadores) e stats.
+    """
+
+    def __init__(self, max_bytes: int = None, policy: str = None):
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self.policy = (policy or DEFAULT_POLICY).lower()
+        if self.policy not in EVICTION_POLICIES:
+            raise ValueError(f"Política de remoção desconhecida: {self.policy} "
+                             f"(use {' ou '.join(EVICTION_POLICIES)})")
+
+    def _select_victims(self, candidates, excess):
+        """
+        Escolhe as entradas removidas para liberar `excess` bytes
+
+        Args:
+            candidates: Lista de (chave, tamanho, último acesso, usos)
+            excess: Bytes a liberar
+
+        Returns:
+            list: Chaves removidas
+        """
+        if self.policy == 'lfu':
+            order = sorted(candidates, key=lambda c: (c[3], c[2]))
+        else:
+            order = sorted(candidates, key=lambda c: c[2])
+        victims = []
+        for key, size, _, _ in order:
+            if excess <= 0:
+                break
+            victims.append(key)
+            excess -= size
+        return victims
+
+    def _record(self, key, event, count=1):
+        """Soma count ao contador event da função dona da chave"""
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Contadores e uso de memória do cache
+
+        Returns:
+            dict: 'politica', 'limite_bytes', 'bytes', 'entradas', um total por
+                  evento de EVENTS, 'taxa_acertos' e 'por_funcao' (os mesmos
+                  contadores por função)
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _summarize(counters, sizes):
+        totals = {event: 0 for event in EVENTS}
+        per_group = defaultdict(lambda: dict({e: 0 for e in EVENTS}, bytes=0, entradas=0))
+        for (group, event), value in counters.items():
+            totals[event] += value
+            per_group[group][event] = value
+        for key, size in sizes:
+            per_group[_group(key)]['bytes'] += size
+            per_group[_group(key)]['entradas'] += 1
+        lookups = totals['acertos'] + totals['falhas']
+        totals['taxa_acertos'] = round(totals['acertos'] / lookups, 4) if lookups else None
+        totals['por_funcao'] = dict(per_group)
+        return totals
+
+    def get(self, key):
+        """Retorna o valor ainda válido ou None"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        """Guarda um valor por ttl segundos"""
+        raise NotImplementedError
+
+    def invalidate(self, prefix=""):
+        """Remove as entradas cujas chaves começam com prefix (todas, por padrão)"""
+        raise NotImplementedError
+
+    def export(self):
+        """
+        Entradas ainda válidas, para salvar em disco (ver warm_start.py)
+
+        Returns:
+            list: (chave, valor, expiração em segundos desde a época)
+        """
+        raise NotImplementedError
+
+    def restore(self, entries, min_ttl=0):
+        """
+        Reinsere entradas exportadas que o cache ainda não tem
+
+        Args:
+            entries: Lista de (chave, valor, expiração), como em export()
+            min_ttl: Validade mínima dada às entradas (inclusive às já
+                     expiradas); entradas expiradas são ignoradas se 0
+
+        Returns:
+            int: Número de entradas reinseridas
+        """
+        now = time.time()
+        restored = 0
+        for key, value, expires in entries:
+            ttl = max(expires - now, min_ttl)
+            if ttl <= 0 or self.get(key) is not None:
+                continue
+            self.set(key, value, ttl)
+            restored += 1
+        return restored
+
+    def try_lock(self, key, owner, timeout):
+        """Tenta obter o lock de atualização da chave; True se obtido"""
+        raise NotImplementedError
+
+    def unlock(self, key, owner):
+        """Libera o lock de atualização, se ainda pertencer a owner"""
+        raise NotImplementedError
+
+    def get_or_compute(self, key, ttl, compute, lock_timeout=LOCK_TIMEOUT):
+        """
+        Retorna o valor em cache ou o calcula com single-flight
+
+        Se outro processo já está calculando a mesma chave, espera pelo
+        resultado dele em vez de consultar os provedores novamente. Se o lock
+        for abandonado (processo encerrado), outro processo assume a atualização.
+
+        Args:
+            key: Chave da entrada
+            ttl: Validade em segundos
+            compute: Função sem argumentos que produz o valor
+            lock_timeout: Tempo máximo de posse do lock
+
+        Returns:
+            Valor em cache ou recém-calculado
+        """
+        owner = uuid.uuid4().hex
+        while True:
+            value = self.get(key)
+            if value is not None:
+                self._record(key, 'acertos')
+                return value
+            if self.try_lock(key, owner, lock_timeout):
+                try:
+                    # Outro processo pode ter concluído entre o get e o lock
+                    value = self.get(key)
+                    if value is None:
+                        self._record(key, 'falhas')
+                        value = compute()
+                        self.set(key, value, ttl)
+                    else:
+                        self._record(key, 'acertos')
+                    return value
+                finally:
+                    self.unlock(key, owner)
+            time.sleep(WAIT_POLL_INTERVAL)
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Backend restrito ao processo atual (equivalente ao st.cache_data)
+    """
+
+    def __init__(self, max_bytes: int = None, policy: str = None):
+        super().__init__(max_bytes, policy)
+        # chave -> [valor, expiração, tamanho, último acesso, usos]
+        self._entries = {}
+        self._bytes = 0
+        self._counters = defaultdict(int)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            entry[3] = time.time()
+            entry[4] += 1
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        size = entry_size(value)
+        now = time.time()
+        with self._lock:
+            self._remove(key)
+            expired = [k for k, entry in self._entries.items() if entry[1] <= now]
+            for k in expired:
+                self._remove(k)
+                self._counters[(_group(k), 'expiradas')] += 1
+            if size > self.max_bytes:
+                # Maior que o orçamento inteiro: não é guardado
+                self._counters[(_group(key), 'remocoes')] += 1
+                return
+            self._entries[key] = [value, now + ttl, size, now, 0]
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                candidates = [(k, e[2], e[3], e[4]) for k, e in self._entries.items() if k != key]
+                for victim in self._select_victims(candidates, self._bytes - self.max_bytes):
+                    self._remove(victim)
+                    self._counters[(_group(victim), 'remocoes')] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def invalidate(self, prefix=""):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def export(self):
+        now = time.time()
+        with self._lock:
+            return [(key, entry[0], entry[1]) for key, entry in self._entries.items() if entry[1] > now]
+
+    def _record(self, key, event, count=1):
+        with self._lock:
+            self._counters[(_group(key), event)] += count
+
+    def stats(self):
+        with self._lock:
+            result = self._summarize(self._counters, [(k, e[2]) for k, e in self._entries.items()])
+            result.update(politica=self.policy, limite_bytes=self.max_bytes,
+                          bytes=self._bytes, entradas=len(self._entries))
+        return result
+
+    def try_lock(self, key, owner, timeout):
+        now = time.time()
+        with self._lock:
+            holder = self._locks.get(key)
+            if holder is not None and holder[1] > now:
+                return False
+            self._locks[key] = (owner, now + timeout)
+            return True
+
+    def unlock(self, key, owner):
+        with self._lock:
+            if self._locks.get(key, (None,))[0] == owner:
+                del self._locks[key]
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Backend compartilhado por todos os processos do host através de um arquivo SQLite
+
+    Os valores são serializados em JSON (plain_data). Cada processo mantém uma cópia já
+    desserializada da última versão lida de cada chave, de modo que leituras
+    repetidas custam apenas uma consulta pela versão; essas cópias também
+    respeitam o orçamento de bytes (LRU). O orçamento, o último acesso, os
+    usos e os contadores ficam no arquivo e valem para todas as réplicas.
+
+    Leituras não escrevem no arquivo: o último acesso, os usos e os contadores
+    são acumulados em memória e gravados de uma vez a cada flush_interval
+    segundos, antes de cada gravação (que decide as remoções) e ao consultar
+    stats(). Um processo encerrado perde no máximo o último intervalo.
+    """
+
+    def __init__(self, db_path: str = None, max_bytes: int = None, policy: str = None,
+                 flush_interval: float = ACCESS_FLUSH_INTERVAL):
+        super().__init__(max_bytes, policy)
+        self.db_path = db_path or DEFAULT_CACHE_PATH
+        self.flush_interval = flush_interval
+        self._decoded = OrderedDict()
+        self._decoded_bytes = 0
+        self._decoded_lock = threading.Lock()
+        # chave -> [versão, último acesso, usos] e (função, evento) -> contagem, ainda não gravados
+        self._pending_access = {}
+        self._pending_counters = defaultdict(int)
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._ensure_schema()
+
+    def _connect(self):
+        # O arquivo é compartilhado: recusa um que outro usuário possa ter alterado
+        if os.path.exists(self.db_path) and not trusted(self.db_path):
+            raise UntrustedFileError(
+                f"Cache {self.db_path} pertence a outro usuário ou pode ser alterado por outros usuários"
+            )
+        # Conexão por operação: segura entre threads e processos
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # O conteúdo é descartável, dispensando fsync por escrita
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._connect()
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+            format_version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if columns and ("size" not in columns or format_version < FORMAT_VERSION):
+                # Arquivo de uma versão sem contabilidade de bytes ou com valores em
+                # pickle: o conteúdo é só cache e nunca é desserializado
+                conn.execute("DROP TABLE entries")
+            conn.execute(f"PRAGMA user_version = {FORMAT_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, expires REAL, version TEXT, "
+                "size INTEGER, last_access REAL, uses INTEGER)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT, expires REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "grp TEXT, event TEXT, value INTEGER, PRIMARY KEY (grp, event))"
+            )
+        finally:
+            conn.close()
+
+    def _keep_decoded(self, key, version, value, size):
+        with self._decoded_lock:
+            previous = self._decoded.pop(key, None)
+            if previous is not None:
+                self._decoded_bytes -= previous[2]
+            if size > self.max_bytes:
+                return
+            self._decoded[key] = (version, value, size)
+            self._decoded_bytes += size
+            while self._decoded_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._decoded.popitem(last=False)
+                self._decoded_bytes -= evicted_size
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version, expires, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            version, _, size = row
+            self._note_access(key, version, now)
+            with self._decoded_lock:
+                cached = self._decoded.get(key)
+                if cached is not None and cached[0] == version:
+                    self._decoded.move_to_end(key)
+                else:
+                    cached = None
+            if cached is None:
+                row = conn.execute(
+                    "SELECT value FROM entries WHERE key = ? AND version = ?", (key, version)
+                ).fetchone()
+        finally:
+            conn.close()
+        self._maybe_flush()
+        if cached is not None:
+            return cached[1]
+        if row is None:
+            return None
+        value = loads(row[0])
+        self._keep_decoded(key, version, value, size)
+        return value
+
+    def _note_access(self, key, version, now):
+        with self._pending_lock:
+            pending = self._pending_access.get(key)
+            if pending is not None and pending[0] == version:
+                pending[1] = now
+                pending[2] += 1
+            else:
+                self._pending_access[key] = [version, now, 1]
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _apply_pending(self, conn):
+        """Grava os acessos e contadores pendentes (dentro da transação de conn)"""
+        with self._pending_lock:
+            access, self._pending_access = self._pending_access, {}
+            counters, self._pending_counters = self._pending_counters, defaultdict(int)
+            self._last_flush = time.monotonic()
+        # Acessos a versões já substituídas são descartados pelo filtro de versão
+        conn.executemany(
+            "UPDATE entries SET last_access = MAX(last_access, ?), uses = uses + ? WHERE key = ? AND version = ?",
+            [(last_access, uses, key, version) for key, (version, last_access, uses) in access.items()]
+        )
+        for (group, event), count in counters.items():
+            self._increment_group(conn, group, event, count)
+
+    def flush(self):
+        """Grava no arquivo os acessos e contadores acumulados em memória"""
+        with self._pending_lock:
+            if not self._pending_access and not self._pending_counters:
+                self._last_flush = time.monotonic()
+                return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._apply_pending(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def set(self, key, value, ttl):
+        version = uuid.uuid4().hex
+        payload = dumps(value)
+        size = len(payload)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Acessos pendentes primeiro: as remoções LRU/LFU usam os dados atuais
+            self._apply_pending(conn)
+            expired = conn.execute(
+                "SELECT key FROM entries WHERE expires <= ? AND key != ?", (now, key)
+            ).fetchall()
+            conn.execute("DELETE FROM entries WHERE expires <= ? AND key != ?", (now, key))
+            for (expired_key,) in expired:
+                self._increment(conn, expired_key, 'expiradas')
+
+            if size > self.max_bytes:
+                # Maior que o orçamento inteiro: não é guardado
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._increment(conn, key, 'remocoes')
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, expires, version, size, last_access, uses) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, payload, now + ttl, version, size, now)
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_bytes:
+                    candidates = conn.execute(
+                        "SELECT key, size, last_access, uses FROM entries WHERE key != ?", (key,)
+                    ).fetchall()
+                    for victim in self._select_victims(candidates, total - self.max_bytes):
+                        conn.execute("DELETE FROM entries WHERE key = ?", (victim,))
+                        self._increment(conn, victim, 'remocoes')
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        self._keep_decoded(key, version, value, size)
+
+    def invalidate(self, prefix=""):
+        conn = self._connect()
+        try:
+            # Escapa os curingas do LIKE para tratar prefix literalmente
+            pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conn.execute("DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (pattern,))
+        finally:
+            conn.close()
+        with self._decoded_lock:
+            for key in [k for k in self._decoded if k.startswith(prefix)]:
+                self._decoded_bytes -= self._decoded.pop(key)[2]
+
+    def export(self):
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, value, expires FROM entries WHERE expires > ?", (time.time(),)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(key, loads(value), expires) for key, value, expires in rows]
+
+    @staticmethod
+    def _increment_group(conn, group, event, count=1):
+        conn.execute(
+            "INSERT INTO counters (grp, event, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (grp, event) DO UPDATE SET value = value + excluded.value",
+            (group, event, count)
+        )
+
+    @classmethod
+    def _increment(cls, conn, key, event, count=1):
+        cls._increment_group(conn, _group(key), event, count)
+
+    def _record(self, key, event, count=1):
+        with self._pending_lock:
+            self._pending_counters[(_group(key), event)] += count
+        self._maybe_flush()
+
+    def stats(self):
+        self.flush()
+        conn = self._connect()
+        try:
+            counters = {(grp, event): value for grp, event, value in conn.execute(
+                "SELECT grp, event, value FROM counters"
+            )}
+            sizes = conn.execute("SELECT key, size FROM entries").fetchall()
+        finally:
+            conn.close()
+        result = self._summarize(counters, sizes)
+        with self._decoded_lock:
+            decoded_bytes = self._decoded_bytes
+        result.update(politica=self.policy, limite_bytes=self.max_bytes,
+                      bytes=sum(size for _, size in sizes), entradas=len(sizes),
+                      bytes_processo=decoded_bytes)
+        return result
+
+    def try_lock(self, key, owner, timeout):
+        now = time.time()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE garante que apenas um processo obtenha o lock
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT owner, expires FROM locks WHERE key = ?", (key,)).fetchone()
+            acquired = row is None or row[1] <= now
+            if acquired:
+                conn.execute(
+                    "INSERT OR REPLACE INTO locks (key, owner, expires) VALUES (?, ?, ?)",
+                    (key, owner, now + timeout)
+                )
+            conn.execute("COMMIT")
+            return acquired
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def unlock(self, key, owner):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+        finally:
+            conn.close()
+
+_default_backend = None
+_default_backend_lock = threading.Lock()
+
+def get_cache_backend():
+    """Backend de cache padrão do processo (definido por RECALERT_CACHE_BACKEND)"""
+    global _default_backend
+    with _default_backend_lock:
+        if _default_backend is None:
+            _default_backend = MemoryCacheBackend() if DEFAULT_BACKEND == "memoria" else SQLiteCacheBackend()
+        return _default_backend
+
+def shared_cache(ttl, backend=None):
+    """
+    Decorador semelhante ao st.cache_data, mas usando um CacheBackend
+
+    A chave é formada pelo nome da função e pelos argumentos. Resultados None
+    também ficam em cache. A função decorada ganha um método clear(), que
+    invalida as suas entradas em todas as réplicas que usam o mesmo backend,
+    e um método stats(), com os contadores da função.
+
+    Args:
+        ttl: Validade das entradas em segundos
+        backend: CacheBackend ou função que o retorna (padrão: get_cache_backend)
+    """
+    def decorator(func):
+        prefix = f"{func.__module__}.{func.__qualname__}:"
+
+        def resolve():
+            if backend is None:
+                return get_cache_backend()
+            return backend() if callable(backend) else backend
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = prefix + repr((args, sorted(kwargs.items())))
+            # Embrulhado em uma tupla: None do backend significa "ausente"
+            return resolve().get_or_compute(key, ttl, lambda: (func(*args, **kwargs),))[0]
+
+        wrapper.clear = lambda: resolve().invalidate(prefix)
+        wrapper.stats = lambda: resolve().stats()['por_funcao'].get(prefix[:-1])
+        return wrapper
+
+    return decorator
+
+def invalidate(prefix=""):
+    """
+    Invalida as entradas do backend padrão em todas as réplicas que o usam
+
+    Args:
+        prefix: Prefixo das chaves ("modulo.funcao:" invalida uma função;
+                vazio invalida tudo)
+    """
+    get_cache_backend().invalidate(prefix)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Administra o cache compartilhado")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    invalidate_parser = subparsers.add_parser("invalidar", help="Invalida entradas em todas as réplicas")
+    invalidate_parser.add_argument("prefixo", nargs="?", default="",
+                                   help="Prefixo das chaves (ex.: __main__.fetch_weather_data:); vazio = tudo")
+    subparsers.add_parser("estatisticas", help="Mostra os contadores do cache")
+    args = parser.parse_args(argv)
+    if args.comando == "invalidar":
+        invalidate(args.prefixo)
+        print(f"Cache invalidado: {args.prefixo or 'todas as entradas'}")
+    else:
+        print(json.dumps(get_cache_backend().stats(), ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from accumulation import AccumulationIndex
+
+START = datetime(2026, 1, 1)
+
+def _index(hours=48, seed=0):
+    values = np.random.default_rng(seed).uniform(0, 3, size=(3, hours)).round(1)
+    return AccumulationIndex.from_series(START, values), values
+
+def test_windows_match_direct_sums():
+    index, values = _index()
+    now = START + timedelta(hours=30, minutes=20)
+    assert np.allclose(index.past(now, 6), values[:, 25:31].sum(axis=1))
+    assert np.allclose(index.future(now, 12), values[:, 31:43].sum(axis=1))
+
+def test_uncovered_windows_are_nan():
+    index, _ = _index()
+    now = START + timedelta(hours=30)
+    assert np.isnan(index.past(now, 72)).all()
+    assert np.isnan(index.future(now, 24)).all()
+    assert not np.isnan(index.future(now, 17)).any()
+
+def test_partial_sums_on_request():
+    index, values = _index()
+    now = START + timedelta(hours=30)
+    assert np.allclose(index.past(now, 72, partial=True), values[:, :31].sum(axis=1))
+
+def test_windows_report_none_for_incomplete():
+    index, _ = _index()
+    result = index.windows(START + timedelta(hours=24), location=1)
+    assert result['passado']['24h'] is not None
+    assert result['passado']['72h'] is None
+    assert result['passado']['7d'] is None
+    assert result['futuro']['24h'] is None
+    assert result['futuro']['12h'] is not None
+
+def test_summary_keeps_numeric_headline():
+    index, values = _index()
+    now = START + timedelta(hours=40)
+    summary = index.summary(now)
+    assert summary['acumulados']['futuro']['24h'] is None
+    assert math.isclose(summary['precipitacao_proximas_24h'], round(values[0, 41:].sum(), 1))
+
+def test_extend_and_update_from():
+    index, values = _index(hours=24)
+    more = np.ones((3, 24))
+    index.extend(more)
+    assert np.allclose(index.hourly(), np.concatenate([values, more], axis=1))
+    index.update_from(START + timedelta(hours=30), np.zeros((3, 18)))
+    assert np.allclose(index.hourly()[:, 30:], 0)
+    assert np.allclose(index.hourly()[:, :24], values)
+
+def test_from_hours_fills_gaps():
+    hours = [
+        {'hora': "2026-01-01 00:00", 'precipitacao': 1.0},
+        {'hora': "2026-01-01 02:00", 'precipitacao': 2.0},
+        {'hora': "inválida", 'precipitacao': 9.0},
+    ]
+    index = AccumulationIndex.from_hours(hours)
+    assert index.hourly().tolist() == [[1.0, 0.0, 2.0]]
+
+def test_trailing_sums():
+    index, values = _index()
+    sums = index.trailing_sums(3)
+    assert np.allclose(sums[:, 10], values[:, 8:11].sum(axis=1))
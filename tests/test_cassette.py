@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import lzma
+import os
+
+from cassette import Cassette
+
+def test_record_saves_in_batches_and_on_close(tmp_path):
+    path = str(tmp_path / "teste.cassete")
+    cassette = Cassette(path, 'gravar', save_every=3)
+    saves = []
+    original = cassette._save
+    cassette._save = lambda interactions: (saves.append(len(interactions)), original(interactions))
+
+    for i in range(4):
+        cassette.record("https://exemplo/api", {'q': i, 'key': 'segredo'}, status=200, body=f'{{"i": {i}}}')
+    assert saves == [3]
+    cassette.close()
+    cassette.close()
+    assert saves == [3, 4]
+
+    replay = Cassette(path)
+    assert replay.remaining() == 4
+    assert replay.play("https://exemplo/api", {'q': 2, 'key': 'outra'}) == '{"i": 2}'
+    with lzma.open(path, 'rt', encoding='utf-8') as f:
+        assert 'segredo' not in f.read()
+
+def test_recording_appends_to_existing_file(tmp_path):
+    path = str(tmp_path / "teste.cassete")
+    first = Cassette(path, 'gravar')
+    first.record("https://exemplo/api", {}, status=200, body='1')
+    first.close()
+    second = Cassette(path, 'gravar')
+    second.record("https://exemplo/api", {}, status=500, body='erro')
+    second.close()
+    assert os.path.exists(path)
+    assert Cassette(path).summary()['interacoes'] == 2
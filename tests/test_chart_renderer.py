@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+from chart_renderer import chart_key, render_chart
+from recalert_core import TideDataManager, WeatherDataManager
+
+def _snapshot():
+    forecast = WeatherDataManager(use_simulated_data=True, seed=1).get_forecast()
+    tide = TideDataManager(use_simulated_data=True, seed=1).get_tide_data()
+    return forecast, tide
+
+def test_chart_key_changes_with_minute():
+    forecast, tide = _snapshot()
+    same_minute = chart_key('mare_precipitacao', forecast, tide, now=datetime(2026, 1, 1, 10, 5, 1))
+    assert same_minute == chart_key('mare_precipitacao', forecast, tide, now=datetime(2026, 1, 1, 10, 5, 59))
+    assert same_minute != chart_key('mare_precipitacao', forecast, tide, now=datetime(2026, 1, 1, 10, 6))
+
+def test_chart_key_changes_with_data_and_format():
+    forecast, tide = _snapshot()
+    now = datetime(2026, 1, 1, 10, 5)
+    key = chart_key('mare_precipitacao', forecast, tide, now=now)
+    assert key != chart_key('mare_precipitacao', forecast, tide, fmt='svg', now=now)
+    changed = dict(forecast, precipitacao_24h=forecast['precipitacao_24h'] + 1)
+    assert key != chart_key('mare_precipitacao', changed, tide, now=now)
+
+def test_render_chart_png():
+    forecast, tide = _snapshot()
+    image = render_chart('mare_precipitacao', forecast, tide, now=datetime.now())
+    assert image.startswith(b'\x89PNG')
+
+def test_renderer_recovers_from_dead_worker():
+    from chart_renderer import ChartRenderer
+
+    forecast, tide = _snapshot()
+    renderer = ChartRenderer(max_workers=1)
+    try:
+        for process in list(renderer._executor._processes.values()):
+            process.kill()
+            process.join()
+        now = datetime(2026, 1, 1, 10, 5)
+        # O pool só percebe o processo morto na próxima tarefa
+        image = renderer.wait('mare_precipitacao', forecast, tide, timeout=60, now=now)
+        if image is None:
+            image = renderer.wait('mare_precipitacao', forecast, tide, timeout=60, now=now)
+        assert image.startswith(b'\x89PNG')
+        assert renderer.restarts == 1
+    finally:
+        renderer.close()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from coincidence import find_coincidences, rolling_sum
+
+def _brute_force_intervals(rain, tide, rain_threshold, tide_threshold, window):
+    """Intervalos (estação, início, fim) comparando passo a passo"""
+    intervals = []
+    for station in range(rain.shape[0]):
+        start = None
+        for step in range(rain.shape[1] + 1):
+            inside = False
+            if step < rain.shape[1]:
+                accumulated = rain[station, max(0, step - window + 1):step + 1].sum()
+                inside = accumulated >= rain_threshold and tide[station, step] >= tide_threshold
+            if inside and start is None:
+                start = step
+            elif not inside and start is not None:
+                intervals.append((station, start, step))
+                start = None
+    return sorted(intervals)
+
+def test_rolling_sum_matches_windows():
+    values = np.arange(10, dtype=np.float64)
+    np.testing.assert_allclose(rolling_sum(values, 3), [sum(values[max(0, i - 2):i + 1]) for i in range(10)])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_intervals_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    rain = rng.gamma(0.4, 4.0, size=(3, 200))
+    tide = 1.2 + np.sin(np.arange(200) / 2.0)[None, :] + rng.normal(0, 0.1, size=(3, 200))
+    tide[1, 50] = np.nan
+    times = np.arange('2026-01-01T00', 200, dtype='datetime64[h]')
+    windows = find_coincidences(times, rain, tide, rain_threshold=10.0, tide_threshold=1.8, rain_window=6)
+    found = sorted(
+        (w['estacao'], int((np.datetime64(w['inicio']) - times[0]) / np.timedelta64(1, 'h')),
+         int((np.datetime64(w['fim']) - times[0]) / np.timedelta64(1, 'h')))
+        for w in windows
+    )
+    assert found == _brute_force_intervals(rain, np.nan_to_num(tide, nan=-np.inf), 10.0, 1.8, 6)
+
+def test_edges_at_both_ends_and_ordering():
+    times = np.arange('2026-01-01T00', 6, dtype='datetime64[h]')
+    rain = np.array([30.0, 0, 0, 0, 0, 0])
+    tide = np.array([2.5, 2.5, 1.0, 2.1, 2.1, 2.1])
+    windows = find_coincidences(times, rain, tide, rain_threshold=20.0, tide_threshold=2.0, rain_window=24)
+    assert [(w['inicio'].hour, w['fim'].hour) for w in windows] == [(3, 6), (0, 2)]
+    assert windows[0]['duracao_h'] == 3.0
+
+def test_windows_ended_before_now_are_dropped():
+    times = np.arange('2026-01-01T00', 6, dtype='datetime64[h]')
+    rain = np.full(6, 30.0)
+    tide = np.array([2.5, 1.0, 1.0, 2.5, 2.5, 1.0])
+    windows = find_coincidences(times, rain, tide, 20.0, 2.0, rain_window=1, now=times[4])
+    assert len(windows) == 1
+    assert windows[0]['antecedencia_h'] == 0.0
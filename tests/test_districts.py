@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from districts import DistrictIndex, load_districts, load_precipitation_grid, points_in_polygon
+
+SQUARE = np.array([[0, 0], [4, 0], [4, 4], [0, 4]], dtype=np.float64)
+HOLE = np.array([[1, 1], [3, 1], [3, 3], [1, 3]], dtype=np.float64)
+
+def test_points_in_polygon_with_hole():
+    x = np.array([0.5, 2.0, 3.5, 5.0, 2.0])
+    y = np.array([0.5, 2.0, 3.5, 2.0, -1.0])
+    assert points_in_polygon(x, y, [SQUARE]).tolist() == [True, True, True, False, False]
+    assert points_in_polygon(x, y, [SQUARE, HOLE]).tolist() == [True, False, True, False, False]
+
+def _grid(n=8):
+    lat, lon = np.meshgrid(np.arange(n, dtype=np.float64), np.arange(n, dtype=np.float64), indexing='ij')
+    return lat.ravel(), lon.ravel()
+
+def test_csr_weights_and_aggregate():
+    latitudes, longitudes = _grid()
+    districts = [
+        {'nome': "A", 'aneis': [np.array([[-0.5, -0.5], [1.5, -0.5], [1.5, 1.5], [-0.5, 1.5]])]},
+        {'nome': "B", 'aneis': [np.array([[3.5, 3.5], [5.5, 3.5], [5.5, 4.5], [3.5, 4.5]])]},
+    ]
+    index = DistrictIndex(districts, latitudes, longitudes)
+    assert index.indptr.tolist() == [0, 4, 6]
+    for start, end in zip(index.indptr[:-1], index.indptr[1:]):
+        np.testing.assert_allclose(index.weights[start:end].sum(), 1.0, rtol=1e-6)
+    a_cells = {(latitudes[c], longitudes[c]) for c in index.cells[:4]}
+    assert a_cells == {(0, 0), (0, 1), (1, 0), (1, 1)}
+
+    values = np.zeros(latitudes.size)
+    values[index.cells[4:]] = 10.0
+    np.testing.assert_allclose(index.aggregate(values), [0.0, 10.0])
+    hourly = np.stack([values, 2 * values], axis=1)
+    np.testing.assert_allclose(index.aggregate(hourly), [[0, 0], [10, 20]])
+
+def test_tiny_district_uses_nearest_cell():
+    latitudes, longitudes = _grid(4)
+    tiny = [{'nome': "C", 'aneis': [np.array([[2.01, 1.0], [2.02, 1.0], [2.02, 1.01]])]}]
+    index = DistrictIndex(tiny, latitudes, longitudes)
+    assert index.cells.size == 1
+    assert (latitudes[index.cells[0]], longitudes[index.cells[0]]) == (1.0, 2.0)
+
+def test_fixture_grid_covers_every_district():
+    districts = load_districts()
+    grid = load_precipitation_grid()
+    index = DistrictIndex(districts, grid['latitudes'], grid['longitudes'])
+    assert np.all(np.diff(index.indptr) > 0)
+    assert index.aggregate(grid['precipitacao']).shape == (len(districts), grid['precipitacao'].shape[1])
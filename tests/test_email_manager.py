@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+from email_manager import build_message
+from recalert_core import TideDataManager, WeatherDataManager
+
+CONFIG = {'sender_email': "monitor@exemplo.org", 'recipient_email': "defesa@exemplo.org"}
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+def _snapshot():
+    weather = WeatherDataManager(use_simulated_data=True, seed=1)
+    tide = TideDataManager(use_simulated_data=True, seed=1).get_tide_data()
+    return weather.get_current_weather(), weather.get_forecast(), tide
+
+def test_alert_carries_inline_chart():
+    msg = build_message(CONFIG, *_snapshot(), "Alto", "Chuva forte", chart_png=PNG)
+    assert msg.get_content_subtype() == 'related'
+    html, image = msg.get_payload()
+    assert 'cid:grafico' in html.get_payload(decode=True).decode('utf-8')
+    assert image.get_content_type() == 'image/png'
+    assert image['Content-ID'] == '<grafico>'
+    assert image['Content-Disposition'].startswith('inline')
+    assert image.get_payload(decode=True) == PNG
+    assert "Alto" in msg['Subject']
+
+def test_message_without_chart_and_daily_report():
+    msg = build_message(CONFIG, *_snapshot(), "Baixo", "Sem fatores", kind='relatorio')
+    assert len(msg.get_payload()) == 1
+    body = msg.get_payload()[0].get_payload(decode=True).decode('utf-8')
+    assert 'cid:grafico' not in body
+    assert "Relatório Diário" in body
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import json
+import math
+
+import numpy as np
+import pytest
+
+from ensemble import ensemble_risk
+from risk_rules import CompiledRules, DEFAULT_RULES_PATH
+
+with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
+    RULES = CompiledRules(json.load(f))
+
+INPUTS = {
+    'precipitacao_24h': 25.0,
+    'precipitacao_proximas_24h': 12.0,
+    'mare_atual': 1.6,
+    'mare_maxima': 2.1,
+    'pressao': 1008.0,
+}
+
+# Uma única regra: chuva de 24h a partir de 30 mm leva ao nível Alto
+THRESHOLD_RULES = CompiledRules({
+    'regras': [{'entrada': 'precipitacao_24h', 'faixas': [{'min': 30, 'pontos': 5}]}],
+    'niveis': [{'nivel': "Alto", 'min': 5}, {'nivel': "Baixo", 'min': None}],
+    'incertezas': {'precipitacao_24h': {'distribuicao': 'lognormal', 'sigma': 0.1}},
+})
+
+def test_same_seed_same_result():
+    first = ensemble_risk(INPUTS, samples=2000, seed=7, rules=RULES)
+    second = ensemble_risk(INPUTS, samples=2000, seed=7, rules=RULES)
+    assert first['probabilidades'] == second['probabilidades']
+    assert first['pontuacao_p90'] == second['pontuacao_p90']
+    other = ensemble_risk(INPUTS, samples=2000, seed=8, rules=RULES)
+    assert other['pontuacao_media'] != first['pontuacao_media']
+
+def test_probabilities_sum_to_one():
+    result = ensemble_risk(INPUTS, samples=2000, seed=0, rules=RULES)
+    assert set(result['probabilidades']) == set(RULES.level_names)
+    assert sum(result['probabilidades'].values()) == pytest.approx(1.0)
+    # Várias localidades: uma probabilidade por posição, cada coluna somando 1
+    inputs = dict(INPUTS, precipitacao_24h=np.array([0.0, 25.0, 80.0]))
+    by_location = ensemble_risk(inputs, samples=2000, seed=0, rules=RULES)['probabilidades']
+    assert np.allclose(sum(by_location.values()), 1.0)
+    assert by_location['Alto'][0] <= by_location['Alto'][1] <= by_location['Alto'][2]
+
+def test_probability_shifts_across_cut_point():
+    rain = np.array([20.0, 25.0, 30.0, 36.0, 50.0])
+    result = ensemble_risk({'precipitacao_24h': rain}, samples=20000, seed=1, rules=THRESHOLD_RULES)
+    high = result['probabilidades']['Alto']
+    assert np.all(np.diff(high) > 0)
+    # P(chuva · e^(0,1 z) >= 30) = Φ(ln(chuva / 30) / 0,1)
+    expected = [0.5 * (1 + math.erf(math.log(value / 30) / 0.1 / math.sqrt(2))) for value in rain]
+    assert high == pytest.approx(expected, abs=0.02)
+    assert high[0] < 0.01 and high[-1] > 0.99
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from nowcast import nowcast, nowcast_summary, observed_series
+from providers import LocalStoreProvider
+from recalert_core import WeatherDataManager
+
+def test_persistence_for_constant_rain():
+    series = np.full((2, 12), 1.5)
+    assert np.allclose(nowcast(series, 3), 1.5)
+
+def test_forecast_is_never_negative():
+    series = np.array([[5.0, 4.0, 3.0, 2.0, 1.0, 0.5, 0.0, 0.0]])
+    assert (nowcast(series, 6) >= 0).all()
+
+def test_stations_are_independent():
+    series = np.stack([np.zeros(12), np.linspace(0, 3, 12)])
+    together = nowcast(series, 3)
+    assert np.allclose(together[0], nowcast(series[:1], 3)[0])
+    assert np.allclose(together[1], nowcast(series[1:], 3)[0])
+
+def test_observed_series_uses_only_finished_hours():
+    start = datetime(2026, 1, 1, 0, 0)
+    hours = [{'hora': f"{start + timedelta(hours=i):%Y-%m-%d %H:%M}", 'precipitacao': float(i)} for i in range(10)]
+    times, rain = observed_series(hours, start + timedelta(hours=5, minutes=30))
+    assert rain.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert times[-1] == np.datetime64('2026-01-01T04:00')
+    assert observed_series(hours, start + timedelta(minutes=90)) is None
+
+def test_summary_from_simulated_forecast():
+    forecast = WeatherDataManager(use_simulated_data=True, seed=3).get_forecast()
+    now = datetime.now()
+    times, rain = observed_series(forecast['horas'], now)
+    assert times[-1].astype(datetime) + timedelta(hours=1) <= now
+    summary = nowcast_summary(times, rain, horizon=3)
+    assert summary['chuva'].shape == (1, 3)
+    assert summary['tempo'][0] == times[-1] + np.timedelta64(60, 'm')
+
+def _hours(start, count):
+    return [{'hora': f"{start + timedelta(hours=i):%Y-%m-%d %H:%M}", 'precipitacao': 1.0} for i in range(count)]
+
+def test_stored_hours_span_midnight(tmp_path):
+    store = LocalStoreProvider(str(tmp_path / "ultimo_clima.json"))
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    store.save("WeatherAPI", {}, {'horas': _hours(midnight - timedelta(days=1), 48)})
+    today = _hours(midnight, 48)
+    store.save("WeatherAPI", {}, {'horas': today})
+    # Na segunda gravação, as horas de ontem passam a 'horas_anteriores'
+    earlier = store.earlier_hours(today)
+    assert earlier and earlier[-1]['hora'] == f"{midnight - timedelta(hours=1):%Y-%m-%d %H:%M}"
+    assert all(hour['hora'] < today[0]['hora'] for hour in earlier)
+    now = midnight + timedelta(hours=1, minutes=30)
+    assert observed_series(today, now) is None
+    times, rain = observed_series(earlier + today, now)
+    assert times[-1] == np.datetime64(midnight) and rain.size > 2
+
+def test_observed_series_uses_contiguous_hours():
+    start = datetime(2026, 1, 1, 0, 0)
+    hours = _hours(start, 3) + _hours(start + timedelta(hours=5), 4)
+    times, rain = observed_series(hours, start + timedelta(hours=9))
+    assert times[0] == np.datetime64('2026-01-01T05:00') and rain.size == 4
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+from providers import CircuitBreaker, ProviderChain, ProviderChainError, WeatherProvider
+from rate_limiter import RateLimitExceeded
+
+class FakeProvider(WeatherProvider):
+    """Provedor que executa uma sequência de resultados (exceções são levantadas)"""
+    remote = False
+
+    def __init__(self, name, outcomes, reset_timeout=60):
+        super().__init__()
+        self.name = name
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=reset_timeout)
+
+    def fetch(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else ({'fonte': self.name}, {})
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+class RemoteProvider(WeatherProvider):
+    """Provedor remoto que responde (ou falha) após `delay` segundos, liberado por `release`"""
+    remote = True
+
+    def __init__(self, name, delay, release, p95=None, error=None):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.release = release
+        self.error = error
+        self.started = None
+        for _ in range(5 if p95 is not None else 0):
+            self.breaker.record_success(p95)
+
+    def fetch(self):
+        self.started = time.monotonic()
+        self.release.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {'fonte': self.name}, {}
+
+def _open(breaker):
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    # Tempo de espera já decorrido
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+def test_breaker_opens_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    breaker.opened_at -= 61
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= 61
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_rate_limited_probe_does_not_stick_half_open():
+    provider = FakeProvider("A", [RateLimitExceeded("a", "cota diária")])
+    _open(provider.breaker)
+    chain = ProviderChain([provider, FakeProvider("B", [])])
+    name, _, _ = chain.fetch()
+    assert name == "B"
+    assert provider.breaker.state == CircuitBreaker.OPEN
+    # Timer reiniciado: espera o reset_timeout antes de tentar de novo
+    assert not provider.breaker.allow()
+    provider.breaker.opened_at -= provider.breaker.reset_timeout + 1
+    assert provider.breaker.allow()
+
+def test_unlaunched_half_open_candidate_is_released():
+    first = FakeProvider("A", [])
+    second = FakeProvider("B", [])
+    _open(second.breaker)
+    chain = ProviderChain([first, second])
+    assert chain.fetch()[0] == "A"
+    assert second.calls == 0
+    assert second.breaker.state == CircuitBreaker.OPEN
+    assert second.breaker.allow()
+
+def test_chain_falls_back_and_reports_errors():
+    first = FakeProvider("A", [ValueError("fora do ar")])
+    second = FakeProvider("B", [ValueError("fora do ar")])
+    chain = ProviderChain([first, second])
+    with pytest.raises(ProviderChainError) as error:
+        chain.fetch()
+    assert [name for name, _ in error.value.errors] == ["A", "B"]
+    assert first.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(ProviderChainError, match="disjuntor aberto"):
+        chain.fetch()
+
+def test_backup_answers_before_slow_primary():
+    release = threading.Event()
+    primary = RemoteProvider("A", 5.0, release, p95=0.2)
+    backup = RemoteProvider("B", 0.0, release)
+    chain = ProviderChain([primary, backup])
+    try:
+        start = time.monotonic()
+        assert chain.fetch()[0] == "B"
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+    # O reserva parte após o p95 do primário e responde muito antes da latência dele
+    assert 0.15 < backup.started - start < 1.0
+    assert elapsed < 1.0
+
+def test_hedge_deadline_is_not_restarted_by_a_failure():
+    release = threading.Event()
+    primary = RemoteProvider("A", 5.0, release, p95=0.5)
+    failing = RemoteProvider("B", 0.4, threading.Event(), error=ValueError("fora do ar"))
+    third = RemoteProvider("C", 0.0, release)
+    chain = ProviderChain([primary, failing, third])
+    try:
+        start = time.monotonic()
+        assert chain.fetch()[0] == "C"
+    finally:
+        release.set()
+    # Hedges a cada p95 desde a partida anterior (0,5 s e 1,0 s), e não p95 após a falha de B (1,4 s)
+    assert 0.9 < third.started - start < 1.25
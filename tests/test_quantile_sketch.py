@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import numpy as np
+
+from quantile_sketch import ClimatologyStore, KLLSketch, record_observations
+
+def test_kll_quantiles_within_rank_error():
+    values = np.random.default_rng(0).gamma(2.0, 3.0, size=100_000)
+    sketch = KLLSketch(k=200, seed=1)
+    sketch.update_many(values)
+    assert sketch.size < 2000
+    assert sketch.count == values.size
+    for q in (0.1, 0.5, 0.9, 0.99):
+        estimate = sketch.quantile(q)
+        assert abs((values <= estimate).mean() - q) < 0.02
+
+def test_kll_rank_and_empty():
+    sketch = KLLSketch(seed=0)
+    assert sketch.quantile(0.5) is None
+    assert sketch.rank(1.0) is None
+    for value in range(1, 101):
+        sketch.update(value)
+    assert sketch.rank(50) == 0.5
+    assert sketch.rank(0) == 0.0
+
+def test_kll_merge_matches_single_stream():
+    rng = np.random.default_rng(2)
+    first, second = rng.normal(size=20_000), rng.normal(2, 1, size=20_000)
+    merged, other = KLLSketch(seed=1), KLLSketch(seed=2)
+    merged.update_many(first)
+    other.update_many(second)
+    merged.merge(other)
+    both = np.concatenate([first, second])
+    assert merged.count == both.size
+    assert abs((both <= merged.quantile(0.5)).mean() - 0.5) < 0.02
+
+def test_store_groups_by_month_and_hour(tmp_path):
+    times = np.array(['2025-01-01T03', '2025-01-02T03', '2025-07-01T03'], dtype='datetime64[h]')
+    store = ClimatologyStore(min_count=1)
+    store.observe("Recife", 'mare', times, [1.0, 2.0, 9.0])
+    january = datetime(2026, 1, 15, 3, 30)
+    assert store.rank("Recife", 'mare', january, 1.5) == 50.0
+    assert store.rank("Recife", 'mare', datetime(2026, 1, 15, 4), 1.5) is None
+    assert store.is_above("Recife", 'mare', january, 5.0)
+
+def test_synthetic_flag_is_persisted(tmp_path):
+    path = str(tmp_path / "climatologia.json")
+    store = ClimatologyStore(synthetic=True, min_count=1)
+    store.observe("Recife", 'mare', np.array(['2025-01-01T03'], dtype='datetime64[h]'), [1.0])
+    store.save(path)
+    loaded = ClimatologyStore.load(path)
+    loaded.min_count = 1
+    assert loaded.synthetic
+    assert loaded.rank("Recife", 'mare', datetime(2026, 1, 1, 3), 1.0) == 100.0
+    ClimatologyStore(synthetic=False).save(path)
+    assert not ClimatologyStore.load(path).synthetic
+
+def test_rank_waits_for_enough_observations():
+    store = ClimatologyStore(min_count=3)
+    when = datetime(2026, 1, 1, 3)
+    times = np.array(['2025-01-01T03', '2025-01-02T03'], dtype='datetime64[h]')
+    store.observe("Recife", 'mare', times, [1.0, 2.0])
+    assert store.rank("Recife", 'mare', when, 1.5) is None
+    store.observe("Recife", 'mare', times[:1], [3.0])
+    assert store.rank("Recife", 'mare', when, 1.5) is not None
+
+def _snapshot(rain, tide, fonte="Open-Meteo"):
+    return {'fonte': fonte}, {'precipitacao_24h': rain}, {'mare_atual': {'altura': tide}}
+
+def test_record_observations_once_per_hour(tmp_path):
+    path = str(tmp_path / "observada.json")
+    ClimatologyStore(synthetic=True).save(path)
+    record_observations(*_snapshot(5.0, 1.2), now=datetime(2026, 1, 1, 3, 10), path=path)
+    record_observations(*_snapshot(6.0, 1.3), now=datetime(2026, 1, 1, 3, 40), path=path)
+    store = record_observations(*_snapshot(7.0, 1.4), now=datetime(2026, 1, 1, 4, 5), path=path)
+    loaded = ClimatologyStore.load(path)
+    assert not loaded.synthetic
+    assert loaded.sketches[("Recife", 'chuva_24h', 1, 3)].count == 1
+    assert loaded.sketches[("Recife", 'mare', 1, 4)].count == 1
+    assert loaded.observed_until == store.observed_until
+
+def test_simulated_snapshots_are_not_observations(tmp_path):
+    path = str(tmp_path / "observada.json")
+    weather, forecast, tide = _snapshot(5.0, 1.2, fonte="Simulador")
+    tide['fonte'] = "Simulador"
+    store = record_observations(weather, forecast, tide, now=datetime(2026, 1, 1, 3), path=path)
+    assert not store.sketches
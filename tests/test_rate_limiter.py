@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import date
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, RateLimitExceeded
+from recalert_core import TideDataManager, WeatherDataManager
+
+BUDGETS = {'api': {'por_minuto': 6, 'rajada': 2, 'cota_diaria': 5}}
+
+class Clock:
+    """Relógio e calendário controlados pelo teste"""
+
+    def __init__(self, monkeypatch):
+        self.now = 1_000_000.0
+        self.today = date(2026, 1, 1)
+        clock = self
+
+        class FakeDate(date):
+            @classmethod
+            def today(cls):
+                return clock.today
+
+        monkeypatch.setattr(rate_limiter.time, 'time', lambda: self.now)
+        monkeypatch.setattr(rate_limiter, 'date', FakeDate)
+
+@pytest.fixture
+def limiter(tmp_path):
+    return RateLimiter(str(tmp_path / "limites.db"), BUDGETS)
+
+def test_tokens_refill_over_time(limiter, monkeypatch):
+    clock = Clock(monkeypatch)
+    assert limiter.acquire('api') and limiter.acquire('api')
+    assert not limiter.acquire('api')
+    # 6 por minuto: uma ficha a cada 10 s, até a capacidade de rajada
+    clock.now += 5
+    assert not limiter.acquire('api')
+    clock.now += 5
+    assert limiter.acquire('api')
+    clock.now += 600
+    assert limiter.usage('api')['disponiveis'] == 2
+    assert limiter.acquire('api', tokens=2)
+    assert limiter.acquire('desconhecido', tokens=100)
+
+def test_daily_quota_resets(limiter, monkeypatch):
+    clock = Clock(monkeypatch)
+    for _ in range(5):
+        clock.now += 60
+        limiter.require('api')
+    clock.now += 60
+    with pytest.raises(RateLimitExceeded, match="cota diária"):
+        limiter.require('api')
+    assert limiter.usage('api')['usadas_hoje'] == 5
+    clock.today = date(2026, 1, 2)
+    limiter.require('api')
+    assert limiter.usage('api')['usadas_hoje'] == 1
+
+def test_coalesce_runs_once_per_interval(limiter, monkeypatch):
+    clock = Clock(monkeypatch)
+    assert limiter.coalesce('forcar', 60)
+    assert not limiter.coalesce('forcar', 60)
+    assert limiter.coalesce('outra', 60)
+    clock.now += 59
+    assert not limiter.coalesce('forcar', 60)
+    clock.now += 1
+    assert limiter.coalesce('forcar', 60)
+
+def test_simulated_data_creates_no_limiter_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    weather = WeatherDataManager(use_simulated_data=True, seed=0)
+    weather.get_current_weather(), weather.get_forecast()
+    TideDataManager(use_simulated_data=True, seed=0).get_tide_data()
+    assert not os.path.exists(rate_limiter.DEFAULT_DB_PATH)
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+import recalert_core
+from rate_limiter import RateLimiter
+from recalert_core import TideDataManager
+
+def test_live_tide_without_table_does_not_spend_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(recalert_core, 'open_tide_table', lambda: None)
+    limiter = RateLimiter(str(tmp_path / "limites.db"), {'mare': {'por_minuto': 1, 'rajada': 1, 'cota_diaria': 1}})
+    manager = TideDataManager(use_simulated_data=False, seed=0, rate_limiter=limiter)
+    for _ in range(3):
+        tide_data = manager.get_tide_data()
+        assert tide_data['mares']
+    # Nenhuma requisição foi feita: a única ficha do dia continua disponível
+    assert limiter.acquire('mare')
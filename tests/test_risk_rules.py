@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import os
+
+import pytest
+
+from risk_rules import CompiledRules, DEFAULT_RULES_PATH, RiskRulesError, RuleSet
+
+with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
+    BASE_CONFIG = json.load(f)
+
+def _with_uncertainty(spec):
+    config = copy.deepcopy(BASE_CONFIG)
+    config['incertezas'] = {'precipitacao_24h': spec}
+    return config
+
+@pytest.mark.parametrize("distribution, parameter", [
+    ('lognormal', 'sigma'), ('normal', 'desvio'), ('uniforme', 'amplitude'),
+])
+def test_uncertainty_requires_its_parameter(distribution, parameter):
+    rules = CompiledRules(_with_uncertainty({'distribuicao': distribution, parameter: 0.2}))
+    assert rules.uncertainties['precipitacao_24h'][parameter] == 0.2
+    with pytest.raises(RiskRulesError, match=parameter):
+        CompiledRules(_with_uncertainty({'distribuicao': distribution}))
+    # Parâmetro de outra distribuição não vale
+    other = 'desvio' if parameter != 'desvio' else 'sigma'
+    with pytest.raises(RiskRulesError, match=parameter):
+        CompiledRules(_with_uncertainty({'distribuicao': distribution, other: 0.2}))
+
+@pytest.mark.parametrize("spec", [
+    {'distribuicao': 'gama', 'sigma': 0.1},
+    {'distribuicao': 'normal', 'desvio': "alto"},
+    {'distribuicao': 'normal', 'desvio': -0.1},
+])
+def test_invalid_uncertainty_is_rejected(spec):
+    with pytest.raises(RiskRulesError):
+        CompiledRules(_with_uncertainty(spec))
+
+def _write(path, config, mtime):
+    path.write_text(json.dumps(config), encoding='utf-8')
+    os.utime(path, (mtime, mtime))
+
+def test_rule_set_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "regras.json"
+    _write(path, BASE_CONFIG, 1_000_000)
+    rule_set = RuleSet(str(path), check_interval=0)
+    first = rule_set.get()
+    assert rule_set.get() is first
+    changed = copy.deepcopy(BASE_CONFIG)
+    changed['niveis'][0]['min'] = 6
+    _write(path, changed, 1_000_010)
+    second = rule_set.get()
+    assert second is not first and second.version != first.version
+    assert second.level_cutoffs[0] == 6
+
+def test_rule_set_checks_file_at_most_once_per_interval(tmp_path):
+    path = tmp_path / "regras.json"
+    _write(path, BASE_CONFIG, 1_000_000)
+    rule_set = RuleSet(str(path), check_interval=3600)
+    first = rule_set.get()
+    changed = copy.deepcopy(BASE_CONFIG)
+    changed['niveis'][0]['min'] = 6
+    _write(path, changed, 1_000_010)
+    assert rule_set.get() is first
+    rule_set._last_check -= 3600
+    assert rule_set.get() is not first
+
+def test_invalid_file_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "regras.json"
+    _write(path, BASE_CONFIG, 1_000_000)
+    rule_set = RuleSet(str(path), check_interval=0)
+    good = rule_set.get()
+    path.write_text("{ inválido", encoding='utf-8')
+    os.utime(path, (1_000_010, 1_000_010))
+    assert rule_set.get() is good
+    assert "inválidas" in rule_set.last_error
+    _write(path, _with_uncertainty({'distribuicao': 'lognormal'}), 1_000_020)
+    assert rule_set.get() is good and "sigma" in rule_set.last_error
+    # Corrigido o arquivo, as novas regras entram em vigor e o erro é limpo
+    _write(path, BASE_CONFIG, 1_000_030)
+    assert rule_set.get() is not good and rule_set.last_error is None
+
+def test_invalid_file_without_previous_rules_raises(tmp_path):
+    path = tmp_path / "regras.json"
+    path.write_text("[]", encoding='utf-8')
+    with pytest.raises(RiskRulesError):
+        RuleSet(str(path)).get()
+    with pytest.raises(RiskRulesError, match="não encontrado"):
+        RuleSet(str(tmp_path / "inexistente.json")).get()
+
+def test_non_object_file_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "regras.json"
+    _write(path, BASE_CONFIG, 1_000_000)
+    rule_set = RuleSet(str(path), check_interval=0)
+    good = rule_set.get()
+    _write(path, [BASE_CONFIG], 1_000_010)
+    assert rule_set.get() is good and rule_set.last_error
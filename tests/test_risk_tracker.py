@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+
+import pytest
+
+import risk_tracker
+from risk_rules import CompiledRules, DEFAULT_RULES_PATH
+from risk_tracker import RiskTracker
+
+with open(DEFAULT_RULES_PATH, 'r', encoding='utf-8') as f:
+    BASE_CONFIG = json.load(f)
+
+INPUTS = {
+    'precipitacao_24h': 5.0,
+    'precipitacao_proximas_24h': 5.0,
+    'mare_atual': 1.0,
+    'mare_maxima': 1.9,
+    'pressao': 1012.0,
+}
+
+def _rules_with_tide_threshold(threshold):
+    config = copy.deepcopy(BASE_CONFIG)
+    for rule in config['regras']:
+        if rule['entrada'] == 'mare_maxima':
+            rule['faixas'][0]['min'] = threshold
+    return CompiledRules(config)
+
+@pytest.fixture
+def active_rules(monkeypatch):
+    """Troca as regras em vigor, como uma recarga do arquivo"""
+    current = {'regras': CompiledRules(BASE_CONFIG)}
+    monkeypatch.setattr(risk_tracker, 'get_rules', lambda: current['regras'])
+    return current
+
+def test_threshold_crossing_inside_old_step_reevaluates(active_rules):
+    active_rules['regras'] = _rules_with_tide_threshold(2.03)
+    tracker = RiskTracker()
+    below, _ = tracker.update('Recife', dict(INPUTS, mare_maxima=2.01))
+    above, reevaluated = tracker.update('Recife', dict(INPUTS, mare_maxima=2.04))
+    assert reevaluated
+    assert above['pontuacao'] > below['pontuacao']
+
+def test_reload_with_new_threshold_reevaluates(active_rules):
+    tracker = RiskTracker()
+    tracker.update('Recife', dict(INPUTS, mare_maxima=2.1))
+    active_rules['regras'] = _rules_with_tide_threshold(2.05)
+    state, reevaluated = tracker.update('Recife', dict(INPUTS, mare_maxima=2.1))
+    assert reevaluated
+    assert "Maré Máx.: 2.10 m" in state['fatores']
+
+def test_same_interval_skips_evaluation(active_rules):
+    tracker = RiskTracker()
+    tracker.update('Recife', dict(INPUTS, precipitacao_24h=31.0))
+    _, reevaluated = tracker.update('Recife', dict(INPUTS, precipitacao_24h=45.0))
+    assert not reevaluated
+    assert tracker.evaluations == 1
+
+def test_closed_left_intervals(active_rules):
+    rules = active_rules['regras']
+    assert rules.bin_of('mare_maxima', 2.2) == rules.bin_of('mare_maxima', 2.5)
+    assert rules.bin_of('mare_maxima', 2.2) != rules.bin_of('mare_maxima', 2.1999)
+    assert rules.bin_of('pressao', None) is None
+
+def test_factors_show_current_values(active_rules):
+    tracker = RiskTracker()
+    tracker.update('Recife', dict(INPUTS, precipitacao_24h=31.0))
+    state, reevaluated = tracker.update('Recife', dict(INPUTS, precipitacao_24h=45.0))
+    assert not reevaluated
+    assert state['fatores'] == ["Prec. 24h: 45.0 mm"]
+    assert tracker.state('Recife')['fatores'] == ["Prec. 24h: 45.0 mm"]
+
+def test_update_many_matches_update(active_rules):
+    inputs = {
+        'a': dict(INPUTS, precipitacao_24h=31.0, mare_maxima=2.3),
+        'b': dict(INPUTS, pressao=995.0),
+        'c': dict(INPUTS),
+    }
+    batch, single = RiskTracker(), RiskTracker()
+    assert sorted(batch.update_many(inputs)) == ['a', 'b', 'c']
+    for location, values in inputs.items():
+        state, _ = single.update(location, values)
+        assert batch.state(location)['nivel'] == state['nivel']
+        assert batch.state(location)['fatores'] == state['fatores']
+    assert batch.update_many(inputs) == []
+
+def test_rules_version_is_content_hash():
+    assert CompiledRules(BASE_CONFIG).version == CompiledRules(copy.deepcopy(BASE_CONFIG)).version
+    assert CompiledRules(BASE_CONFIG).version != _rules_with_tide_threshold(2.03).version
+
+def test_restored_state_with_same_rules_is_reused(active_rules):
+    first = RiskTracker()
+    first.update('Recife', dict(INPUTS, precipitacao_24h=31.0))
+    restored = RiskTracker()
+    assert restored.restore_states(first.export_states()) == 1
+    state, reevaluated = restored.update('Recife', dict(INPUTS, precipitacao_24h=33.0))
+    assert not reevaluated
+    assert state['fatores'] == ["Prec. 24h: 33.0 mm"]
+
+def test_level_change_event(active_rules):
+    tracker = RiskTracker()
+    events = []
+    tracker.subscribe(events.append)
+    tracker.update('Recife', dict(INPUTS))
+    tracker.update('Recife', dict(INPUTS, precipitacao_24h=31.0, mare_maxima=2.3))
+    assert [(e['nivel_anterior'], e['nivel']) for e in events] == [(None, 'Baixo'), ('Baixo', 'Alto')]
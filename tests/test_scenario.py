@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import numpy as np
+
+from scenario import ScenarioGenerator, scenario_digest
+
+def _generate(seed, **kwargs):
+    return ScenarioGenerator(seed=seed, n_stations=3, start=datetime(2025, 3, 1, 5, 30), hours=24 * 60,
+                             **kwargs).generate()
+
+def test_same_seed_same_scenario():
+    first, second = _generate(11), _generate(11)
+    assert scenario_digest(first) == scenario_digest(second)
+    for key in ('chuva', 'pressao', 'mare'):
+        assert np.array_equal(first[key], second[key])
+    assert first['tempestades'] == second['tempestades']
+    assert first['mares_sizigia'] == second['mares_sizigia']
+    assert scenario_digest(_generate(12)) != scenario_digest(first)
+
+def test_shapes_and_dtypes():
+    scenario = _generate(3)
+    assert scenario['tempo'].shape == (24 * 60,)
+    assert scenario['tempo'].dtype == np.dtype('datetime64[h]')
+    assert scenario['tempo'][0] == np.datetime64('2025-03-01T05', 'h')
+    assert np.all(np.diff(scenario['tempo']) == np.timedelta64(1, 'h'))
+    for key in ('chuva', 'pressao', 'mare'):
+        assert scenario[key].shape == (3, 24 * 60)
+        assert scenario[key].dtype == np.float32
+        assert np.isfinite(scenario[key]).all()
+    assert (scenario['chuva'] >= 0).all()
+    assert 950 < scenario['pressao'].min() and scenario['pressao'].max() < 1050
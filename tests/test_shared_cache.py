@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import shared_cache as shared_cache_module
+from plain_data import UntrustedFileError
+from shared_cache import MemoryCacheBackend, SQLiteCacheBackend, entry_size, shared_cache
+
+VALUE = "x" * 1000
+SIZE = entry_size(VALUE)
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def make_backend(request, tmp_path):
+    def make(max_bytes=None, policy=None):
+        if request.param == 'memoria':
+            return MemoryCacheBackend(max_bytes, policy)
+        return SQLiteCacheBackend(str(tmp_path / "cache.db"), max_bytes, policy, flush_interval=3600)
+    return make
+
+def test_get_set_and_expiry(make_backend):
+    cache = make_backend()
+    cache.set("f:1", {'a': 1}, ttl=60)
+    assert cache.get("f:1") == {'a': 1}
+    cache.set("f:2", 1, ttl=-1)
+    assert cache.get("f:2") is None
+    assert cache.get("f:3") is None
+
+def test_lru_evicts_least_recently_used(make_backend):
+    cache = make_backend(max_bytes=int(SIZE * 2.5), policy='lru')
+    cache.set("f:a", VALUE, 60)
+    time.sleep(0.01)
+    cache.set("f:b", VALUE, 60)
+    time.sleep(0.01)
+    assert cache.get("f:a") == VALUE
+    time.sleep(0.01)
+    cache.set("f:c", VALUE, 60)
+    assert cache.get("f:a") == VALUE
+    assert cache.get("f:b") is None
+    assert cache.stats()['remocoes'] == 1
+
+def test_lfu_evicts_least_frequently_used(make_backend):
+    cache = make_backend(max_bytes=int(SIZE * 2.5), policy='lfu')
+    cache.set("f:a", VALUE, 60)
+    cache.set("f:b", VALUE, 60)
+    for _ in range(3):
+        cache.get("f:b")
+    cache.get("f:a")
+    cache.set("f:c", VALUE, 60)
+    assert cache.get("f:a") is None
+    assert cache.get("f:b") == VALUE
+
+def test_oversized_value_is_not_stored(make_backend):
+    cache = make_backend(max_bytes=SIZE // 2)
+    cache.set("f:a", VALUE, 60)
+    assert cache.get("f:a") is None
+
+def test_hit_miss_counters(make_backend):
+    cache = make_backend()
+    calls = []
+
+    @shared_cache(ttl=60, backend=cache)
+    def fetch(x):
+        calls.append(x)
+        return x * 2
+
+    assert fetch(2) == 4
+    assert fetch(2) == 4
+    assert fetch(3) == 6
+    stats = cache.stats()
+    assert (stats['acertos'], stats['falhas']) == (1, 2)
+    assert stats['taxa_acertos'] == pytest.approx(1 / 3, abs=1e-3)
+    assert calls == [2, 3]
+    fetch.clear()
+    assert fetch(2) == 4
+    assert calls == [2, 3, 2]
+
+def test_invalidate_prefix_is_literal(make_backend):
+    cache = make_backend()
+    cache.set("a_b:1", 1, 60)
+    cache.set("axb:1", 2, 60)
+    cache.invalidate("a_b:")
+    assert cache.get("a_b:1") is None
+    assert cache.get("axb:1") == 2
+
+def test_export_and_restore(make_backend):
+    source = make_backend()
+    source.set("f:1", [1, 2], 60)
+    target = MemoryCacheBackend()
+    assert target.restore(source.export()) == 1
+    assert target.get("f:1") == [1, 2]
+    assert target.restore([("f:2", 1, time.time() - 10)]) == 0
+    assert target.restore([("f:2", 1, time.time() - 10)], min_ttl=30) == 1
+
+def test_single_flight(make_backend):
+    cache = make_backend()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return "valor"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("f:k", 60, compute)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["valor"] * 4
+    assert len(calls) == 1
+
+def test_sqlite_reads_do_not_write(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCacheBackend(path, flush_interval=3600)
+    cache.set("f:a", VALUE, 60)
+    conn = sqlite3.connect(path)
+    before = conn.execute("PRAGMA data_version").fetchone()[0]
+    for _ in range(20):
+        assert cache.get("f:a") == VALUE
+        cache._record("f:a", 'acertos')
+    assert conn.execute("PRAGMA data_version").fetchone()[0] == before
+    cache.flush()
+    assert conn.execute("PRAGMA data_version").fetchone()[0] != before
+    assert conn.execute("SELECT uses FROM entries WHERE key = 'f:a'").fetchone()[0] == 20
+    assert conn.execute("SELECT value FROM counters WHERE event = 'acertos'").fetchone()[0] == 20
+    conn.close()
+
+def test_sqlite_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+    first.set("f:a", {'v': 1}, 60)
+    assert second.get("f:a") == {'v': 1}
+    second.invalidate("f:")
+    assert first.get("f:a") is None
+
+def test_sqlite_stores_plain_data(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCacheBackend(path)
+    value = ({'hora': datetime(2026, 1, 1, 3)}, np.arange(4, dtype=np.float32))
+    cache.set("f:a", value, 60)
+    other = SQLiteCacheBackend(path)
+    restored = other.get("f:a")
+    assert restored[0] == value[0]
+    np.testing.assert_array_equal(restored[1], value[1])
+    conn = sqlite3.connect(path)
+    assert json.loads(conn.execute("SELECT value FROM entries").fetchone()[0])
+    conn.close()
+    with pytest.raises(TypeError):
+        cache.set("f:b", object(), 60)
+
+def test_sqlite_drops_pickled_entries(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCacheBackend(path).set("f:a", 1, 60)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE entries SET value = ?", (pickle.dumps(1),))
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+    assert SQLiteCacheBackend(path).get("f:a") is None
+
+def test_sqlite_refuses_files_others_can_write(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCacheBackend(path)
+    os.chmod(path, 0o666)
+    with pytest.raises(UntrustedFileError):
+        cache.get("f:a")
+    with pytest.raises(UntrustedFileError):
+        SQLiteCacheBackend(path)
+
+def test_invalidate_command(tmp_path, monkeypatch, capsys):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(shared_cache_module, '_default_backend', backend)
+    backend.set("modulo.f:1", 1, 60)
+    backend.set("modulo.g:1", 2, 60)
+    assert shared_cache_module.main(["invalidar", "modulo.f:"]) == 0
+    assert backend.get("modulo.f:1") is None and backend.get("modulo.g:1") == 2
+    shared_cache_module.main(["invalidar"])
+    assert backend.get("modulo.g:1") is None
+    assert "todas as entradas" in capsys.readouterr().out
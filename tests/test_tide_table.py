@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import recalert_core
+import tide_table
+from providers import SimulatedProvider
+from rate_limiter import RateLimiter
+from tide_table import TideEventIndex, TideTable, build_tide_table, open_tide_table
+
+START = datetime(2026, 1, 1)
+
+def _table(tmp_path, days=5):
+    path = str(tmp_path / "tabua.bin")
+    n_minutes = days * 24 * 60
+    tide_table.write_tide_table(path, START, tide_table.harmonic_heights(tide_table._to_minute(START), n_minutes))
+    return path
+
+def test_tide_data_includes_yesterday_to_tomorrow(tmp_path):
+    table = TideTable(_table(tmp_path))
+    data = table.tide_data(datetime(2026, 1, 3, 0, 30))
+    days = {tide['hora'][:10] for tide in data['mares_estendidas']}
+    assert days == {"2026-01-02", "2026-01-03", "2026-01-04"}
+    assert all(tide['hora'].startswith("2026-01-03") for tide in data['mares'])
+    assert set(map(str, data['mares'])) <= set(map(str, data['mares_estendidas']))
+
+def test_open_tide_table_reopens_regenerated_file(tmp_path):
+    path = _table(tmp_path, days=2)
+    first = open_tide_table(path)
+    assert open_tide_table(path) is first
+    build_tide_table(path, START, years=1)
+    os.utime(path, (0, os.path.getmtime(path) + 10))
+    second = open_tide_table(path)
+    assert second is not first and second.n_minutes > first.n_minutes
+    # Só a versão atual fica aberta; a anterior pode ser liberada
+    assert tide_table._open_tables[os.path.abspath(path)] == (os.path.getmtime(path), second)
+    assert open_tide_table(str(tmp_path / "inexistente.bin")) is None
+
+def test_table_must_cover_now(tmp_path, monkeypatch):
+    path = str(tmp_path / "futura.bin")
+    future = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    tide_table.write_tide_table(path, future, tide_table.harmonic_heights(tide_table._to_minute(future), 2 * 24 * 60))
+    table = TideTable(path)
+    monkeypatch.setattr(recalert_core, 'open_tide_table', lambda: table)
+    limiter = RateLimiter(str(tmp_path / "limites.db"))
+    manager = recalert_core.TideDataManager(use_simulated_data=False, seed=0, rate_limiter=limiter)
+    monkeypatch.setattr(manager, '_fetch_tide_data', lambda: None)
+    # A tábua só começa amanhã: em vez de falhar em height_at, a consulta recorre a outra fonte
+    assert manager.get_tide_data()['fonte'] == SimulatedProvider.name
+
+TIDES = [
+    {'hora': "2026-01-03 09:10", 'altura': 2.1, 'tipo': 'alta'},
+    {'hora': "2026-01-03 03:00", 'altura': 0.3, 'tipo': 'baixa'},
+    {'hora': "2026-01-03 15:20", 'altura': 0.4, 'tipo': 'baixa'},
+    {'hora': "sem horário", 'altura': 9.9, 'tipo': 'alta'},
+]
+
+def test_event_index_neighbours():
+    index = TideEventIndex(TIDES)
+    assert len(index) == 3
+    assert index.neighbours(datetime(2026, 1, 3, 2, 0)) == (None, TIDES[1])
+    assert index.neighbours(datetime(2026, 1, 3, 9, 10)) == (TIDES[0], TIDES[2])
+    assert index.neighbours(datetime(2026, 1, 3, 12, 0)) == (TIDES[0], TIDES[2])
+    assert index.neighbours(datetime(2026, 1, 3, 16, 0)) == (TIDES[2], None)
+    assert index.next_tide(datetime(2026, 1, 3, 3, 0)) == TIDES[0]
+
+def test_event_index_cosine_interpolation():
+    index = TideEventIndex(TIDES)
+    start, end = datetime(2026, 1, 3, 3, 0), datetime(2026, 1, 3, 9, 10)
+    middle = start + (end - start) / 2
+    quarter = start + (end - start) / 4
+    heights = index.heights_at([start, quarter, middle, end])
+    assert heights[0] == pytest.approx(0.3) and heights[3] == pytest.approx(2.1)
+    assert heights[2] == pytest.approx(1.2)
+    assert heights[1] == pytest.approx(0.3 + 1.8 * (1 - np.cos(np.pi / 4)) / 2)
+    assert np.isnan(index.heights_at([datetime(2026, 1, 3, 2, 59)])[0])
+    assert index.current(middle) == {'hora': "2026-01-03 06:05", 'altura': 1.2, 'status': 'enchente'}
+    assert index.current(datetime(2026, 1, 3, 12, 0))['status'] == 'vazante'
+
+def test_event_index_covers_last_extremum():
+    index = TideEventIndex(TIDES)
+    last = datetime(2026, 1, 3, 15, 20)
+    assert index.heights_at([last])[0] == pytest.approx(0.4)
+    assert index.current(last) == {'hora': "2026-01-03 15:20", 'altura': 0.4, 'status': 'enchente'}
+    assert index.current(last + timedelta(minutes=1)) is None
+    assert index.current(datetime(2026, 1, 3, 3, 0))['altura'] == 0.3
+
+def test_binary_table_extrema_alternate(tmp_path):
+    table = TideTable(_table(tmp_path))
+    kinds = table.extrema_high.astype(bool)
+    assert kinds.size > 10 and np.all(kinds[1:] != kinds[:-1])
+    minutes = np.asarray(table.extrema_minutes)
+    assert np.all(np.diff(minutes) > 0)
+    # Preamares acima das baixa-mares vizinhas, a cerca de 6h12 umas das outras
+    heights = np.asarray(table.extrema_heights)
+    assert np.all(np.where(kinds[1:], heights[1:] > heights[:-1], heights[1:] < heights[:-1]))
+    assert 4 * 60 < np.median(np.diff(minutes)) < 8 * 60
+    now = START + timedelta(days=2, hours=5)
+    following = table.next_extremum(now)
+    assert table.previous_extremum(now)['tipo'] != following['tipo']
+    assert table.next_extremum(now, kind='alta')['tipo'] == 'alta'
+    assert table.status_at(now) == ('enchente' if following['tipo'] == 'alta' else 'vazante')
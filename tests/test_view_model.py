@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import pickle
+from datetime import datetime
+
+from view_model import ViewModelCache
+
+NOW = datetime(2026, 3, 10, 12, 30, 15)
+
+def _snapshot(rain=1.0):
+    weather = {'temperatura': 28.0, 'hora_local': "2026-03-10 12:30"}
+    forecast = {'horas': [{'hora': "2026-03-10 12:00", 'precipitacao': rain}]}
+    tide = {'previsoes': [{'hora': "2026-03-10 09:00", 'altura': 0.4, 'tipo': 'Baixa'},
+                          {'hora': "2026-03-10 15:00", 'altura': 2.1, 'tipo': 'Alta'}],
+            'mare_atual': {'altura': 1.2}}
+    return weather, forecast, tide
+
+def test_unpickled_copies_reuse_the_model():
+    cache = ViewModelCache()
+    snapshot = _snapshot()
+    view = cache.get(*snapshot, now=NOW)
+    copy = pickle.loads(pickle.dumps(snapshot))
+    assert cache.get(*copy, now=NOW) is view
+    assert cache.builds == 1
+
+def test_different_content_is_not_served_from_recycled_ids():
+    cache = ViewModelCache()
+    first = cache.get(*_snapshot(1.0), now=NOW)
+    # Os objetos do primeiro snapshot já foram liberados: os ids podem se repetir
+    second = cache.get(*_snapshot(9.0), now=NOW)
+    assert second is not first
+    assert cache.builds == 2
+
+def test_model_is_rebuilt_each_minute():
+    cache = ViewModelCache()
+    snapshot = _snapshot()
+    cache.get(*snapshot, now=NOW)
+    cache.get(*snapshot, now=NOW.replace(second=59))
+    cache.get(*snapshot, now=NOW.replace(minute=31))
+    assert cache.builds == 2
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import json
+from datetime import datetime
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from recalert_core import TideDataManager, WeatherDataManager
+from view_model import TIDE_CURVE_STEP_MINUTES, build_view_model
+from visualizacoes import (WEBGL_POINT_THRESHOLD, create_long_range_graph, create_plotly_graphs,
+                           figure_json_bytes, lttb_downsample)
+
+def _series(n):
+    times = np.datetime64('2025-01-01T00:00', 'ms') + np.arange(n) * np.timedelta64(10, 'm')
+    t = np.arange(n, dtype=np.float64)
+    return times, np.sin(t / 50.0), np.maximum(0.0, np.cos(t / 7.0))
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.zeros_like(x)
+    y[4321] = 10.0
+    idx = lttb_downsample(x, y, 100)
+    assert idx.size == 100
+    assert idx[0] == 0 and idx[-1] == x.size - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 4321 in idx
+
+def test_lttb_returns_everything_when_small():
+    assert lttb_downsample(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_downsample(np.arange(5), np.arange(5), 2).tolist() == [0, 1, 2, 3, 4]
+
+def test_webgl_for_dense_windows_at_realistic_widths():
+    times, tide, rain = _series(50_000)
+    fig = create_long_range_graph(times, tide, rain, width_px=1200)
+    assert all(isinstance(trace, go.Scattergl) for trace in fig.data)
+    assert all(len(trace.y) == 1200 for trace in fig.data)
+
+    window = (str(times[0]), str(times[WEBGL_POINT_THRESHOLD - 1]))
+    fig = create_long_range_graph(times, tide, rain, width_px=1200, x_range=window)
+    assert all(isinstance(trace, go.Scatter) for trace in fig.data)
+
+def test_visible_window_is_cut_before_downsampling():
+    times, tide, rain = _series(1000)
+    window = (str(times[100]), str(times[199]))
+    fig = create_long_range_graph(times, tide, rain, width_px=1200, x_range=window)
+    assert len(fig.data[0].y) == 100
+
+def _decode(array):
+    """Array tipado do JSON do Plotly ({'dtype', 'bdata'}) como ndarray"""
+    return np.frombuffer(base64.b64decode(array['bdata']), dtype=np.dtype(array['dtype']))
+
+def _axis(trace):
+    start = np.datetime64(trace['x0'], 'ms')
+    return start + np.arange(len(_decode(trace['y']))) * np.timedelta64(int(trace['dx']), 'ms')
+
+def test_dashboard_figure_uses_compact_encoding():
+    forecast = WeatherDataManager(use_simulated_data=True, seed=4).get_forecast()
+    tide = TideDataManager(use_simulated_data=True, seed=4).get_tide_data()
+    now = datetime.now().replace(second=0, microsecond=0)
+    view = build_view_model({}, forecast, tide, now=now)
+    fig = create_plotly_graphs(forecast, tide, view=view)
+    payload = json.loads(pio.to_json(fig, validate=False))
+    traces = {trace['name']: trace for trace in payload['data']}
+
+    # Curva de maré: float32 em base64 e eixo regular sem array de datas
+    curve = traces['Maré']
+    assert 'x' not in curve and curve['dx'] == TIDE_CURVE_STEP_MINUTES * 60 * 1000
+    assert curve['y']['dtype'] == 'f4'
+    heights = _decode(curve['y'])
+    assert np.allclose(heights, view['mare']['curva']['alturas'], atol=0.005 + 1e-6)
+    assert _axis(curve)[0] == np.datetime64(view['mare']['tempos'][0], 'ms')
+
+    # Barras de chuva: uma por hora, valores com uma casa decimal
+    for name, series in (('Últimas 24h', view['precipitacao']['passado']),
+                         ('Próximas 24h', view['precipitacao']['futuro'])):
+        bars = traces[name]
+        assert bars['type'] == 'bar' and 'x' not in bars and bars['dx'] == 3600 * 1000
+        values = _decode(bars['y'])
+        assert values.shape == (len(series['valores']),)
+        assert np.allclose(values, np.round(series['valores'], 1), atol=1e-6)
+        assert np.array_equal(_axis(bars), np.array(series['tempos'], dtype='datetime64[ms]'))
+
+    # Pontos com textos por ponto substituídos por hovertemplate e customdata
+    assert all('text' not in trace for trace in payload['data'])
+    assert len(json.dumps(payload['layout']['template'])) < 100
+
+    # O JSON compacto é bem menor que o mesmo gráfico com listas de datas e de floats
+    size = figure_json_bytes(fig)
+    naive = go.Figure(fig)
+    for trace, original in zip(naive.data, payload['data']):
+        if 'x0' in original:
+            trace.update(x=[str(t) for t in _axis(original)], x0=None, dx=None)
+        if isinstance(original['y'], dict):
+            trace.y = [float(v) for v in _decode(original['y'])]
+    assert size < 0.7 * figure_json_bytes(naive)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from warm_start import load_snapshot, save_snapshot
+
+def _entries():
+    history = (np.arange('2026-01-01T00', '2026-01-01T05', dtype='datetime64[h]'),
+               np.linspace(0, 2, 5, dtype=np.float32), np.zeros(5))
+    weather = ({'temperatura': 28.5, 'hora_local': "2026-01-01 04:00"}, {'horas': []})
+    return [("fetch_history:(30, True)", history, 2e9), ("fetch_weather_data:(True,)", weather, 2e9),
+            ("objeto", object(), 2e9)]
+
+def test_round_trip_keeps_plain_data(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    states = {'Recife': {'impressao': ('abc', 1, None), 'nivel': "Alto", 'alterado_em': datetime(2026, 1, 1, 3),
+                         'modelos_fatores': [("Chuva de {valor} mm", 'precipitacao_24h')]}}
+    images = {'imagens': {'k1': b'\x89PNG'}, 'ultimas': {('mare_precipitacao', 'png'): b'\x89PNG'}}
+    counts = save_snapshot(path, _entries(), states, images)
+    assert counts == {'entradas': 2, 'riscos': 1, 'graficos': 1}
+
+    payload = load_snapshot(path)
+    (key, history, expires), (_, weather, _) = payload['cache']
+    assert key == "fetch_history:(30, True)" and expires == 2e9
+    assert isinstance(history, tuple) and history[0].dtype == np.dtype('datetime64[h]')
+    np.testing.assert_array_equal(history[1], np.linspace(0, 2, 5, dtype=np.float32))
+    assert weather[0]['temperatura'] == 28.5
+    assert payload['riscos'] == states
+    assert payload['graficos'] == images
+
+def test_snapshot_is_plain_json(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    save_snapshot(path, _entries())
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['versao']
+
+def test_rejects_files_others_can_write(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    save_snapshot(path, _entries())
+    assert load_snapshot(path) is not None
+    os.chmod(path, 0o666)
+    assert load_snapshot(path) is None
+
+@pytest.mark.parametrize("content", [b"", b"\x80\x04pickle", b'{"versao": 1}'])
+def test_unreadable_snapshots_start_cold(tmp_path, content):
+    path = tmp_path / "snapshot.json"
+    path.write_bytes(content)
+    os.chmod(path, 0o600)
+    assert load_snapshot(str(path)) is None
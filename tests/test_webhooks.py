@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+
+import pytest
+
+from webhooks import WebhookConfigError, WebhookNotifier, load_endpoints, serve_receiver
+
+@pytest.fixture
+def receivers():
+    servers = []
+
+    def start(secret, delay=0.0):
+        server = serve_receiver(0, secret, delay)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/"
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def _endpoint(name, url, secret, timeout=5.0, attempts=1):
+    return {'nome': name, 'url': url, 'segredo': secret, 'tempo_limite': timeout, 'tentativas': attempts}
+
+def test_signature_is_verified(receivers):
+    url = receivers("segredo")
+    notifier = WebhookNotifier([_endpoint("certo", url, "segredo"), _endpoint("errado", url, "outro")])
+    try:
+        results = notifier.send({'id': "1", 'nivel': "Alto"}, wait_timeout=10)
+    finally:
+        notifier.close()
+    assert results['certo']['ok'] and results['certo']['status'] == 200
+    assert not results['errado']['ok'] and results['errado']['status'] == 401
+
+def test_endpoints_are_delivered_concurrently(receivers):
+    endpoints = [_endpoint(f"lento-{i}", receivers("s", delay=0.5), "s") for i in range(4)]
+    notifier = WebhookNotifier(endpoints)
+    try:
+        started = time.monotonic()
+        results = notifier.send({'id': "2"}, wait_timeout=10)
+        elapsed = time.monotonic() - started
+    finally:
+        notifier.close()
+    assert all(result['ok'] for result in results.values())
+    assert elapsed < 1.5
+
+def test_slow_endpoint_is_reported_pending(receivers):
+    notifier = WebhookNotifier([_endpoint("rapido", receivers("s"), "s"),
+                                _endpoint("lento", receivers("s", delay=1.5), "s")])
+    try:
+        results = notifier.send({'id': "3"}, wait_timeout=0.5)
+        assert results['rapido']['ok']
+        assert results['lento'] == {'ok': False, 'status': None, 'tentativas': None, 'erro': "pendente"}
+    finally:
+        notifier.close()
+
+def test_empty_secret_is_rejected(tmp_path):
+    path = tmp_path / "webhooks.json"
+    path.write_text(json.dumps({'endpoints': [{'nome': "chat", 'url': "http://127.0.0.1:1/"}]}))
+    with pytest.raises(WebhookConfigError):
+        load_endpoints(str(path))
+    path.write_text(json.dumps({'endpoints': [{'url': "http://127.0.0.1:1/", 'segredo': "s"}]}))
+    assert load_endpoints(str(path))[0]['nome'] == "webhook-1"
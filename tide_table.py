@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tábua de marés binária para o Monitor de Maré e Clima - Recife
+
+Este módulo grava e lê uma tábua de marés pré-calculada com resolução de um
+minuto cobrindo vários anos, acompanhada de um índice ordenado de preamares e
+baixa-mares. O arquivo é mapeado em memória somente para leitura, de modo que
+todos os processos do servidor compartilham as mesmas páginas do sistema
+operacional, sem cópia nem conversão de texto por processo.
+
+Consultas de altura atual são O(1) (acesso direto pelo minuto) e as de
+próxima/anterior maré são O(log n) (busca binária no índice de extremos).
+
+O módulo também oferece TideEventIndex, um índice ordenado de extremos no
+formato de dicionário da aplicação, para dados que não vêm da tábua binária.
+
+Uso para gerar a tábua (previsão harmônica aproximada):
+    python tide_table.py --anos 3
+"""
+
+import argparse
+import os
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from scenario import MEAN_SEA_LEVEL, TIDE_CONSTITUENTS
+
+# Arquivo padrão da tábua (pode ser alterado por variável de ambiente)
+DEFAULT_TABLE_PATH = os.environ.get("RECALERT_TIDE_TABLE", "tabua_mares.bin")
+
+MAGIC = b"RECTIDE1"
+EPOCH = datetime(1970, 1, 1)
+
+# Cabeçalho: assinatura, minuto inicial, nº de minutos, nº de extremos e deslocamentos das seções
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('start_minute', '<i8'),
+    ('n_minutes', '<i8'),
+    ('n_extrema', '<i8'),
+    ('heights_offset', '<i8'),
+    ('extrema_offset', '<i8'),
+])
+# Alturas em milímetros; extremos com minuto, altura e tipo (1 = alta, 0 = baixa)
+HEIGHT_DTYPE = np.dtype('<i2')
+EXTREMUM_DTYPE = np.dtype([('minute', '<i8'), ('height', '<i2'), ('high', 'u1')])
+
+# Fases (graus, referência 2000-01-01 00:00) usadas na previsão harmônica aproximada
+TIDE_PHASES = (110.0, 145.0, 95.0, 200.0, 170.0)
+
+def _to_minute(dt):
+    """Converte um datetime (hora local) em minutos desde 1970-01-01"""
+    return int((dt - EPOCH).total_seconds() // 60)
+
+def _from_minute(minute):
+    return EPOCH + timedelta(minutes=int(minute))
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+def harmonic_heights(start_minute, n_minutes):
+    """
+    Calcula alturas de maré por minuto a partir das constituintes harmônicas
+
+    Args:
+        start_minute: Minuto inicial (minutos desde 1970-01-01)
+        n_minutes: Número de minutos
+
+    Returns:
+        np.ndarray: Alturas em metros (float64)
+    """
+    reference = _to_minute(datetime(2000, 1, 1))
+    hours = (np.arange(n_minutes, dtype=np.float64) + (start_minute - reference)) / 60.0
+    heights = np.full(n_minutes, MEAN_SEA_LEVEL)
+    for (period, amplitude), phase in zip(TIDE_CONSTITUENTS, TIDE_PHASES):
+        heights += amplitude * np.cos(2 * np.pi * hours / period - np.radians(phase))
+    return heights
+
+def find_extrema(heights):
+    """
+    Localiza preamares e baixa-mares em uma série por minuto
+
+    Args:
+        heights: Alturas em metros
+
+    Returns:
+        Tuple: (índices ordenados, array booleano indicando preamar)
+    """
+    slope = np.diff(heights)
+    highs = np.flatnonzero((slope[:-1] > 0) & (slope[1:] <= 0)) + 1
+    lows = np.flatnonzero((slope[:-1] < 0) & (slope[1:] >= 0)) + 1
+    index = np.concatenate([highs, lows])
+    is_high = np.concatenate([np.ones(highs.size, bool), np.zeros(lows.size, bool)])
+    order = np.argsort(index, kind='stable')
+    return index[order], is_high[order]
+
+def write_tide_table(path, start, heights):
+    """
+    Grava uma tábua binária a partir de alturas por minuto
+
+    Permite gerar o arquivo a partir de qualquer fonte (previsão harmônica ou
+    tábua oficial interpolada). A escrita é atômica.
+
+    Args:
+        path: Caminho do arquivo
+        start: datetime do primeiro minuto
+        heights: Alturas em metros, uma por minuto
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    extrema_index, is_high = find_extrema(heights)
+    start_minute = _to_minute(start.replace(second=0, microsecond=0))
+
+    extrema = np.empty(extrema_index.size, dtype=EXTREMUM_DTYPE)
+    extrema['minute'] = start_minute + extrema_index
+    extrema['height'] = np.round(heights[extrema_index] * 1000)
+    extrema['high'] = is_high
+
+    heights_offset = _align(HEADER_DTYPE.itemsize)
+    extrema_offset = _align(heights_offset + heights.size * HEIGHT_DTYPE.itemsize)
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header[0] = (MAGIC, start_minute, heights.size, extrema.size, heights_offset, extrema_offset)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header.tobytes())
+        f.seek(heights_offset)
+        f.write(np.round(heights * 1000).astype(HEIGHT_DTYPE).tobytes())
+        f.seek(extrema_offset)
+        f.write(extrema.tobytes())
+    os.replace(tmp_path, path)
+
+def build_tide_table(path=None, start=None, years=3):
+    """
+    Gera a tábua com a previsão harmônica aproximada para o Porto do Recife
+
+    Args:
+        path: Caminho do arquivo (padrão: DEFAULT_TABLE_PATH)
+        start: Início da tábua (padrão: 1º de janeiro do ano corrente)
+        years: Número de anos cobertos
+    """
+    start = start or datetime(datetime.now().year, 1, 1)
+    end = start.replace(year=start.year + years)
+    n_minutes = int((end - start).total_seconds() // 60)
+    write_tide_table(path or DEFAULT_TABLE_PATH, start, harmonic_heights(_to_minute(start), n_minutes))
+
+class TideTable:
+    """
+    Classe para consultar uma tábua de marés binária mapeada em memória
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f"{path} não é uma tábua de marés válida")
+        self.start_minute = int(header['start_minute'])
+        self.n_minutes = int(header['n_minutes'])
+        self.heights = np.memmap(path, dtype=HEIGHT_DTYPE, mode='r',
+                                 offset=int(header['heights_offset']), shape=(self.n_minutes,))
+        extrema = np.memmap(path, dtype=EXTREMUM_DTYPE, mode='r',
+                            offset=int(header['extrema_offset']), shape=(int(header['n_extrema']),))
+        self.extrema_minutes = extrema['minute']
+        self.extrema_heights = extrema['height']
+        self.extrema_high = extrema['high']
+
+    @property
+    def start(self):
+        return _from_minute(self.start_minute)
+
+    @property
+    def end(self):
+        return _from_minute(self.start_minute + self.n_minutes - 1)
+
+    def covers(self, dt):
+        return 0 <= _to_minute(dt) - self.start_minute < self.n_minutes
+
+    def height_at(self, dt):
+        """Altura (m) no minuto de dt — acesso direto O(1)"""
+        offset = _to_minute(dt) - self.start_minute
+        if not 0 <= offset < self.n_minutes:
+            raise ValueError(f"{dt:%Y-%m-%d %H:%M} fora do período da tábua")
+        return int(self.heights[offset]) / 1000
+
+    def heights_between(self, start, end, step_minutes=1):
+        """Alturas (m) entre dois horários, como fatia do mapeamento (sem cópia até a conversão)"""
+        lo = max(0, _to_minute(start) - self.start_minute)
+        hi = min(self.n_minutes, _to_minute(end) - self.start_minute + 1)
+        return self.heights[lo:hi:step_minutes] / 1000
+
+    def _extremum(self, i):
+        return {
+            'hora': _from_minute(self.extrema_minutes[i]).strftime("%Y-%m-%d %H:%M"),
+            'altura': int(self.extrema_heights[i]) / 1000,
+            'tipo': 'alta' if self.extrema_high[i] else 'baixa'
+        }
+
+    def next_extremum(self, dt, kind=None):
+        """
+        Próxima preamar/baixa-mar estritamente após dt (busca binária)
+
+        Args:
+            dt: Horário de referência
+            kind: 'alta', 'baixa' ou None para qualquer uma
+
+        Returns:
+            dict: Maré no formato da aplicação ou None se fora da tábua
+        """
+        i = int(np.searchsorted(self.extrema_minutes, _to_minute(dt), side='right'))
+        if kind is not None and i < self.extrema_minutes.size and self._extremum_kind(i) != kind:
+            i += 1
+        return self._extremum(i) if i < self.extrema_minutes.size else None
+
+    def previous_extremum(self, dt, kind=None):
+        """Preamar/baixa-mar anterior ou igual a dt (busca binária)"""
+        i = int(np.searchsorted(self.extrema_minutes, _to_minute(dt), side='right')) - 1
+        if kind is not None and i >= 0 and self._extremum_kind(i) != kind:
+            i -= 1
+        return self._extremum(i) if i >= 0 else None
+
+    def _extremum_kind(self, i):
+        return 'alta' if self.extrema_high[i] else 'baixa'
+
+    def status_at(self, dt):
+        """'enchente' se a próxima maré for alta, 'vazante' caso contrário"""
+        following = self.next_extremum(dt)
+        if following is None:
+            return 'desconhecido'
+        return 'enchente' if following['tipo'] == 'alta' else 'vazante'
+
+    def extrema_between(self, start, end):
+        """Extremos no intervalo [start, end]"""
+        lo = int(np.searchsorted(self.extrema_minutes, _to_minute(start), side='left'))
+        hi = int(np.searchsorted(self.extrema_minutes, _to_minute(end), side='right'))
+        return [self._extremum(i) for i in range(lo, hi)]
+
+    def tide_data(self, now=None):
+        """
+        Dados de maré no formato de TideDataManager.get_tide_data()
+
+        Args:
+            now: Horário de referência (padrão: agora)
+
+        Returns:
+            dict: Marés do dia, marés de ontem a amanhã, maré atual, máxima,
+                  mínima e próxima
+        """
+        now = (now or datetime.now()).replace(second=0, microsecond=0)
+        day_start = now.replace(hour=0, minute=0)
+        last_minute = timedelta(days=1) - timedelta(minutes=1)
+        tides = self.extrema_between(day_start, day_start + last_minute)
+        return {
+            'mares': tides,
+            'mares_estendidas': self.extrema_between(day_start - timedelta(days=1),
+                                                     day_start + timedelta(days=1) + last_minute),
+            'mare_atual': {
+                'hora': now.strftime("%Y-%m-%d %H:%M"),
+                'altura': round(self.height_at(now), 2),
+                'status': self.status_at(now)
+            },
+            'mare_maxima': max(tides, key=lambda x: x['altura']) if tides else {},
+            'mare_minima': min(tides, key=lambda x: x['altura']) if tides else {},
+            'proxima_mare': self.next_extremum(now) or {}
+        }
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+class TideEventIndex:
+    """
+    Índice ordenado de preamares e baixa-mares (podendo abranger vários dias)
+
+    Os horários são convertidos uma única vez na construção; as consultas usam
+    busca binária (bisect) para achar os extremos vizinhos. A altura entre dois
+    extremos segue a interpolação cossenoidal usual das tábuas de maré.
+    """
+
+    def __init__(self, tides):
+        parsed = []
+        for tide in tides:
+            try:
+                parsed.append((datetime.strptime(tide['hora'], TIME_FORMAT), tide))
+            except (KeyError, ValueError):
+                continue
+        parsed.sort(key=lambda item: item[0])
+        self.tides = [tide for _, tide in parsed]
+        self.times = [(dt - EPOCH).total_seconds() for dt, _ in parsed]
+        self._times_array = np.array(self.times, dtype=np.float64)
+        self._heights_array = np.array([float(t['altura']) for t in self.tides], dtype=np.float64)
+        self._high_array = np.array([t.get('tipo') == 'alta' for t in self.tides], dtype=bool)
+
+    def __len__(self):
+        return len(self.tides)
+
+    def neighbours(self, dt):
+        """
+        Extremos imediatamente anterior (ou igual) e posterior a dt
+
+        Returns:
+            Tuple: (anterior, próximo); qualquer um pode ser None nas bordas
+        """
+        i = bisect_right(self.times, (dt - EPOCH).total_seconds())
+        previous = self.tides[i - 1] if i > 0 else None
+        following = self.tides[i] if i < len(self.tides) else None
+        return previous, following
+
+    def next_tide(self, dt):
+        """Próximo extremo estritamente após dt, ou None"""
+        return self.neighbours(dt)[1]
+
+    def current(self, dt):
+        """
+        Maré em dt, interpolada entre os extremos que a delimitam
+
+        Args:
+            dt: Horário de referência
+
+        Returns:
+            dict: 'hora', 'altura' e 'status' ('enchente'/'vazante'), ou None se
+                  dt não estiver entre o primeiro e o último extremo conhecidos
+        """
+        previous, following = self.neighbours(dt)
+        if previous is None or (following is None and previous['hora'] != dt.strftime(TIME_FORMAT)):
+            return None
+        height = float(self.heights_at([dt])[0])
+        if following is not None:
+            status = 'enchente' if following.get('tipo') == 'alta' else 'vazante'
+        else:
+            # Exatamente no último extremo: depois de uma preamar a maré vaza
+            status = 'vazante' if previous.get('tipo') == 'alta' else 'enchente'
+        return {'hora': dt.strftime(TIME_FORMAT), 'altura': round(height, 2), 'status': status}
+
+    def heights_at(self, timestamps):
+        """
+        Alturas interpoladas para vários horários de uma vez (vetorizado)
+
+        Args:
+            timestamps: Sequência de datetime ou array datetime64
+
+        Returns:
+            np.ndarray: Alturas em metros (NaN fora do intervalo do índice,
+                        que inclui os dois extremos das pontas)
+        """
+        seconds = self._to_seconds(timestamps)
+        result = np.full(seconds.shape, np.nan)
+        if self._times_array.size < 2:
+            return result
+        i = np.searchsorted(self._times_array, seconds, side='right')
+        # No último extremo, interpola o último intervalo até o fim (fração 1)
+        i[seconds == self._times_array[-1]] = self._times_array.size - 1
+        inside = (i > 0) & (i < self._times_array.size)
+        lo = i[inside] - 1
+        t0, t1 = self._times_array[lo], self._times_array[lo + 1]
+        h0, h1 = self._heights_array[lo], self._heights_array[lo + 1]
+        fraction = (seconds[inside] - t0) / (t1 - t0)
+        result[inside] = h0 + (h1 - h0) * (1 - np.cos(np.pi * fraction)) / 2
+        return result
+
+    def rising_at(self, timestamps):
+        """
+        Indica, para vários horários, se a maré está enchendo
+
+        Returns:
+            np.ndarray: True para enchente (próximo extremo é alta); False caso
+                        contrário ou fora do intervalo do índice
+        """
+        seconds = self._to_seconds(timestamps)
+        i = np.searchsorted(self._times_array, seconds, side='right')
+        rising = np.zeros(seconds.shape, dtype=bool)
+        inside = i < self._times_array.size
+        rising[inside] = self._high_array[i[inside]]
+        return rising
+
+    @staticmethod
+    def _to_seconds(timestamps):
+        values = np.asarray(timestamps)
+        if np.issubdtype(values.dtype, np.datetime64):
+            return (values - np.datetime64('1970-01-01T00:00')).astype('timedelta64[s]').astype(np.float64)
+        return np.array([(dt - EPOCH).total_seconds() for dt in values], dtype=np.float64)
+
+# Tábua aberta por caminho: {caminho absoluto: (data de modificação, TideTable)}
+_open_tables = {}
+
+def open_tide_table(path=None):
+    """
+    Abre (uma vez por processo) a tábua mapeada em memória
+
+    Args:
+        path: Caminho do arquivo (padrão: DEFAULT_TABLE_PATH)
+
+    Returns:
+        TideTable: Tábua aberta ou None se o arquivo não existir
+    """
+    path = path or DEFAULT_TABLE_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    # Se a tábua for regenerada, a versão anterior é substituída (e seu mapeamento liberado)
+    path = os.path.abspath(path)
+    cached = _open_tables.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, TideTable(path))
+        _open_tables[path] = cached
+    return cached[1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera a tábua de marés binária (previsão harmônica aproximada)")
+    parser.add_argument("--saida", default=DEFAULT_TABLE_PATH, help="Arquivo de saída")
+    parser.add_argument("--inicio", type=int, default=datetime.now().year, help="Ano inicial")
+    parser.add_argument("--anos", type=int, default=3, help="Número de anos")
+    args = parser.parse_args()
+    build_tide_table(args.saida, datetime(args.inicio, 1, 1), args.anos)
+    table = TideTable(args.saida)
+    print(f"Tábua gravada em {args.saida}: {table.start:%d/%m/%Y} a {table.end:%d/%m/%Y}, "
+          f"{table.extrema_minutes.size} extremos")
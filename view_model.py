@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Modelo de visualização compartilhado - Monitor de Maré e Clima - Recife
+
+Os cards, os gráficos (Plotly e Matplotlib) e o e-mail de alerta exibem os
+mesmos campos derivados dos dados brutos: horários convertidos, rótulos de
+maré, curva de maré interpolada e a divisão da chuva em passado e futuro.
+Este módulo deriva tudo em uma única passada por snapshot dos dados e guarda
+o resultado por versão do snapshot, para que o custo de cada reexecução não
+cresça com o número de componentes. Não depende do Streamlit.
+
+O modelo é compartilhado entre sessões e não deve ser alterado por quem o lê.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from tide_table import TideEventIndex
+
+# Formato dos horários nos dados de previsão e de maré
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# Intervalo entre pontos da curva de maré interpolada
+TIDE_CURVE_STEP_MINUTES = 30
+
+# Janela de chuva exibida antes e depois do momento atual (horas)
+PRECIPITATION_WINDOW_HOURS = 24
+
+# Modelos mantidos em cache (poucos snapshots convivem: dados simulados e reais)
+MAX_CACHED_VIEWS = 8
+
+def snapshot_digest(data):
+    """Hash do conteúdo de um dict de dados (igual para cópias do mesmo snapshot)"""
+    payload = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _parse_time(text):
+    try:
+        return datetime.strptime(text or '', TIME_FORMAT)
+    except ValueError:
+        return None
+
+def _tide_label(kind):
+    return "Alta" if kind == 'alta' else "Baixa"
+
+def _weather_view(weather_data):
+    """Campos do card de condições atuais, já formatados"""
+    source = weather_data.get('fonte')
+    updated = weather_data.get('ultima_atualizacao', 'N/A')
+    return {
+        'temperatura': f"{weather_data.get('temperatura', 'N/A')}°C",
+        'sensacao': f"{weather_data.get('sensacao_termica', 'N/A')}°C Sensação",
+        'condicao': weather_data.get('condicao', 'N/A'),
+        'precipitacao': f"{weather_data.get('precipitacao_mm', 0)} mm",
+        'pressao': f"{weather_data.get('pressao_hpa', 'N/A')} hPa",
+        'umidade': f"{weather_data.get('umidade', 'N/A')}%",
+        'vento': f"{weather_data.get('vento_kph', 'N/A')} km/h {weather_data.get('direcao_vento', '')}".rstrip(),
+        'atualizado': updated,
+        'rodape': f"Atualizado em: {updated}" + (f" | Fonte: {source}" if source else ""),
+    }
+
+def _tide_view(tide_data):
+    """Maré atual, próxima e máxima, eventos do dia e curva interpolada"""
+    current = tide_data.get('mare_atual', {})
+    next_tide = tide_data.get('proxima_mare', {})
+    highest = tide_data.get('mare_maxima', {})
+
+    events = [
+        {
+            'hora': tide.get('hora', ''),
+            'tempo': _parse_time(tide.get('hora')),
+            'tipo': _tide_label(tide.get('tipo')),
+            'altura': tide.get('altura', 'N/A'),
+            'texto': f"{tide.get('hora', '')}: {_tide_label(tide.get('tipo'))} de {tide.get('altura', 'N/A')} m",
+        }
+        for tide in tide_data.get('mares', [])
+    ]
+    timed = [event for event in events if event['tempo'] is not None]
+
+    curve = None
+    if len(timed) >= 2:
+        # Curva em grade regular, interpolada entre os extremos vizinhos
+        # (o índice inclui as marés de ontem e amanhã quando disponíveis)
+        index = TideEventIndex(tide_data.get('mares_estendidas') or tide_data.get('mares', []))
+        grid = np.arange(
+            np.datetime64(timed[0]['tempo'], 'm'),
+            np.datetime64(timed[-1]['tempo'], 'm') + 1,
+            np.timedelta64(TIDE_CURVE_STEP_MINUTES, 'm')
+        )
+        curve = {'tempos': grid, 'alturas': index.heights_at(grid)}
+
+    return {
+        'altura_atual': current.get('altura', 'N/A'),
+        'status': "Enchente" if current.get('status') == 'enchente' else "Vazante",
+        'atualizado': current.get('hora', 'N/A'),
+        'proxima': {
+            'tipo': _tide_label(next_tide.get('tipo')),
+            'altura': next_tide.get('altura', 'N/A'),
+            'hora': next_tide.get('hora', 'N/A'),
+        },
+        'maxima': {'altura': highest.get('altura', 'N/A'), 'hora': highest.get('hora', 'N/A')},
+        'eventos': events,
+        # Extremos com horário válido, em séries prontas para os gráficos
+        'tempos': [event['tempo'] for event in timed],
+        'alturas': [event['altura'] if isinstance(event['altura'], (int, float)) else 0 for event in timed],
+        'tipos': [event['tipo'] for event in timed],
+        'curva': curve,
+    }
+
+def _precipitation_view(forecast_data, now):
+    """Chuva horária em torno de `now`, dividida em passado e futuro, e acumulados"""
+    start = now - timedelta(hours=PRECIPITATION_WINDOW_HOURS)
+    end = now + timedelta(hours=PRECIPITATION_WINDOW_HOURS)
+    past = {'tempos': [], 'valores': []}
+    future = {'tempos': [], 'valores': []}
+    for hour in forecast_data.get('horas', []):
+        hour_time = _parse_time(hour.get('hora'))
+        if hour_time is None or not start <= hour_time <= end:
+            continue
+        target = past if hour_time <= now else future
+        target['tempos'].append(hour_time)
+        target['valores'].append(hour.get('precipitacao', 0))
+
+    last_24h = forecast_data.get('precipitacao_24h', 0)
+    next_24h = forecast_data.get('precipitacao_proximas_24h', 0)
+    numeric = all(isinstance(value, (int, float)) for value in (last_24h, next_24h))
+    return {
+        'passado': past,
+        'futuro': future,
+        'maximo': max(past['valores'] + future['valores'], default=0),
+        'ultimas_24h': last_24h,
+        'proximas_24h': next_24h,
+        'variacao': round(next_24h - last_24h, 1) if numeric else None,
+    }
+
+def build_view_model(weather_data, forecast_data, tide_data, now=None):
+    """
+    Deriva, em uma passada, todos os campos exibidos a partir de um snapshot
+
+    Args:
+        weather_data: Dados meteorológicos atuais
+        forecast_data: Dados de previsão
+        tide_data: Dados de maré
+        now: Momento de referência da divisão passado/futuro (padrão: agora;
+             arredondado para o minuto)
+
+    Returns:
+        dict: 'agora', 'clima' (textos do card), 'mare' (atual, próxima,
+              máxima, eventos, séries e 'curva') e 'precipitacao' ('passado'
+              e 'futuro' com 'tempos' e 'valores', 'maximo' e acumulados)
+    """
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    return {
+        'agora': now,
+        'clima': _weather_view(weather_data),
+        'mare': _tide_view(tide_data),
+        'precipitacao': _precipitation_view(forecast_data, now),
+    }
+
+class ViewModelCache:
+    """
+    Classe para reaproveitar o modelo de visualização de um mesmo snapshot
+    """
+
+    def __init__(self, max_entries: int = MAX_CACHED_VIEWS):
+        self.max_entries = max_entries
+        self.builds = 0
+        self._entries = OrderedDict()
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, data):
+        """Hash do conteúdo, calculado uma vez por objeto enquanto ele estiver guardado"""
+        with self._lock:
+            known = self._digests.get(id(data))
+            # O próprio objeto fica guardado: o identificador não é reutilizado
+            if known is not None and known[0] is data:
+                self._digests.move_to_end(id(data))
+                return known[1]
+        digest = snapshot_digest(data)
+        with self._lock:
+            self._digests[id(data)] = (data, digest)
+            while len(self._digests) > 3 * self.max_entries:
+                self._digests.popitem(last=False)
+        return digest
+
+    def get(self, weather_data, forecast_data, tide_data, now=None):
+        """
+        Modelo do snapshot (construído apenas na primeira chamada de cada minuto)
+
+        A versão do snapshot é o hash do conteúdo dos três dicts: cópias
+        iguais (como as que o cache SQLite desserializa em cada processo)
+        reaproveitam o mesmo modelo. O hash de cada objeto é lembrado
+        enquanto ele estiver em uso, pois os dados nunca são alterados.
+        """
+        now = (now or datetime.now()).replace(second=0, microsecond=0)
+        key = (self._digest(weather_data), self._digest(forecast_data), self._digest(tide_data), now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        view = build_view_model(weather_data, forecast_data, tide_data, now)
+        with self._lock:
+            self._entries[key] = view
+            self.builds += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return view
+
+_default_cache = ViewModelCache()
+
+def get_view_model(weather_data, forecast_data, tide_data, now=None):
+    """Modelo de visualização do snapshot, pelo cache padrão do processo"""
+    return _default_cache.get(weather_data, forecast_data, tide_data, now)
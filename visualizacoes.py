@@ -8,174 +8,93 @@ Este módulo contém funções para criar gráficos e visualizações para a apl
 """
 
 import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.figure import Figure
 import numpy as np
 from datetime import datetime, timedelta
+from functools import partial
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 
+from chart_renderer import create_matplotlib_graphs
+from view_model import TIDE_CURVE_STEP_MINUTES, build_view_model
+
 def load_css():
     """Carrega o arquivo CSS personalizado"""
     with open('style.css') as f:
         st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
-def create_matplotlib_graphs(forecast_data, tide_data):
+# Layout compartilhado pelos gráficos Plotly. Dispensa o template 'plotly_dark',
+# que sozinho ocupa a maior parte do JSON enviado ao navegador a cada rerun.
+COMPACT_LAYOUT = dict(
+    template='none',
+    plot_bgcolor='#2D2D2D',
+    paper_bgcolor='#1E1E1E',
+    font=dict(color='#FFFFFF'),
+    hovermode='closest',
+    margin=dict(l=40, r=40, t=60, b=40)
+)
+COMPACT_AXIS = dict(showgrid=True, gridwidth=1, gridcolor='rgba(255,255,255,0.2)', zeroline=False)
+
+def _compact_values(values, decimals=2):
+    """Arredonda e converte valores para float32 (serializados como array tipado em base64)"""
+    return np.round(np.asarray(values, dtype=np.float64), decimals).astype(np.float32)
+
+def _regular_axis(times):
     """
-    Cria gráficos usando Matplotlib para exibição no Streamlit
-    
+    Retorna (x0, dx em ms) se os horários forem igualmente espaçados, ou None
+
+    Eixos regulares dispensam o array de datas no JSON da figura.
+    """
+    if len(times) < 2:
+        return None
+    step = times[1] - times[0]
+    if step.total_seconds() <= 0:
+        return None
+    for previous, current in zip(times, times[1:]):
+        if current - previous != step:
+            return None
+    return times[0], step.total_seconds() * 1000
+
+def _time_axis(times):
+    """Argumentos de eixo x compactos para um traço Plotly"""
+    regular = _regular_axis(times)
+    if regular:
+        return dict(x0=regular[0], dx=regular[1])
+    return dict(x=times)
+
+def figure_json_bytes(fig):
+    """
+    Calcula o tamanho em bytes do JSON da figura enviado ao navegador
+
     Args:
-        forecast_data: Dados de previsão meteorológica
-        tide_data: Dados de maré
-        
+        fig: Figura do Plotly
+
     Returns:
-        Figure: Figura do Matplotlib com os gráficos
+        int: Número de bytes do JSON serializado
     """
-    # Configuração do tema escuro
-    plt.style.use('dark_background')
-    
-    # Cria figura com dois subplots
-    fig = Figure(figsize=(10, 8), facecolor='#1E1E1E')
-    
-    # Gráfico de maré
-    ax1 = fig.add_subplot(211)
-    
-    # Dados de maré
-    tide_times = []
-    tide_heights = []
-    
-    # Adiciona marés do dia
-    for tide in tide_data.get('mares', []):
-        try:
-            tide_time = datetime.strptime(tide.get('hora', ''), "%Y-%m-%d %H:%M")
-            tide_times.append(tide_time)
-            tide_heights.append(tide.get('altura', 0))
-        except ValueError:
-            continue
-    
-    # Se temos pelo menos dois pontos, plota o gráfico de maré
-    if len(tide_times) >= 2:
-        # Adiciona pontos intermediários para suavizar a curva
-        smooth_times = []
-        smooth_heights = []
-        
-        for i in range(len(tide_times) - 1):
-            # Adiciona o ponto atual
-            smooth_times.append(tide_times[i])
-            smooth_heights.append(tide_heights[i])
-            
-            # Adiciona pontos intermediários
-            start_time = tide_times[i]
-            end_time = tide_times[i + 1]
-            start_height = tide_heights[i]
-            end_height = tide_heights[i + 1]
-            
-            # Calcula a diferença de tempo em horas
-            time_diff = (end_time - start_time).total_seconds() / 3600
-            
-            # Adiciona pontos a cada 30 minutos
-            for j in range(1, int(time_diff * 2)):
-                interp_time = start_time + timedelta(minutes=30 * j)
-                # Interpolação linear
-                ratio = j / (time_diff * 2)
-                interp_height = start_height + ratio * (end_height - start_height)
-                
-                smooth_times.append(interp_time)
-                smooth_heights.append(interp_height)
-        
-        # Adiciona o último ponto
-        if tide_times:
-            smooth_times.append(tide_times[-1])
-            smooth_heights.append(tide_heights[-1])
-        
-        # Plota a linha de maré
-        ax1.plot(smooth_times, smooth_heights, color='#3498DB', linewidth=2)
-        
-        # Plota os pontos de maré conhecidos
-        ax1.scatter(tide_times, tide_heights, color='#3498DB', s=50, zorder=5)
-        
-        # Adiciona linha horizontal para maré atual
-        current_height = tide_data.get('mare_atual', {}).get('altura', 0)
-        ax1.axhline(y=current_height, color='#F39C12', linestyle='--', alpha=0.7)
-        
-        # Adiciona texto para maré atual
-        ax1.text(tide_times[0], current_height, f"Atual: {current_height} m",
-                color='#F39C12', ha='left', va='bottom')
-    
-    # Configura o gráfico de maré
-    ax1.set_title("Evolução da Maré", color='#FFFFFF')
-    ax1.set_ylabel("Altura (m)", color='#FFFFFF')
-    ax1.tick_params(axis='both', colors='#FFFFFF')
-    ax1.grid(True, alpha=0.3)
-    
-    # Formata o eixo x para exibir apenas horas
-    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    
-    # Cria subplot para precipitação
-    ax2 = fig.add_subplot(212)
-    
-    # Dados de precipitação
-    precip_times = []
-    precip_values = []
-    
-    # Adiciona dados de precipitação das últimas 24h e próximas 24h
-    now = datetime.now()
-    start_time = now - timedelta(hours=24)
-    end_time = now + timedelta(hours=24)
-    
-    for hour_data in forecast_data.get('horas', []):
-        try:
-            hour_time = datetime.strptime(hour_data.get('hora', ''), "%Y-%m-%d %H:%M")
-            if start_time <= hour_time <= end_time:
-                precip_times.append(hour_time)
-                precip_values.append(hour_data.get('precipitacao', 0))
-        except ValueError:
-            continue
-    
-    # Plota barras de precipitação
-    if precip_times:
-        # Cores diferentes para passado e futuro
-        colors = []
-        for time_point in precip_times:
-            if time_point <= now:
-                colors.append('#2ECC71')  # Verde para passado
-            else:
-                colors.append('#1ABC9C')  # Verde-água para futuro
-        
-        ax2.bar(precip_times, precip_values, width=0.02, color=colors, alpha=0.7)
-        
-        # Adiciona linha vertical para o momento atual
-        ax2.axvline(x=now, color='#F39C12', linestyle='--', alpha=0.7)
-        ax2.text(now, max(precip_values) * 0.9 if precip_values else 1, "Agora",
-                color='#F39C12', ha='center', va='top', rotation=90)
-    
-    # Configura o gráfico de precipitação
-    ax2.set_title("Precipitação", color='#FFFFFF')
-    ax2.set_ylabel("Precipitação (mm)", color='#FFFFFF')
-    ax2.set_xlabel("Hora", color='#FFFFFF')
-    ax2.tick_params(axis='both', colors='#FFFFFF')
-    ax2.grid(True, alpha=0.3)
-    
-    # Formata o eixo x para exibir apenas horas
-    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    
-    # Ajusta o layout
-    fig.tight_layout()
-    
-    return fig
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
 
-def create_plotly_graphs(forecast_data, tide_data):
+def create_plotly_graphs(forecast_data, tide_data, view=None):
     """
     Cria gráficos interativos usando Plotly para exibição no Streamlit
+
+    A figura é montada para um JSON compacto: valores arredondados em arrays
+    tipados, eixos regulares descritos por x0/dx, hovertemplates no lugar de
+    textos por ponto e layout compartilhado sem template embutido.
     
     Args:
         forecast_data: Dados de previsão meteorológica
         tide_data: Dados de maré
+        view: Modelo de visualização do snapshot (ver view_model; montado
+              a partir dos dados se omitido)
         
     Returns:
         go.Figure: Figura do Plotly com os gráficos
     """
+    view = view or build_view_model({}, forecast_data, tide_data)
+    tide = view['mare']
+    precipitation = view['precipitacao']
+
     # Cria figura com dois subplots
     fig = make_subplots(
         rows=2, 
@@ -184,197 +103,87 @@ def create_plotly_graphs(forecast_data, tide_data):
         vertical_spacing=0.15
     )
     
-    # Configuração de tema escuro
-    template = 'plotly_dark'
-    
-    # Dados de maré
-    tide_times = []
-    tide_heights = []
-    tide_types = []
-    
-    # Adiciona marés do dia
-    for tide in tide_data.get('mares', []):
-        try:
-            tide_time = datetime.strptime(tide.get('hora', ''), "%Y-%m-%d %H:%M")
-            tide_times.append(tide_time)
-            tide_heights.append(tide.get('altura', 0))
-            tide_types.append(tide.get('tipo', ''))
-        except ValueError:
-            continue
-    
     # Se temos pelo menos dois pontos, plota o gráfico de maré
-    if len(tide_times) >= 2:
-        # Adiciona pontos intermediários para suavizar a curva
-        smooth_times = []
-        smooth_heights = []
-        
-        for i in range(len(tide_times) - 1):
-            # Adiciona o ponto atual
-            smooth_times.append(tide_times[i])
-            smooth_heights.append(tide_heights[i])
-            
-            # Adiciona pontos intermediários
-            start_time = tide_times[i]
-            end_time = tide_times[i + 1]
-            start_height = tide_heights[i]
-            end_height = tide_heights[i + 1]
-            
-            # Calcula a diferença de tempo em horas
-            time_diff = (end_time - start_time).total_seconds() / 3600
-            
-            # Adiciona pontos a cada 30 minutos
-            for j in range(1, int(time_diff * 2)):
-                interp_time = start_time + timedelta(minutes=30 * j)
-                # Interpolação linear
-                ratio = j / (time_diff * 2)
-                interp_height = start_height + ratio * (end_height - start_height)
-                
-                smooth_times.append(interp_time)
-                smooth_heights.append(interp_height)
-        
-        # Adiciona o último ponto
-        if tide_times:
-            smooth_times.append(tide_times[-1])
-            smooth_heights.append(tide_heights[-1])
-        
-        # Plota a linha de maré
+    tide_times = tide['tempos']
+    if tide['curva'] is not None:
+        # Plota a linha de maré (curva suavizada em grade regular)
         fig.add_trace(
             go.Scatter(
-                x=smooth_times, 
-                y=smooth_heights,
+                x0=tide_times[0],
+                dx=TIDE_CURVE_STEP_MINUTES * 60 * 1000,
+                y=_compact_values(tide['curva']['alturas']),
                 mode='lines',
                 name='Maré',
-                line=dict(color='#3498DB', width=3)
+                line=dict(color='#3498DB', width=3),
+                hovertemplate="%{x|%H:%M}: %{y:.2f} m<extra></extra>"
             ),
             row=1, col=1
         )
         
         # Plota os pontos de maré conhecidos
-        hover_texts = []
-        for i, tide_type in enumerate(tide_types):
-            type_text = "Alta" if tide_type == "alta" else "Baixa"
-            hover_texts.append(f"Maré {type_text}: {tide_heights[i]} m")
-            
         fig.add_trace(
             go.Scatter(
                 x=tide_times, 
-                y=tide_heights,
+                y=_compact_values(tide['alturas']),
                 mode='markers',
                 name='Pontos de Maré',
                 marker=dict(color='#3498DB', size=10),
-                text=hover_texts,
-                hoverinfo='text+x'
+                customdata=tide['tipos'],
+                hovertemplate="Maré %{customdata}: %{y:.2f} m<br>%{x|%H:%M}<extra></extra>"
             ),
             row=1, col=1
         )
         
         # Adiciona linha horizontal para maré atual
         current_height = tide_data.get('mare_atual', {}).get('altura', 0)
-        current_status = tide_data.get('mare_atual', {}).get('status', '')
-        status_text = "Enchente" if current_status == "enchente" else "Vazante"
-        
         fig.add_trace(
             go.Scatter(
                 x=[tide_times[0], tide_times[-1]],
                 y=[current_height, current_height],
                 mode='lines',
-                name=f'Atual: {current_height} m ({status_text})',
-                line=dict(color='#F39C12', width=2, dash='dash')
+                name=f"Atual: {current_height} m ({tide['status']})",
+                line=dict(color='#F39C12', width=2, dash='dash'),
+                hoverinfo='skip'
             ),
             row=1, col=1
         )
     
-    # Dados de precipitação
-    precip_times = []
-    precip_values = []
-    precip_hover = []
-    
-    # Adiciona dados de precipitação das últimas 24h e próximas 24h
-    now = datetime.now()
-    start_time = now - timedelta(hours=24)
-    end_time = now + timedelta(hours=24)
-    
-    for hour_data in forecast_data.get('horas', []):
-        try:
-            hour_time = datetime.strptime(hour_data.get('hora', ''), "%Y-%m-%d %H:%M")
-            if start_time <= hour_time <= end_time:
-                precip_times.append(hour_time)
-                precip_value = hour_data.get('precipitacao', 0)
-                precip_values.append(precip_value)
-                
-                # Texto para hover
-                time_str = hour_time.strftime("%H:%M")
-                precip_hover.append(f"Hora: {time_str}<br>Precipitação: {precip_value} mm")
-        except ValueError:
-            continue
-    
-    # Plota barras de precipitação
-    if precip_times:
-        # Cores diferentes para passado e futuro
-        past_times = []
-        past_values = []
-        past_hover = []
-        future_times = []
-        future_values = []
-        future_hover = []
-        
-        for i, time_point in enumerate(precip_times):
-            if time_point <= now:
-                past_times.append(time_point)
-                past_values.append(precip_values[i])
-                past_hover.append(precip_hover[i])
-            else:
-                future_times.append(time_point)
-                future_values.append(precip_values[i])
-                future_hover.append(precip_hover[i])
-        
-        # Precipitação passada
-        if past_times:
+    # Plota barras de precipitação das últimas 24h e próximas 24h (cores diferentes)
+    precip_hover = "Hora: %{x|%H:%M}<br>Precipitação: %{y:.1f} mm<extra></extra>"
+    for series, name, color in (
+        (precipitation['passado'], 'Últimas 24h', '#2ECC71'),
+        (precipitation['futuro'], 'Próximas 24h', '#1ABC9C'),
+    ):
+        if series['tempos']:
             fig.add_trace(
                 go.Bar(
-                    x=past_times,
-                    y=past_values,
-                    name='Últimas 24h',
-                    marker_color='#2ECC71',
-                    text=past_hover,
-                    hoverinfo='text'
+                    y=_compact_values(series['valores'], 1),
+                    name=name,
+                    marker_color=color,
+                    hovertemplate=precip_hover,
+                    **_time_axis(series['tempos'])
                 ),
                 row=2, col=1
             )
-        
-        # Precipitação futura
-        if future_times:
-            fig.add_trace(
-                go.Bar(
-                    x=future_times,
-                    y=future_values,
-                    name='Próximas 24h',
-                    marker_color='#1ABC9C',
-                    text=future_hover,
-                    hoverinfo='text'
-                ),
-                row=2, col=1
-            )
-        
+    
+    if precipitation['passado']['tempos'] or precipitation['futuro']['tempos']:
         # Adiciona linha vertical para o momento atual
+        max_precip = precipitation['maximo']
         fig.add_trace(
             go.Scatter(
-                x=[now, now],
-                y=[0, max(precip_values) * 1.1 if precip_values else 1],
+                x=[view['agora']] * 2,
+                y=[0, round(max_precip * 1.1, 1) if max_precip else 1],
                 mode='lines',
                 name='Agora',
-                line=dict(color='#F39C12', width=2, dash='dash')
+                line=dict(color='#F39C12', width=2, dash='dash'),
+                hoverinfo='skip'
             ),
             row=2, col=1
         )
     
     # Configurações de layout
     fig.update_layout(
-        template=template,
         height=700,
-        plot_bgcolor='#2D2D2D',
-        paper_bgcolor='#1E1E1E',
-        font=dict(color='#FFFFFF'),
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -382,40 +191,196 @@ def create_plotly_graphs(forecast_data, tide_data):
             xanchor="right",
             x=1
         ),
-        margin=dict(l=40, r=40, t=60, b=40)
+        **COMPACT_LAYOUT
     )
     
     # Configurações dos eixos
-    fig.update_xaxes(
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='rgba(255,255,255,0.2)',
-        row=1, col=1
+    fig.update_xaxes(**COMPACT_AXIS)
+    fig.update_xaxes(title_text="Hora", row=2, col=1)
+    fig.update_yaxes(title_text="Altura (m)", row=1, col=1, **COMPACT_AXIS)
+    fig.update_yaxes(title_text="Precipitação (mm)", row=2, col=1, **COMPACT_AXIS)
+    
+    return fig
+
+# Largura de referência do gráfico em pixels (um ponto por pixel após a redução)
+DEFAULT_VIEWPORT_WIDTH = 1200
+
+# Acima deste número de pontos na janela visível os traços passam a usar WebGL
+WEBGL_POINT_THRESHOLD = 2000
+
+def lttb_downsample(x, y, n_out):
+    """
+    Reduz uma série com o algoritmo Largest-Triangle-Three-Buckets (LTTB)
+
+    Mantém o primeiro e o último ponto e, em cada balde intermediário, o ponto
+    que forma o maior triângulo com o ponto escolhido anteriormente e a média
+    do balde seguinte, preservando picos e vales da curva.
+
+    Args:
+        x: Valores do eixo x (numéricos e crescentes)
+        y: Valores do eixo y
+        n_out: Número de pontos desejado
+
+    Returns:
+        np.ndarray: Índices dos pontos selecionados
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Baldes para os pontos 1..n-2 e médias de cada balde via somas acumuladas
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = ends - starts
+    avg_x = np.append((cum_x[ends] - cum_x[starts]) / counts, x[-1])
+    avg_y = np.append((cum_y[ends] - cum_y[starts]) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = starts[i], ends[i]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i + 1]) * (y[s:e] - ay) - (ax - x[s:e]) * (avg_y[i + 1] - ay))
+        a = s + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def create_long_range_graph(times, tide_heights, precipitation, width_px, x_range=None):
+    """
+    Cria gráfico de longo período com redução de pontos no servidor
+
+    Apenas a janela visível é considerada e reduzida com LTTB para cerca de um
+    ponto por pixel; acima de WEBGL_POINT_THRESHOLD pontos na janela visível
+    (antes da redução) os traços são renderizados com WebGL.
+
+    Args:
+        times: Array de horários (ordenado)
+        tide_heights: Alturas de maré correspondentes
+        precipitation: Precipitação correspondente
+        width_px: Largura do gráfico em pixels, informada por quem o exibe
+        x_range: Tupla (início, fim) com a janela visível ou None para tudo
+
+    Returns:
+        go.Figure: Figura do Plotly com maré e precipitação
+    """
+    times = np.asarray(times, dtype='datetime64[ms]')
+    tide_heights = np.asarray(tide_heights)
+    precipitation = np.asarray(precipitation)
+
+    # Recorta a janela visível por busca binária (os horários estão ordenados)
+    if x_range:
+        lo = np.searchsorted(times, np.datetime64(x_range[0], 'ms'), side='left')
+        hi = np.searchsorted(times, np.datetime64(x_range[1], 'ms'), side='right')
+        times, tide_heights, precipitation = times[lo:hi], tide_heights[lo:hi], precipitation[lo:hi]
+
+    visible = times.size
+    n_points = max(3, int(width_px))
+    x_num = times.astype(np.int64)
+    tide_idx = lttb_downsample(x_num, tide_heights, n_points)
+    precip_idx = lttb_downsample(x_num, precipitation, n_points)
+    # Os pontos desenhados ficam limitados à largura; o WebGL compensa nas
+    # janelas densas, em que cada pixel resume muitos pontos e o zoom é frequente
+    trace = go.Scattergl if visible > WEBGL_POINT_THRESHOLD else go.Scatter
+
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        subplot_titles=("Maré", "Precipitação"),
+        vertical_spacing=0.1
     )
-    fig.update_yaxes(
-        title_text="Altura (m)",
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='rgba(255,255,255,0.2)',
+    fig.add_trace(
+        trace(
+            x=times[tide_idx],
+            y=_compact_values(tide_heights[tide_idx]),
+            mode='lines',
+            name='Maré',
+            line=dict(color='#3498DB', width=1.5),
+            hovertemplate="%{x|%d/%m %H:%M}: %{y:.2f} m<extra></extra>"
+        ),
         row=1, col=1
     )
-    fig.update_xaxes(
-        title_text="Hora",
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='rgba(255,255,255,0.2)',
+    fig.add_trace(
+        trace(
+            x=times[precip_idx],
+            y=_compact_values(precipitation[precip_idx], 1),
+            mode='lines',
+            name='Precipitação',
+            fill='tozeroy',
+            line=dict(color='#2ECC71', width=1),
+            hovertemplate="%{x|%d/%m %H:%M}: %{y:.1f} mm<extra></extra>"
+        ),
         row=2, col=1
     )
-    fig.update_yaxes(
-        title_text="Precipitação (mm)",
-        showgrid=True, 
-        gridwidth=1, 
-        gridcolor='rgba(255,255,255,0.2)',
-        row=2, col=1
+
+    fig.update_layout(
+        height=600,
+        showlegend=False,
+        dragmode='select',
+        selectdirection='h',
+        **COMPACT_LAYOUT
     )
-    
+    fig.update_xaxes(**COMPACT_AXIS)
+    fig.update_yaxes(title_text="Altura (m)", row=1, col=1, **COMPACT_AXIS)
+    fig.update_yaxes(title_text="Precipitação (mm)", row=2, col=1, **COMPACT_AXIS)
+
     return fig
 
+def _zoom_long_range_chart(chart_key):
+    """Callback de seleção: amplia o gráfico de longo período para o intervalo escolhido"""
+    event = st.session_state.get(chart_key)
+    boxes = event.selection.get('box', []) if event else []
+    if boxes and boxes[0].get('x'):
+        st.session_state.history_range = tuple(sorted(boxes[0]['x']))
+        st.session_state.history_zoom += 1
+
+def reset_long_range_zoom():
+    """Callback que restaura o período completo (botão e troca de período)"""
+    st.session_state.history_range = None
+    st.session_state.history_zoom = st.session_state.get('history_zoom', 0) + 1
+
+def render_long_range_chart(times, tide_heights, precipitation, width_px):
+    """
+    Exibe o gráfico de longo período com zoom por seleção
+
+    Selecionar um intervalo no gráfico (arrastando) recarrega apenas essa
+    janela com mais detalhe; o botão de restaurar volta ao período completo.
+    O zoom é aplicado em callbacks, sem st.rerun(), para funcionar também
+    dentro de fragmentos.
+
+    Args:
+        times: Array de horários (ordenado)
+        tide_heights: Alturas de maré correspondentes
+        precipitation: Precipitação correspondente
+        width_px: Largura do gráfico em pixels
+    """
+    if 'history_range' not in st.session_state:
+        st.session_state.history_range = None
+        st.session_state.history_zoom = 0
+
+    x_range = st.session_state.history_range
+    fig = create_long_range_graph(times, tide_heights, precipitation, width_px, x_range)
+
+    # A chave muda a cada zoom para descartar a seleção anterior do widget
+    chart_key = f"history_chart_{st.session_state.history_zoom}"
+    st.plotly_chart(
+        fig,
+        on_select=partial(_zoom_long_range_chart, chart_key),
+        selection_mode="box",
+        key=chart_key
+    )
+
+    if x_range:
+        st.caption(f"Exibindo de {x_range[0][:16]} até {x_range[1][:16]}")
+        st.button("Restaurar período completo", on_click=reset_long_range_zoom)
+    else:
+        st.caption("Arraste sobre o gráfico para ampliar um intervalo com mais detalhe.")
+
 def display_risk_indicator(risk_level, risk_description):
     """
     Exibe o indicador de risco com estilo apropriado
@@ -447,13 +412,16 @@ def display_risk_indicator(risk_level, risk_description):
     # Exibe a descrição do risco
     st.write(risk_description)
 
-def create_weather_card(weather_data):
+def create_weather_card(weather_data, view=None):
     """
     Cria um card estilizado para exibir dados meteorológicos
     
     Args:
         weather_data: Dados meteorológicos
+        view: Modelo de visualização do snapshot (ver view_model)
     """
+    weather = (view or build_view_model(weather_data, {}, {}))['clima']
+
     st.markdown("""
     <div class="data-card">
         <h3>🌦️ Dados Meteorológicos</h3>
@@ -463,93 +431,85 @@ def create_weather_card(weather_data):
     col1, col2 = st.columns([2, 3])
     
     with col1:
-        st.metric(
-            "Temperatura", 
-            f"{weather_data.get('temperatura', 'N/A')}°C", 
-            f"{weather_data.get('sensacao_termica', 'N/A')}°C Sensação"
-        )
+        st.metric("Temperatura", weather['temperatura'], weather['sensacao'])
     
     with col2:
-        st.write(f"**Condição:** {weather_data.get('condicao', 'N/A')}")
-        st.write(f"**Precipitação (agora):** {weather_data.get('precipitacao_mm', 0)} mm")
+        st.write(f"**Condição:** {weather['condicao']}")
+        st.write(f"**Precipitação (agora):** {weather['precipitacao']}")
     
     col3, col4, col5 = st.columns(3)
     
     with col3:
         st.write(f"**Pressão:**")
-        st.write(f"{weather_data.get('pressao_hpa', 'N/A')} hPa")
+        st.write(weather['pressao'])
     
     with col4:
         st.write(f"**Umidade:**")
-        st.write(f"{weather_data.get('umidade', 'N/A')}%")
+        st.write(weather['umidade'])
     
     with col5:
         st.write(f"**Vento:**")
-        st.write(f"{weather_data.get('vento_kph', 'N/A')} km/h {weather_data.get('direcao_vento', '')}")
+        st.write(weather['vento'])
     
-    st.caption(f"Atualizado em: {weather_data.get('ultima_atualizacao', 'N/A')}")
+    st.caption(f"Atualizado em: {weather['atualizado']}")
 
-def create_tide_card(tide_data):
+def create_tide_card(tide_data, view=None):
     """
     Cria um card estilizado para exibir dados de maré
     
     Args:
         tide_data: Dados de maré
+        view: Modelo de visualização do snapshot (ver view_model)
     """
+    tide = (view or build_view_model({}, {}, tide_data))['mare']
+
     st.markdown("""
     <div class="data-card">
         <h3>🌊 Dados de Maré</h3>
     </div>
     """, unsafe_allow_html=True)
     
-    current_tide = tide_data.get('mare_atual', {})
-    status_text = "Enchente" if current_tide.get('status') == 'enchente' else "Vazante"
-    
     col1, col2 = st.columns([2, 3])
     
     with col1:
-        st.metric(
-            "Altura Atual", 
-            f"{current_tide.get('altura', 'N/A')} m", 
-            status_text
-        )
+        st.metric("Altura Atual", f"{tide['altura_atual']} m", tide['status'])
     
     with col2:
-        next_tide = tide_data.get('proxima_mare', {})
-        tide_type = "Alta" if next_tide.get('tipo') == 'alta' else "Baixa"
-        st.write(f"**Próxima Maré:** {tide_type} de {next_tide.get('altura', 'N/A')} m")
-        st.write(f"**Horário:** {next_tide.get('hora', 'N/A')}")
+        next_tide = tide['proxima']
+        st.write(f"**Próxima Maré:** {next_tide['tipo']} de {next_tide['altura']} m")
+        st.write(f"**Horário:** {next_tide['hora']}")
     
     st.write("**Marés do Dia:**")
     
     # Cria uma tabela para as marés do dia
-    tides = tide_data.get('mares', [])
-    if tides:
+    events = tide['eventos']
+    if events:
         # Divide em duas colunas para melhor visualização
         col_left, col_right = st.columns(2)
-        half = len(tides) // 2 + len(tides) % 2
+        half = len(events) // 2 + len(events) % 2
         
         with col_left:
-            for tide in tides[:half]:
-                tide_type_day = "Alta" if tide.get('tipo') == 'alta' else "Baixa"
-                st.write(f"- {tide.get('hora', '')}: {tide_type_day} de {tide.get('altura', 'N/A')} m")
+            for event in events[:half]:
+                st.write(f"- {event['texto']}")
         
         with col_right:
-            for tide in tides[half:]:
-                tide_type_day = "Alta" if tide.get('tipo') == 'alta' else "Baixa"
-                st.write(f"- {tide.get('hora', '')}: {tide_type_day} de {tide.get('altura', 'N/A')} m")
+            for event in events[half:]:
+                st.write(f"- {event['texto']}")
     else:
         st.write("Dados de maré não disponíveis")
     
-    st.caption(f"Atualizado em: {current_tide.get('hora', 'N/A')}")
+    st.caption(f"Atualizado em: {tide['atualizado']}")
 
-def create_precipitation_summary(forecast_data):
+def create_precipitation_summary(forecast_data, view=None):
     """
     Cria um resumo da precipitação
     
     Args:
         forecast_data: Dados de previsão
+        view: Modelo de visualização do snapshot (ver view_model)
     """
+    precipitation = (view or build_view_model({}, forecast_data, {}))['precipitacao']
+
     st.markdown("""
     <div class="data-card">
         <h3>🌧️ Resumo de Precipitação</h3>
@@ -559,21 +519,19 @@ def create_precipitation_summary(forecast_data):
     col1, col2 = st.columns(2)
     
     with col1:
-        precip_24h = forecast_data.get('precipitacao_24h', 0)
         st.metric(
             "Últimas 24h", 
-            f"{precip_24h} mm",
+            f"{precipitation['ultimas_24h']} mm",
             delta=None
         )
     
     with col2:
-        precip_next_24h = forecast_data.get('precipitacao_proximas_24h', 0)
-        delta = round(precip_next_24h - precip_24h, 1)
-        delta_color = "inverse" if delta < 0 else "normal"
+        delta = precipitation['variacao']
+        delta_color = "inverse" if delta is not None and delta < 0 else "normal"
         
         st.metric(
             "Próximas 24h", 
-            f"{precip_next_24h} mm",
-            delta=f"{delta} mm" if delta != 0 else None,
+            f"{precipitation['proximas_24h']} mm",
+            delta=f"{delta} mm" if delta else None,
             delta_color=delta_color
         )
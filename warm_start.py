@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Reinício a quente do Monitor de Maré e Clima - Recife
+
+Depois de um deploy ou reinício, os caches do processo começam vazios: os
+primeiros visitantes esperariam pelas consultas aos provedores e pela
+renderização dos gráficos. Este módulo salva periodicamente em disco o
+último snapshot bom (entradas do cache de dados, estados de risco e imagens
+dos gráficos) e o restaura quando o processo começa, antes da primeira
+consulta.
+
+Entradas que expiraram enquanto o servidor estava parado voltam com uma
+validade curta (RESTORE_GRACE_SECONDS): a primeira página usa o último
+snapshot e a atualização acontece logo depois, como no fallback de
+armazenamento local dos provedores. Snapshots mais antigos que
+DEFAULT_MAX_AGE_HOURS são ignorados.
+
+O snapshot guarda apenas dados simples em JSON, nunca objetos serializados
+com pickle, e só é lido se pertencer ao usuário do processo e não puder ser
+alterado por outros usuários (ver plain_data).
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from plain_data import decode, encode, trusted
+
+# Arquivo do snapshot e intervalo entre gravações (podem ser alterados por variáveis de ambiente)
+DEFAULT_WARM_START_PATH = os.environ.get("RECALERT_WARM_START", "recalert_warm_start.json")
+DEFAULT_SAVE_INTERVAL = float(os.environ.get("RECALERT_WARM_START_INTERVAL", 300))
+
+# Idade máxima de um snapshot restaurado (mesmo limite do armazenamento local dos provedores)
+DEFAULT_MAX_AGE_HOURS = 24
+
+# Validade dada às entradas que expiraram com o servidor parado (segundos)
+RESTORE_GRACE_SECONDS = 300
+
+FORMAT_VERSION = 2
+
+def save_snapshot(path, entries, states=None, images=None):
+    """
+    Grava o snapshot de forma atômica
+
+    Args:
+        path: Arquivo do snapshot
+        entries: Entradas do cache de dados (ver CacheBackend.export)
+        states: Estados de risco (ver RiskTracker.export_states)
+        images: Imagens dos gráficos (ver ChartRenderer.export_images)
+
+    Entradas do cache com valores que não são dados simples ficam de fora.
+
+    Returns:
+        dict: Quantidade salva de entradas, estados e imagens
+    """
+    cache = []
+    for key, value, expires in entries:
+        try:
+            cache.append([key, encode(value), expires])
+        except TypeError:
+            continue
+    payload = {
+        'versao': FORMAT_VERSION,
+        'salvo_em': datetime.now().isoformat(),
+        'cache': cache,
+        'riscos': encode(states or {}),
+        'graficos': encode(images or {'imagens': {}, 'ultimas': {}}),
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    # mkstemp cria o arquivo legível e gravável apenas pelo dono
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return {
+        'entradas': len(cache),
+        'riscos': len(states or {}),
+        'graficos': len((images or {}).get('imagens', {})),
+    }
+
+def load_snapshot(path, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+    """
+    Lê um snapshot salvo
+
+    Returns:
+        dict: Conteúdo do snapshot ou None se não existir, estiver corrompido,
+              for de outra versão, mais antigo que max_age_hours ou puder ter
+              sido alterado por outro usuário
+    """
+    try:
+        if not trusted(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if not isinstance(payload, dict) or payload.get('versao') != FORMAT_VERSION:
+            return None
+        saved_at = datetime.fromisoformat(payload['salvo_em'])
+        payload = {
+            'versao': FORMAT_VERSION,
+            'salvo_em': saved_at,
+            'cache': [(key, decode(value), expires) for key, value, expires in payload['cache']],
+            'riscos': decode(payload['riscos']),
+            'graficos': decode(payload['graficos']),
+        }
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Arquivo truncado ou de uma versão incompatível do código: começa a frio
+        return None
+    if datetime.now() - saved_at > timedelta(hours=max_age_hours):
+        return None
+    return payload
+
+class WarmStart:
+    """
+    Classe para restaurar o snapshot no início do processo e salvá-lo periodicamente
+    """
+
+    def __init__(self, cache, tracker=None, renderer=None, path: str = None,
+                 interval: float = DEFAULT_SAVE_INTERVAL, max_age_hours: float = DEFAULT_MAX_AGE_HOURS):
+        self.cache = cache
+        self.tracker = tracker
+        self.renderer = renderer
+        self.path = path or DEFAULT_WARM_START_PATH
+        self.interval = interval
+        self.max_age_hours = max_age_hours
+        self.restored = None
+        self.last_save = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._save_lock = threading.Lock()
+
+    def restore(self):
+        """
+        Restaura o snapshot salvo, sem substituir o que já estiver em memória
+
+        Returns:
+            dict: 'salvo_em', 'entradas', 'riscos', 'graficos' e 'duracao'
+                  (segundos), ou None se não havia snapshot utilizável
+        """
+        start = time.perf_counter()
+        payload = load_snapshot(self.path, self.max_age_hours)
+        if payload is None:
+            return None
+        self.restored = {
+            'salvo_em': payload['salvo_em'],
+            'entradas': self.cache.restore(payload['cache'], min_ttl=RESTORE_GRACE_SECONDS),
+            'riscos': self.tracker.restore_states(payload['riscos']) if self.tracker is not None else 0,
+            'graficos': self.renderer.restore_images(payload['graficos']) if self.renderer is not None else 0,
+        }
+        self.restored['duracao'] = round(time.perf_counter() - start, 4)
+        return self.restored
+
+    def save(self):
+        """Salva o snapshot atual (ignorado se o cache de dados estiver vazio)"""
+        with self._save_lock:
+            entries = self.cache.export()
+            if not entries:
+                # Nada útil para restaurar: preserva o snapshot anterior
+                return None
+            result = save_snapshot(
+                self.path, entries,
+                self.tracker.export_states() if self.tracker is not None else None,
+                self.renderer.export_images() if self.renderer is not None else None
+            )
+            self.last_save = datetime.now()
+            return result
+
+    def start(self):
+        """Inicia a gravação periódica em segundo plano (e uma gravação final ao sair)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="reinicio-a-quente", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Interrompe a gravação periódica e salva uma última vez"""
+        self._stop.set()
+        try:
+            self.save()
+        except OSError:
+            pass
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.save()
+            except OSError:
+                # Disco cheio ou sem permissão: tenta de novo no próximo intervalo
+                continue
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Notificações por webhook para o Monitor de Maré e Clima - Recife
+
+Este módulo envia alertas assinados (HMAC-SHA256) para vários endpoints HTTP
+ao mesmo tempo: pontes de chat, gateways de SMS e sistemas de incidentes. Cada
+endpoint tem a sua própria fila, thread de entrega, conexões reaproveitadas
+(requests.Session), tempo limite e novas tentativas, de forma que um endpoint
+lento ou fora do ar nunca atrasa os demais.
+
+Para testes locais, `python webhooks.py --receptor 8765 --segredo teste` sobe
+um receptor que valida as assinaturas e imprime os alertas recebidos.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, wait
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from risk_rules import snapshot_inputs
+
+# Arquivo padrão de configuração dos endpoints (pode ser alterado por variável de ambiente)
+DEFAULT_CONFIG_PATH = os.environ.get("RECALERT_WEBHOOKS", "webhooks.json")
+
+# Valores padrão por endpoint
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_ATTEMPTS = 3
+RETRY_BACKOFF = 1.0
+
+SIGNATURE_HEADER = "X-RecAlert-Signature"
+TIMESTAMP_HEADER = "X-RecAlert-Timestamp"
+
+# Diferença máxima aceita entre o horário da assinatura e o do receptor (segundos)
+MAX_SIGNATURE_AGE = 300
+
+class WebhookConfigError(ValueError):
+    """Exceção levantada quando a configuração dos endpoints é inválida"""
+
+def load_endpoints(path=None):
+    """
+    Lê a lista de endpoints do arquivo de configuração
+
+    Formato: {"endpoints": [{"nome": ..., "url": ..., "segredo": ...,
+    "tempo_limite": 5, "tentativas": 3}]}
+
+    Args:
+        path: Caminho do arquivo (padrão: DEFAULT_CONFIG_PATH)
+
+    Returns:
+        list: Endpoints configurados (vazia se o arquivo não existir)
+
+    Raises:
+        WebhookConfigError: Endpoint sem segredo (a assinatura com chave vazia
+                            não autentica nada)
+    """
+    path = path or DEFAULT_CONFIG_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    endpoints = []
+    for i, endpoint in enumerate(config.get('endpoints', [])):
+        if not endpoint.get('url'):
+            continue
+        name = endpoint.get('nome') or f"webhook-{i + 1}"
+        if not endpoint.get('segredo'):
+            raise WebhookConfigError(f"Webhook {name} sem segredo em {path}")
+        endpoints.append({
+            'nome': name,
+            'url': endpoint['url'],
+            'segredo': endpoint['segredo'],
+            'tempo_limite': float(endpoint.get('tempo_limite', DEFAULT_TIMEOUT)),
+            'tentativas': int(endpoint.get('tentativas', DEFAULT_ATTEMPTS)),
+        })
+    return endpoints
+
+def sign_payload(secret, body, timestamp):
+    """
+    Assinatura HMAC-SHA256 de "<timestamp>.<corpo>"
+
+    Incluir o horário na mensagem assinada impede a reutilização de um alerta
+    antigo capturado na rede.
+
+    Args:
+        secret: Segredo compartilhado com o endpoint
+        body: Corpo da requisição (bytes)
+        timestamp: Horário Unix (inteiro) enviado no cabeçalho
+
+    Returns:
+        str: Assinatura no formato "sha256=<hex>"
+    """
+    message = str(timestamp).encode('ascii') + b"." + body
+    digest = hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+def verify_signature(secret, body, timestamp, signature, max_age=MAX_SIGNATURE_AGE):
+    """Confere a assinatura e a idade de um alerta recebido"""
+    try:
+        age = abs(time.time() - int(timestamp))
+    except (TypeError, ValueError):
+        return False
+    if age > max_age:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body, timestamp), signature or "")
+
+def build_alert_payload(weather_data, forecast_data, tide_data, risk_level, risk_description):
+    """
+    Monta o corpo do alerta enviado aos webhooks
+
+    Returns:
+        dict: Evento com identificador único (para deduplicação no receptor)
+    """
+    return {
+        'id': uuid.uuid4().hex,
+        'evento': 'alerta_risco',
+        'nivel': risk_level,
+        'descricao': risk_description,
+        'entradas': snapshot_inputs(weather_data, forecast_data, tide_data),
+        'proxima_mare': tide_data.get('proxima_mare', {}),
+        'enviado_em': datetime.now().isoformat(timespec='seconds'),
+        'cidade': weather_data.get('cidade', "Recife"),
+    }
+
+class _EndpointWorker:
+    """
+    Fila e thread de entrega de um único endpoint
+
+    A sessão HTTP é criada e usada apenas pela thread do endpoint, mantendo a
+    conexão aberta entre alertas.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.queue = queue.Queue()
+        self.stats = {'entregues': 0, 'falhas': 0, 'ultima_latencia': None, 'ultimo_erro': None}
+        self._thread = threading.Thread(
+            target=self._run, name=f"webhook-{endpoint['nome']}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, body, future):
+        self.queue.put((body, future))
+
+    def stop(self):
+        self.queue.put(None)
+
+    def _run(self):
+        import requests
+        session = requests.Session()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    return
+                body, future = item
+                if future.set_running_or_notify_cancel():
+                    future.set_result(self._deliver(session, body))
+        finally:
+            session.close()
+
+    def _deliver(self, session, body):
+        """Entrega um alerta com novas tentativas e espera exponencial"""
+        endpoint = self.endpoint
+        error = None
+        status = None
+        for attempt in range(1, endpoint['tentativas'] + 1):
+            timestamp = int(time.time())
+            headers = {
+                'Content-Type': 'application/json; charset=utf-8',
+                TIMESTAMP_HEADER: str(timestamp),
+                SIGNATURE_HEADER: sign_payload(endpoint['segredo'], body, timestamp),
+            }
+            started = time.monotonic()
+            try:
+                response = session.post(endpoint['url'], data=body, headers=headers,
+                                        timeout=endpoint['tempo_limite'])
+                status = response.status_code
+                # Erros 4xx (exceto 429) não melhoram com novas tentativas
+                if response.ok or (400 <= status < 500 and status != 429):
+                    break
+                error = f"HTTP {status}"
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            if attempt < endpoint['tentativas']:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+        latency = time.monotonic() - started
+        ok = status is not None and 200 <= status < 300
+        if ok:
+            error = None
+        elif status is not None and error is None:
+            error = f"HTTP {status}"
+        self.stats['entregues' if ok else 'falhas'] += 1
+        self.stats['ultima_latencia'] = round(latency, 3)
+        self.stats['ultimo_erro'] = error
+        return {'ok': ok, 'status': status, 'tentativas': attempt, 'erro': error}
+
+class WebhookNotifier:
+    """
+    Classe para entregar alertas a vários endpoints em paralelo
+    """
+
+    def __init__(self, endpoints=None):
+        self.endpoints = load_endpoints() if endpoints is None else endpoints
+        self._workers = {endpoint['nome']: _EndpointWorker(endpoint) for endpoint in self.endpoints}
+
+    def notify(self, payload):
+        """
+        Enfileira um alerta para todos os endpoints sem esperar a entrega
+
+        Args:
+            payload: dict serializável em JSON
+
+        Returns:
+            dict: Future do resultado por nome de endpoint
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        futures = {}
+        for name, worker in self._workers.items():
+            futures[name] = Future()
+            worker.submit(body, futures[name])
+        return futures
+
+    def send(self, payload, wait_timeout=None):
+        """
+        Envia um alerta e espera as entregas por até wait_timeout segundos
+
+        Endpoints que não responderem a tempo continuam sendo tentados em
+        segundo plano e aparecem como pendentes no resultado.
+
+        Returns:
+            dict: Resultado por nome de endpoint ('ok', 'status', 'tentativas', 'erro')
+        """
+        futures = self.notify(payload)
+        wait(futures.values(), timeout=wait_timeout)
+        return {
+            name: future.result() if future.done()
+            else {'ok': False, 'status': None, 'tentativas': None, 'erro': "pendente"}
+            for name, future in futures.items()
+        }
+
+    def status(self):
+        """Contadores de entrega e tamanho da fila por endpoint"""
+        return {
+            name: dict(worker.stats, pendentes=worker.queue.qsize())
+            for name, worker in self._workers.items()
+        }
+
+    def close(self):
+        """Encerra as threads de entrega após esvaziar as filas"""
+        for worker in self._workers.values():
+            worker.stop()
+
+class _ReceiverHandler(BaseHTTPRequestHandler):
+    """Receptor local que valida a assinatura dos alertas"""
+    secret = ""
+    delay = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        valid = verify_signature(self.secret, body, self.headers.get(TIMESTAMP_HEADER),
+                                 self.headers.get(SIGNATURE_HEADER))
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(200 if valid else 401)
+        self.end_headers()
+        payload = json.loads(body or b"{}") if valid else {}
+        print(f"{'OK' if valid else 'ASSINATURA INVÁLIDA'}: {payload.get('nivel')} {payload.get('id')}")
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_receiver(port, secret, delay=0.0):
+    """
+    Sobe um receptor de webhooks local para testes
+
+    Args:
+        port: Porta HTTP (0 escolhe uma porta livre)
+        secret: Segredo usado para validar as assinaturas
+        delay: Atraso artificial por requisição (simula um endpoint lento)
+
+    Returns:
+        ThreadingHTTPServer: Servidor já iniciado em uma thread
+    """
+    handler = type("Receiver", (_ReceiverHandler,), {'secret': secret, 'delay': delay})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notificações por webhook")
+    parser.add_argument("--receptor", type=int, metavar="PORTA", help="Sobe um receptor local de teste")
+    parser.add_argument("--segredo", default="", help="Segredo do receptor local")
+    parser.add_argument("--atraso", type=float, default=0.0, help="Atraso do receptor local (segundos)")
+    parser.add_argument("--teste", action="store_true", help="Envia um alerta de teste aos endpoints configurados")
+    args = parser.parse_args()
+
+    if args.receptor is not None:
+        server = serve_receiver(args.receptor, args.segredo, args.atraso)
+        print(f"Receptor de webhooks em http://127.0.0.1:{server.server_port}/")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.teste:
+        notifier = WebhookNotifier()
+        payload = {'id': uuid.uuid4().hex, 'evento': 'teste', 'nivel': None,
+                   'enviado_em': datetime.now().isoformat(timespec='seconds')}
+        for name, result in notifier.send(payload, wait_timeout=30).items():
+            print(f"{name}: {'entregue' if result['ok'] else result['erro']}")
+        notifier.close()
+    else:
+        parser.print_help()